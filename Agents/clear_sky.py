@@ -0,0 +1,190 @@
+# SolarSage - Clear-Sky Irradiance
+# Sun position from latitude, longitude and time, and what a cloudless sky
+# delivers to a horizontal panel, tabulated per site per year.
+
+"""Clear-sky irradiance for any site, from the sun's position.
+
+The forecast used a fixed 6-18h sine curve, the same on every day of the year,
+scaled by a capacity looked up by city name. Here the sun's elevation comes
+from the site's latitude and longitude and the date (NOAA's solar-position
+equations), and the Haurwitz model turns it into clear-sky global horizontal
+irradiance. A year of it, hour by hour in UTC, is one table per site:
+
+- built once, in one vectorised pass, and saved as <dir>/<lat>_<lon>_<year>.npy;
+- opened memory-mapped after that, so a forecast is a slice of a file the OS
+  already has in its page cache, shared by every process that reads it.
+
+Sites are keyed by coordinates rounded to 0.01 degrees, about a kilometre.
+"""
+
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The cities the forecast used to know by name, so their locations keep working.
+CITY_COORDINATES: Dict[str, Tuple[float, float]] = {
+    "Bengaluru": (12.97, 77.59), "Mumbai": (19.08, 72.88), "Delhi": (28.61, 77.21),
+    "Chennai": (13.08, 80.27), "Hyderabad": (17.39, 78.49), "Pune": (18.52, 73.86),
+    "Kolkata": (22.57, 88.36), "Ahmedabad": (23.02, 72.57),
+}
+DEFAULT_COORDINATES = CITY_COORDINATES["Bengaluru"]
+
+SAMPLES_PER_HOUR = 6  # each hour's energy is the mean of six 10-minute readings
+TABLE_DTYPE = np.float32
+
+
+def site_coordinates(location: str) -> Tuple[float, float]:
+    """(latitude, longitude) for 'lat, lon' or one of CITY_COORDINATES
+    ('City, Country'); any other name falls back to DEFAULT_COORDINATES."""
+    parts = [part.strip() for part in location.split(',')]
+    if len(parts) == 2:
+        try:
+            latitude, longitude = float(parts[0]), float(parts[1])
+        except ValueError:
+            pass
+        else:
+            if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+                return latitude, longitude
+    return CITY_COORDINATES.get(parts[0], DEFAULT_COORDINATES)
+
+
+def solar_elevation(latitude: float, longitude: float, day_of_year, hour_utc) -> np.ndarray:
+    """Sun elevation (degrees) at fractional UTC hours of 1-based days of the
+    year, by NOAA's general solar-position equations; arrays broadcast."""
+    day_of_year = np.asarray(day_of_year, dtype=float)
+    hour_utc = np.asarray(hour_utc, dtype=float)
+    gamma = 2 * np.pi / 365 * (day_of_year - 1 + (hour_utc - 12) / 24)
+    equation_of_time = 229.18 * (
+        0.000075 + 0.001868 * np.cos(gamma) - 0.032077 * np.sin(gamma)
+        - 0.014615 * np.cos(2 * gamma) - 0.040849 * np.sin(2 * gamma)
+    )
+    declination = (
+        0.006918 - 0.399912 * np.cos(gamma) + 0.070257 * np.sin(gamma)
+        - 0.006758 * np.cos(2 * gamma) + 0.000907 * np.sin(2 * gamma)
+        - 0.002697 * np.cos(3 * gamma) + 0.00148 * np.sin(3 * gamma)
+    )
+    solar_minutes = hour_utc * 60 + equation_of_time + 4 * longitude
+    hour_angle = np.radians(solar_minutes / 4 - 180)
+    lat = np.radians(latitude)
+    cos_zenith = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(cos_zenith, -1, 1)))
+
+
+def clear_sky_ghi(elevation) -> np.ndarray:
+    """Haurwitz clear-sky global horizontal irradiance (W/m²); 0 with the sun down."""
+    cos_zenith = np.sin(np.radians(np.asarray(elevation, dtype=float)))
+    lit = cos_zenith > 0
+    safe = np.where(lit, cos_zenith, 1.0)  # keeps the division off the night-time zeros
+    return np.where(lit, 1098.0 * safe * np.exp(-0.059 / safe), 0.0)
+
+
+def build_year(latitude: float, longitude: float, year: int) -> np.ndarray:
+    """Clear-sky energy (kWh/m²) for each UTC hour of `year`."""
+    days = (datetime(year + 1, 1, 1) - datetime(year, 1, 1)).days
+    hours = np.arange(days * 24)
+    minutes = (np.arange(SAMPLES_PER_HOUR) + 0.5) / SAMPLES_PER_HOUR
+    day_of_year = (hours // 24 + 1)[:, None]
+    hour_utc = (hours % 24)[:, None] + minutes[None, :]
+    ghi = clear_sky_ghi(solar_elevation(latitude, longitude, day_of_year, hour_utc))
+    return (ghi.mean(axis=1) / 1000).astype(TABLE_DTYPE)
+
+
+class IrradianceTables:
+    """Yearly clear-sky tables for any number of sites, kept as .npy files in
+    `directory` and opened memory-mapped."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.built = 0
+        self._open: Dict[tuple, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def table(self, latitude: float, longitude: float, year: int) -> np.ndarray:
+        key = (round(latitude, 2), round(longitude, 2), year)
+        with self._lock:
+            table = self._open.get(key)
+            if table is None:
+                table = self._open[key] = self._load_or_build(*key)
+            return table
+
+    def window(self, latitude: float, longitude: float, start: datetime, hours: int) -> np.ndarray:
+        """Clear-sky kWh/m² for `hours` UTC hours from `start`, across a new
+        year if it runs into one."""
+        out = np.empty(hours, dtype=float)
+        filled, at = 0, naive_utc(start).replace(minute=0, second=0, microsecond=0)
+        while filled < hours:
+            table = self.table(latitude, longitude, at.year)
+            first = int((at - datetime(at.year, 1, 1)) / timedelta(hours=1))
+            taken = min(hours - filled, len(table) - first)
+            out[filled:filled + taken] = table[first:first + taken]
+            filled += taken
+            at = datetime(at.year + 1, 1, 1)
+        return out
+
+    def _load_or_build(self, latitude: float, longitude: float, year: int) -> np.ndarray:
+        path = self.directory / f"{latitude:+07.2f}_{longitude:+08.2f}_{year}.npy"
+        expected = (datetime(year + 1, 1, 1) - datetime(year, 1, 1)).days * 24
+        try:
+            table = np.load(path, mmap_mode='r')
+            if table.shape == (expected,) and table.dtype == TABLE_DTYPE:
+                return table
+            logger.warning(f"Irradiance table {path.name} has the wrong shape; rebuilding it")
+        except (OSError, ValueError):
+            pass  # not built yet, or unreadable: build it
+
+        table = build_year(latitude, longitude, year)
+        self.built += 1
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{path.stem}.{os.getpid()}.partial.npy")
+            np.save(partial, table)
+            os.replace(partial, path)  # a reader never maps a half-written file
+            return np.load(path, mmap_mode='r')
+        except OSError as e:
+            logger.warning(f"Irradiance table {path.name} not saved ({e}); using it from memory")
+            return table
+
+
+_default_directory = Path(os.getenv("IRRADIANCE_DIR") or Path(tempfile.gettempdir()) / "solarsage-irradiance")
+tables = IrradianceTables(_default_directory)
+
+
+def use_directory(directory: Path) -> IrradianceTables:
+    """Keep the default tables in `directory` from now on. A caller with its
+    own directory should hold its own IrradianceTables instead, as
+    ImageClassifierAgent does."""
+    global tables
+    tables = IrradianceTables(directory)
+    return tables
+
+
+def clear_sky_hours(location: str, start: datetime, hours: int,
+                    irradiance_tables: Optional[IrradianceTables] = None) -> np.ndarray:
+    """Clear-sky kWh/m² on a horizontal panel for each of `hours` UTC hours from
+    `start`, at a location as site_coordinates reads it, from
+    `irradiance_tables` (default: this module's `tables`)."""
+    latitude, longitude = site_coordinates(location)
+    return (irradiance_tables or tables).window(latitude, longitude, start, hours)
+
+
+def naive_utc(moment: datetime) -> datetime:
+    """`moment` as the naive UTC datetime the tables are indexed by; a naive
+    one is taken to be UTC already."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+
+def current_hour(now: Optional[datetime] = None) -> datetime:
+    """The start of this UTC hour, naive: where a forecast starts by default.
+    A `now` given with a timezone is converted to UTC."""
+    now = naive_utc(now) if now else datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(minute=0, second=0, microsecond=0)
@@ -7,9 +7,11 @@ import asyncio
 import cv2
 import numpy as np
 import base64
+import functools
+import math
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union, Any, Annotated
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Union, Any, Annotated
 import logging
 from enum import Enum
 import time
@@ -17,6 +19,11 @@ import time
 # Pydantic V2 compatible imports
 from pydantic import BaseModel, Field, field_validator
 
+try:
+    from Agents import clear_sky
+except ImportError:  # run as a script: python Agents/crew.py
+    import clear_sky
+
 # CrewAI for agent orchestration (with fallback)
 logger = logging.getLogger(__name__)
 
@@ -104,7 +111,8 @@ class QuartzForecastResult(BaseModel):
     def validate_forecast_length(cls, v):
         if len(v) != 48:
             raise ValueError('Forecast must contain exactly 48 hourly values')
-        return [round(val, 3) for val in v]
+        # One vectorised pass; a no-op on forecast_fleet's already-rounded rows.
+        return np.round(np.asarray(v, dtype=float), 3).tolist()
 
 # Decision Result Schema (Pydantic V2 Compatible)
 class IntelligentDecisionResult(BaseModel):
@@ -156,40 +164,149 @@ class ComprehensivePipelineResult(BaseModel):
     summary: Dict[str, Any] = Field(description="Executive summary")
     total_processing_time_ms: float = Field(description="Total pipeline processing time")
 
+# ============================================================================
+# LEAN STAGE RECORDS (INTERNAL)
+# ============================================================================
+
+# What one stage hands the next inside a process. Plain named tuples: built and
+# read without validation or dict round-trips, which per frame cost more than
+# everything but the OpenCV work. Their fields are the schemas' own, so
+# Model(**record.rendered(), ...) builds the validated result where one leaves
+# the pipeline — the standalone tools, the API and the pipeline result.
+
+class Prose(NamedTuple):
+    """Text not written yet: a PROSE_TEMPLATES id and the values it fills in.
+    
+    Insights, forecast analysis and decision reasoning took longer to format
+    than the numbers behind them, for every frame, and most were never read.
+    Stages pass this on instead; render() writes the text when something asks
+    for it, and ref() is the small JSON form stored in its place.
+    """
+    template: str
+    values: tuple
+
+    def render(self) -> Union[str, List[str]]:
+        return PROSE_TEMPLATES[self.template](*self.values)
+
+    def ref(self) -> Dict[str, Any]:
+        return {'template': self.template, 'values': list(self.values)}
+
+
+def render_prose(value: Any) -> Any:
+    """The text for a Prose or its ref(); anything else — text already written,
+    as older records hold — comes back as it is."""
+    if isinstance(value, Prose):
+        return value.render()
+    if isinstance(value, dict) and value.get('template') in PROSE_TEMPLATES:
+        return Prose(value['template'], tuple(value['values'])).render()
+    return value
+
+
+class FrameAnalysis(NamedTuple):
+    dust_level: float
+    confidence: float
+    risk_category: RiskLevel
+    visual_score: float
+    image_quality: str
+    ai_insights: Prose
+    processing_time_ms: float
+
+    def rendered(self) -> Dict[str, Any]:
+        """The fields, prose written out, as AIAnalysisResult takes them"""
+        return {**self._asdict(), 'ai_insights': self.ai_insights.render()}
+
+class SolarForecast(NamedTuple):
+    daily_power_loss_kwh: float
+    power_loss_percentage: float
+    forecast_confidence: float
+    generation_forecast_48h: List[float]
+    optimal_cleaning_window: CleaningWindow
+    economic_factors: Dict[str, float]
+    llama_analysis: Prose
+
+    def rendered(self) -> Dict[str, Any]:
+        """The fields, prose written out, as QuartzForecastResult takes them"""
+        return {**self._asdict(), 'llama_analysis': self.llama_analysis.render()}
+
+class CleaningDecision(NamedTuple):
+    environmental_risk: float
+    economic_viability_score: float
+    decision_confidence: float
+    cleaning_priority: DecisionType
+    estimated_savings_weekly: float
+    decision_score: float
+    risk_factors: List[str]
+    recommendations: List[str]
+    cost_benefit_analysis: Dict[str, float]
+    llama_reasoning: Prose
+
+    def rendered(self) -> Dict[str, Any]:
+        """The fields, prose written out, as IntelligentDecisionResult takes them"""
+        return {**self._asdict(), 'llama_reasoning': self.llama_reasoning.render()}
+
 # ============================================================================
 # PRODUCTION IMAGE PROCESSOR (STANDALONE)
 # ============================================================================
 
+# One row per frame from ProductionImageProcessor.process_batch: the numbers a
+# site sweep needs, without an AIAnalysisResult (and its insights) per frame.
+BATCH_RESULT_DTYPE = np.dtype([
+    ('dust_level', 'f8'),
+    ('confidence', 'f8'),
+    ('visual_score', 'f8'),
+    ('risk_category', 'U8'),
+    ('image_quality', 'U6'),
+])
+
+# Reduced-size JPEG decodes OpenCV can do straight from the DCT coefficients,
+# largest reduction first: a 1/8 decode never builds the full-size frame at all.
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# JPEG start-of-frame markers carry the image size; C4, C8 and CC share the
+# range but are a Huffman table, a reserved marker and arithmetic coding tables.
+_JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
 class ProductionImageProcessor:
     """Production-grade image processing with real computer vision"""
     
     @staticmethod
-    def process_image(image_input: Union[str, np.ndarray], image_id: Optional[str] = None) -> AIAnalysisResult:
-        """Process image with advanced computer vision analysis"""
-        start_time = datetime.now()
+    def process_image(image_input: Union[str, np.ndarray], image_id: Optional[str] = None,
+                      max_edge: Optional[int] = None) -> AIAnalysisResult:
+        """Process image with advanced computer vision analysis
         
+        max_edge caps the long edge of the frame the analysis runs on; None
+        analyses at full resolution. See load_image.
+        """
         if image_id is None:
             image_id = f"img_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
         
+        analysis, image_shape = ProductionImageProcessor.analyze(image_input, max_edge)
+        return AIAnalysisResult(
+            timestamp=datetime.now().isoformat(),
+            image_id=image_id,
+            npu_acceleration=True,  # NPU processing simulation
+            metadata={
+                'image_shape': list(image_shape),
+                'analysis_max_edge': max_edge,
+                'analysis_method': 'advanced_cv',
+                'model_version': '2025.1',
+                'algorithms_used': ['brightness', 'contrast', 'saturation', 'edge_detection']
+            },
+            **analysis.rendered()
+        )
+    
+    @staticmethod
+    def analyze(image_input: Union[str, np.ndarray], max_edge: Optional[int] = None) -> Tuple[FrameAnalysis, tuple]:
+        """process_image's measurements as a FrameAnalysis, without the schema,
+        and the shape of the frame they were taken on"""
+        start_time = datetime.now()
+        
         try:
-            # Handle different input types
-            if isinstance(image_input, str):
-                if image_input.startswith('data:') or len(image_input) > 1000:
-                    # Base64 encoded image
-                    if image_input.startswith('data:'):
-                        image_input = image_input.split(',')[1]
-                    image_bytes = base64.b64decode(image_input)
-                    nparr = np.frombuffer(image_bytes, np.uint8)
-                    image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                else:
-                    # File path
-                    image = cv2.imread(image_input)
-            else:
-                # NumPy array
-                image = image_input
-            
-            if image is None:
-                raise ValueError("Invalid image data or file not found")
+            image = ProductionImageProcessor.load_image(image_input, max_edge)
             
             # Advanced computer vision analysis
             analysis_results = ProductionImageProcessor._analyze_dust_coverage(image)
@@ -197,8 +314,10 @@ class ProductionImageProcessor:
             # Calculate processing time
             processing_time = (datetime.now() - start_time).total_seconds() * 1000
             
-            # Generate AI insights
-            insights = ProductionImageProcessor._generate_insights(analysis_results)
+            # AI insights, written when asked for
+            insights = ProductionImageProcessor.insights(
+                analysis_results['dust_level'], analysis_results['confidence']
+            )
             
             # Determine risk category
             risk_category = ProductionImageProcessor._calculate_risk_category(
@@ -206,29 +325,179 @@ class ProductionImageProcessor:
                 analysis_results['confidence']
             )
             
-            return AIAnalysisResult(
-                timestamp=datetime.now().isoformat(),
-                image_id=image_id,
-                dust_level=analysis_results['dust_level'],
-                confidence=analysis_results['confidence'],
-                risk_category=risk_category,
-                visual_score=analysis_results['visual_score'],
-                npu_acceleration=True,  # NPU processing simulation
-                image_quality=analysis_results['image_quality'],
-                ai_insights=insights,
-                processing_time_ms=processing_time,
-                metadata={
-                    'image_shape': list(image.shape),
-                    'analysis_method': 'advanced_cv',
-                    'model_version': '2025.1',
-                    'algorithms_used': ['brightness', 'contrast', 'saturation', 'edge_detection']
-                }
-            )
+            return ProductionImageProcessor.frame_analysis(
+                analysis_results, risk_category, insights, processing_time
+            ), image.shape
             
         except Exception as e:
             logger.error(f"Image processing failed: {str(e)}")
             raise Exception(f"Image processing failed: {str(e)}")
     
+    @staticmethod
+    def frame_analysis(measured: Dict, risk_category: Union[RiskLevel, str], insights: Prose,
+                       processing_time_ms: float) -> FrameAnalysis:
+        """A FrameAnalysis, percentages rounded as AIAnalysisResult stores them"""
+        for name in ('dust_level', 'confidence', 'visual_score'):
+            if not 0 <= measured[name] <= 100:
+                raise ValueError(f'{name} must be between 0 and 100')
+        return FrameAnalysis(
+            dust_level=round(float(measured['dust_level']), 2),
+            confidence=round(float(measured['confidence']), 2),
+            risk_category=RiskLevel(risk_category),
+            visual_score=round(float(measured['visual_score']), 2),
+            image_quality=str(measured['image_quality']),
+            ai_insights=insights,
+            processing_time_ms=processing_time_ms,
+        )
+    
+    @staticmethod
+    def load_image(image_input: Union[str, np.ndarray], max_edge: Optional[int] = None) -> np.ndarray:
+        """Decode a file path, base64 string or data URL; arrays pass through
+        
+        With max_edge, the frame comes back with its long edge no larger than
+        that. A JPEG is decoded straight to the nearest reduced size OpenCV
+        offers at or above it, so a 12 MP frame never exists at full size; the
+        last step down is an area resample to max_edge exactly, which keeps the
+        working resolution the same whatever camera took the frame.
+        """
+        if isinstance(image_input, str):
+            if image_input.startswith('data:') or len(image_input) > 1000:
+                # Base64 encoded image
+                if image_input.startswith('data:'):
+                    image_input = image_input.split(',')[1]
+                image_bytes = base64.b64decode(image_input)
+                nparr = np.frombuffer(image_bytes, np.uint8)
+                image = ProductionImageProcessor._decode(nparr, max_edge)
+            elif max_edge:
+                # File path, decoded from its bytes so the reduced flags apply
+                try:
+                    image = ProductionImageProcessor._decode(np.fromfile(image_input, np.uint8), max_edge)
+                except OSError:
+                    image = None
+            else:
+                # File path
+                image = cv2.imread(image_input)
+        else:
+            # NumPy array
+            image = image_input
+        
+        if image is None:
+            raise ValueError("Invalid image data or file not found")
+        return ProductionImageProcessor._fit(image, max_edge)
+    
+    @staticmethod
+    def _decode(data: np.ndarray, max_edge: Optional[int]) -> Optional[np.ndarray]:
+        """imdecode at the largest reduction that keeps the long edge >= max_edge"""
+        flag = cv2.IMREAD_COLOR
+        size = ProductionImageProcessor._jpeg_size(memoryview(data)) if max_edge else None
+        if size:
+            for factor, reduced in REDUCED_DECODE_FLAGS:
+                if max(size) / factor >= max_edge:
+                    flag = reduced
+                    break
+        return cv2.imdecode(data, flag)
+    
+    @staticmethod
+    def _jpeg_size(data: memoryview) -> Optional[Tuple[int, int]]:
+        """(width, height) from a JPEG's frame header, without decoding the image"""
+        if bytes(data[:2]) != b'\xff\xd8':
+            return None
+        i = 2
+        while i + 9 <= len(data):
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF:  # fill byte
+                i += 1
+                continue
+            if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # standalone markers
+                i += 2
+                continue
+            if marker in _JPEG_SOF_MARKERS:
+                height = int.from_bytes(data[i + 5:i + 7], 'big')
+                width = int.from_bytes(data[i + 7:i + 9], 'big')
+                return width, height
+            i += 2 + int.from_bytes(data[i + 2:i + 4], 'big')
+        return None
+    
+    @staticmethod
+    def _fit(image: np.ndarray, max_edge: Optional[int]) -> np.ndarray:
+        """Area-resample so the long edge is at most max_edge"""
+        height, width = image.shape[:2]
+        if not max_edge or max(height, width) <= max_edge:
+            return image
+        scale = max_edge / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+    
+    @staticmethod
+    def process_batch(frames: Sequence[Union[str, np.ndarray]],
+                      max_edge: Optional[int] = None) -> np.ndarray:
+        """Analyse many frames at once; returns one BATCH_RESULT_DTYPE row per frame.
+        
+        Same-sized frames are stacked and measured together, so a site sweep pays
+        for one colour conversion and one Laplacian per frame size rather than one
+        per frame. Readings are identical to process_image on the same frame —
+        the thresholds downstream must not care which path measured it.
+        """
+        try:
+            images = [ProductionImageProcessor.load_image(frame, max_edge) for frame in frames]
+            results = np.empty(len(images), dtype=BATCH_RESULT_DTYPE)
+            
+            by_shape: Dict[tuple, List[int]] = {}
+            for index, image in enumerate(images):
+                by_shape.setdefault(image.shape, []).append(index)
+            
+            for indexes in by_shape.values():
+                stack = np.stack([images[i] for i in indexes])
+                scores = ProductionImageProcessor._score_measurements(
+                    **ProductionImageProcessor._measure_stack(stack)
+                )
+                rows = results[indexes]
+                for field in ('dust_level', 'confidence', 'visual_score', 'image_quality'):
+                    rows[field] = scores[field]
+                rows['risk_category'] = [
+                    ProductionImageProcessor._calculate_risk_category(dust, confidence).value
+                    for dust, confidence in zip(rows['dust_level'], rows['confidence'])
+                ]
+                results[indexes] = rows
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Batch image processing failed: {str(e)}")
+            raise Exception(f"Batch image processing failed: {str(e)}")
+    
+    @staticmethod
+    def _measure_stack(stack: np.ndarray) -> Dict[str, np.ndarray]:
+        """The four global statistics for an (N, H, W, 3) stack of BGR frames"""
+        n, height, width = stack.shape[:3]
+        
+        # Colour conversion is per pixel, so the stack converts as one tall image.
+        flat = stack.reshape(n * height, width, 3)
+        gray = cv2.cvtColor(flat, cv2.COLOR_BGR2GRAY).reshape(n, height, width)
+        saturation = cv2.cvtColor(flat, cv2.COLOR_BGR2HSV)[:, :, 1].reshape(n, -1)
+        
+        # The Laplacian reads neighbouring rows. Padding every frame with its own
+        # reflected border (OpenCV's default) keeps one frame from bleeding into
+        # the next, so the tall image gives exactly the per-frame result.
+        padded = np.pad(gray, ((0, 0), (1, 1), (0, 0)), mode='reflect')
+        laplacian = cv2.Laplacian(padded.reshape(n * (height + 2), width), cv2.CV_64F)
+        laplacian = laplacian.reshape(n, height + 2, width)[:, 1:-1].reshape(n, -1)
+        
+        # Canny's hysteresis follows edges wherever they lead, across a frame
+        # boundary too, so it is the one stage that runs frame by frame.
+        edge_pixels = np.array([np.count_nonzero(cv2.Canny(g, 50, 150)) for g in gray])
+        
+        flat_gray = gray.reshape(n, -1)
+        return {
+            'mean_brightness': flat_gray.mean(axis=1),
+            'std_brightness': flat_gray.std(axis=1),
+            'laplacian_var': laplacian.var(axis=1),
+            'mean_saturation': saturation.mean(axis=1),
+            'edge_density': edge_pixels / (height * width),
+        }
+    
     @staticmethod
     def _analyze_dust_coverage(image: np.ndarray) -> Dict[str, float]:
         """Advanced computer vision analysis for dust detection"""
@@ -236,65 +505,21 @@ class ProductionImageProcessor:
             # Multi-spectral analysis
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-            
-            # 1. Brightness Analysis (dust reduces panel reflectivity)
-            mean_brightness = np.mean(gray)
-            brightness_factor = max(0, (200 - mean_brightness) / 200)
-            
-            # 2. Contrast Analysis (dust reduces local contrast)
-            laplacian_var = cv2.Laplacian(gray, cv2.CV_64F).var()
-            contrast_factor = max(0, 1 - min(laplacian_var / 1000, 1))
-            
-            # 3. Color Saturation Analysis (dust desaturates colors)
-            saturation = hsv[:, :, 1]
-            mean_saturation = np.mean(saturation)
-            saturation_factor = max(0, 1 - (mean_saturation / 255))
-            
-            # 4. Edge Density Analysis (dust obscures panel edges)
             edges = cv2.Canny(gray, 50, 150)
-            edge_density = np.sum(edges > 0) / edges.size
-            edge_factor = max(0, 1 - min(edge_density * 15, 1))
-            
-            # Weighted combination of factors
-            dust_level = (
-                brightness_factor * 0.30 +
-                contrast_factor * 0.25 +
-                saturation_factor * 0.25 +
-                edge_factor * 0.20
-            ) * 100
-            
-            # Clamp to the reportable range. Nothing random belongs here: the same
-            # frame has to produce the same reading, or the thresholds that decide
-            # whether to open a valve are being applied to noise.
-            dust_level = max(0.0, min(100.0, dust_level))
-            
-            # Calculate confidence based on image quality metrics
-            std_brightness = np.std(gray)
-            
-            confidence_base = 75
-            if std_brightness > 40 and laplacian_var > 100:
-                confidence = min(95, confidence_base + 15)
-            elif std_brightness > 25 and laplacian_var > 50:
-                confidence = min(90, confidence_base + 10)
-            else:
-                confidence = max(65, confidence_base - 10)
             
-            # Visual score calculation
-            visual_score = max(10, 100 - dust_level - (5 if confidence < 80 else 0))
-            
-            # Image quality assessment
-            if std_brightness > 40 and mean_brightness > 80 and laplacian_var > 100:
-                image_quality = "HIGH"
-            elif std_brightness > 25 and mean_brightness > 50:
-                image_quality = "MEDIUM"
-            else:
-                image_quality = "LOW"
+            scores = ProductionImageProcessor._score_measurements(
+                mean_brightness=np.mean(gray),
+                std_brightness=np.std(gray),
+                laplacian_var=cv2.Laplacian(gray, cv2.CV_64F).var(),
+                mean_saturation=np.mean(hsv[:, :, 1]),
+                edge_density=np.sum(edges > 0) / edges.size,
+            )
             
             return {
-                'dust_level': round(dust_level, 2),
-                'confidence': round(confidence, 2),
-                'visual_score': round(visual_score, 2),
-                'image_quality': image_quality
+                'dust_level': float(scores['dust_level']),
+                'confidence': float(scores['confidence']),
+                'visual_score': float(scores['visual_score']),
+                'image_quality': str(scores['image_quality'])
             }
             
         except Exception as e:
@@ -304,6 +529,75 @@ class ProductionImageProcessor:
             logger.error(f"Computer vision analysis failed: {str(e)}")
             raise
     
+    @staticmethod
+    def _score_measurements(mean_brightness, std_brightness, laplacian_var,
+                            mean_saturation, edge_density) -> Dict[str, np.ndarray]:
+        """Dust level, confidence and quality from the four statistics.
+        
+        Takes scalars or one value per frame, so the single-frame and batch paths
+        share one formula rather than two that can drift apart.
+        """
+        mean_brightness = np.asarray(mean_brightness, dtype=np.float64)
+        std_brightness = np.asarray(std_brightness, dtype=np.float64)
+        laplacian_var = np.asarray(laplacian_var, dtype=np.float64)
+        
+        # 1. Brightness Analysis (dust reduces panel reflectivity)
+        brightness_factor = np.maximum(0, (200 - mean_brightness) / 200)
+        
+        # 2. Contrast Analysis (dust reduces local contrast)
+        contrast_factor = np.maximum(0, 1 - np.minimum(laplacian_var / 1000, 1))
+        
+        # 3. Color Saturation Analysis (dust desaturates colors)
+        saturation_factor = np.maximum(0, 1 - (np.asarray(mean_saturation) / 255))
+        
+        # 4. Edge Density Analysis (dust obscures panel edges)
+        edge_factor = np.maximum(0, 1 - np.minimum(np.asarray(edge_density) * 15, 1))
+        
+        # Weighted combination of factors
+        dust_level = (
+            brightness_factor * 0.30 +
+            contrast_factor * 0.25 +
+            saturation_factor * 0.25 +
+            edge_factor * 0.20
+        ) * 100
+        
+        # Clamp to the reportable range. Nothing random belongs here: the same
+        # frame has to produce the same reading, or the thresholds that decide
+        # whether to open a valve are being applied to noise.
+        dust_level = np.clip(dust_level, 0.0, 100.0)
+        
+        # Calculate confidence based on image quality metrics
+        confidence_base = 75
+        confidence = np.select(
+            [(std_brightness > 40) & (laplacian_var > 100),
+             (std_brightness > 25) & (laplacian_var > 50)],
+            [min(95, confidence_base + 15), min(90, confidence_base + 10)],
+            default=max(65, confidence_base - 10),
+        ).astype(np.float64)
+        
+        # Visual score calculation
+        visual_score = np.maximum(10, 100 - dust_level - np.where(confidence < 80, 5, 0))
+        
+        # Image quality assessment
+        image_quality = np.select(
+            [(std_brightness > 40) & (mean_brightness > 80) & (laplacian_var > 100),
+             (std_brightness > 25) & (mean_brightness > 50)],
+            ["HIGH", "MEDIUM"],
+            default="LOW",
+        )
+        
+        return {
+            'dust_level': np.round(dust_level, 2),
+            'confidence': np.round(confidence, 2),
+            'visual_score': np.round(visual_score, 2),
+            'image_quality': image_quality
+        }
+    
+    @staticmethod
+    def insights(dust_level: float, confidence: float) -> Prose:
+        """_generate_insights for these readings, as a Prose"""
+        return Prose('insights', (dust_level, confidence))
+    
     @staticmethod
     def _generate_insights(analysis_results: Dict[str, float]) -> List[str]:
         """Generate comprehensive AI insights"""
@@ -372,10 +666,10 @@ class ProductionImageProcessor:
 # STANDALONE TOOLS (WORK WITHOUT CREWAI)
 # ============================================================================
 
-def standalone_analyze_image(image_path: str) -> Dict:
+def standalone_analyze_image(image_path: str, max_edge: Optional[int] = None) -> Dict:
     """Standalone image analysis without CrewAI dependency"""
     try:
-        result = ProductionImageProcessor.process_image(image_path)
+        result = ProductionImageProcessor.process_image(image_path, max_edge=max_edge)
         return result.model_dump()
     except Exception as e:
         logger.error(f"Image analysis failed: {str(e)}")
@@ -384,24 +678,17 @@ def standalone_analyze_image(image_path: str) -> Dict:
 def standalone_solar_forecast(location: str, image_analysis: Dict) -> Dict:
     """Standalone solar forecasting without CrewAI dependency"""
     try:
-        dust_level = image_analysis.get('dust_level', 0)
-        confidence = image_analysis.get('confidence', 0)
-        
-        forecast_data = calculate_advanced_forecast(dust_level, location, confidence)
+        forecast = solar_forecast(
+            image_analysis.get('dust_level', 0), image_analysis.get('confidence', 0), location
+        )
         
         result = QuartzForecastResult(
             timestamp=datetime.now().isoformat(),
             forecast_id=f"forecast_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}",
             location=location,
-            daily_power_loss_kwh=forecast_data['daily_power_loss'],
-            power_loss_percentage=forecast_data['power_loss_percentage'],
-            forecast_confidence=forecast_data['confidence'],
             weather_impact=WeatherImpact.FAVORABLE,
-            generation_forecast_48h=forecast_data['forecast_48h'],
-            optimal_cleaning_window=forecast_data['cleaning_window'],
-            economic_factors=forecast_data['economic_factors'],
-            llama_analysis=forecast_data['llama_analysis'],
-            processing_time_ms=25.0
+            processing_time_ms=25.0,
+            **forecast.rendered()
         )
         
         return result.model_dump()
@@ -413,22 +700,16 @@ def standalone_solar_forecast(location: str, image_analysis: Dict) -> Dict:
 def standalone_decision_engine(image_analysis: Dict, forecast: Dict) -> Dict:
     """Standalone decision engine without CrewAI dependency"""
     try:
-        decision_data = calculate_intelligent_decision(image_analysis, forecast)
+        decision = cleaning_decision(
+            image_analysis.get('dust_level', 0), image_analysis.get('confidence', 0),
+            forecast.get('economic_factors', {})
+        )
         
         result = IntelligentDecisionResult(
             timestamp=datetime.now().isoformat(),
             decision_id=f"decision_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}",
-            environmental_risk=decision_data['environmental_risk'],
-            economic_viability_score=decision_data['economic_viability'],
-            decision_confidence=decision_data['confidence'],
-            cleaning_priority=decision_data['decision'],
-            estimated_savings_weekly=decision_data['weekly_savings'],
-            decision_score=decision_data['score'],
-            risk_factors=decision_data['risk_factors'],
-            recommendations=decision_data['recommendations'],
-            cost_benefit_analysis=decision_data['cost_benefit'],
-            llama_reasoning=decision_data['reasoning'],
-            processing_time_ms=35.0
+            processing_time_ms=35.0,
+            **decision.rendered()
         )
         
         return result.model_dump()
@@ -437,6 +718,32 @@ def standalone_decision_engine(image_analysis: Dict, forecast: Dict) -> Dict:
         logger.error(f"Decision engine failed: {str(e)}")
         return {"error": str(e), "timestamp": datetime.now().isoformat()}
 
+def standalone_fleet_decision_engine(image_analyses: Sequence[Dict], forecasts: Sequence[Dict]) -> List[Dict]:
+    """standalone_decision_engine for a whole site: one decide_fleet pass over
+    every panel instead of a decision and a schema validation each. Results are
+    in standalone_decision_engine's shape, in order; the bands keep every score
+    in the schema's ranges, so rows are built without a model apiece."""
+    try:
+        decisions = fleet_cleaning_decisions(
+            [analysis.get('dust_level', 0) for analysis in image_analyses],
+            [analysis.get('confidence', 0) for analysis in image_analyses],
+            [forecast.get('economic_factors', {}) for forecast in forecasts],
+        )
+        stamp = datetime.now()
+        batch = f"decision_{stamp.strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+        return [
+            {
+                'timestamp': stamp.isoformat(),
+                'decision_id': f"{batch}_{i}",
+                **decision.rendered(),
+                'processing_time_ms': 35.0
+            }
+            for i, decision in enumerate(decisions)
+        ]
+    except Exception as e:
+        logger.error(f"Fleet decision engine failed: {str(e)}")
+        return [{"error": str(e), "timestamp": datetime.now().isoformat()} for _ in image_analyses]
+
 def standalone_execution_controller(decision: Dict) -> Dict:
     """Standalone execution controller without CrewAI dependency"""
     try:
@@ -502,44 +809,82 @@ if CREWAI_AVAILABLE:
 # ============================================================================
 
 # Fraction of clear-sky generation assumed while no weather feed is connected.
+# It was a random draw per call, which forecast the same panel differently every
+# time it was analysed; fixed, the forecast is reproducible until real weather
+# is wired in.
 CLEAR_SKY_FACTOR = 0.90
 
+# The array each location is forecast for: its peak rating (kW at 1000 W/m²)
+# and the share of that which reaches the meter after inverter, wiring and
+# temperature losses. About 28 kWh on a clear Bengaluru day.
+SYSTEM_PEAK_KW = 5.0
+PERFORMANCE_RATIO = 0.80
 
-def calculate_advanced_forecast(dust_level: float, location: str, confidence: float) -> Dict:
-    """Advanced solar forecasting with realistic modeling"""
+FORECAST_HOURS = 48
+# Share of generation a fully dusted panel loses, and the curve it loses it on.
+DUST_LOSS_FRACTION = 0.45
+DUST_LOSS_EXPONENT = 1.3
+
+
+def dust_impact(dust_levels):
+    """Advanced dust impact modeling (non-linear): 0-1 for dust in percent"""
+    return (np.asarray(dust_levels, dtype=float) / 100) ** DUST_LOSS_EXPONENT
+
+
+@functools.lru_cache(maxsize=64)
+def clean_generation(location: str, start: datetime,
+                     irradiance_tables: Optional[clear_sky.IrradianceTables] = None) -> np.ndarray:
+    """Clean-panel clear-sky generation (kWh) for each of FORECAST_HOURS UTC
+    hours from `start`, at 'lat, lon' or 'City, Country'.
     
-    # Location-based solar capacity (kWh/day)
-    location_capacities = {
-        "Bengaluru": 28.5, "Mumbai": 26.2, "Delhi": 24.8, "Chennai": 29.1,
-        "Hyderabad": 27.8, "Pune": 27.2, "Kolkata": 25.5, "Ahmedabad": 30.1
-    }
+    A slice of the site's memory-mapped yearly irradiance table (clear_sky.py),
+    from `irradiance_tables` or the module's default ones, scaled to the array;
+    cached per location, hour and tables and shared read-only.
+    """
+    irradiance = clear_sky.clear_sky_hours(location, start, FORECAST_HOURS, irradiance_tables)
+    curve = irradiance * SYSTEM_PEAK_KW * PERFORMANCE_RATIO
+    curve.setflags(write=False)
+    return curve
+
+
+def forecast_fleet(dust_levels: Sequence[float], location: str, start: Optional[datetime] = None,
+                   irradiance_tables: Optional[clear_sky.IrradianceTables] = None) -> np.ndarray:
+    """48-hour generation forecast for many panels in one array operation.
     
-    city = location.split(',')[0].strip()
-    base_generation = location_capacities.get(city, 26.0)
+    Takes one dust level (percent) per panel and returns a (panels, 48) array
+    of kWh per hour from `start` (default: this UTC hour), rounded as the
+    forecast schema stores it: row i is
+    calculate_advanced_forecast(dust_levels[i], ...)['forecast_48h'].
+    """
+    curve = clean_generation(location, clear_sky.current_hour(start), irradiance_tables) * CLEAR_SKY_FACTOR
+    derate = 1 - dust_impact(dust_levels).reshape(-1, 1) * DUST_LOSS_FRACTION
+    return np.round(np.maximum(curve * derate, 0), 3)
+
+
+def _forecast_analysis(location: str, dust_level: float, daily_power_loss: float, daily_loss_usd: float,
+                       weather_factor: float, confidence: float, cleaning_window: str) -> str:
+    return f"""Advanced forecast analysis for {location}: Dust level {dust_level:.1f}% 
+    causing {daily_power_loss:.1f} kWh daily losses (${daily_loss_usd:.2f}). Assumed clear-sky 
+    factor {weather_factor*100:.0f}% (no weather feed connected). Confidence: {confidence:.1f}%. Action window: 
+    {cleaning_window}. Economic viability: Strong ROI potential."""
+
+
+def calculate_advanced_forecast(dust_level: float, location: str, confidence: float,
+                                start: Optional[datetime] = None,
+                                irradiance_tables: Optional[clear_sky.IrradianceTables] = None) -> Dict:
+    """Advanced solar forecasting with realistic modeling"""
     
-    # Advanced dust impact modeling (non-linear)
-    dust_impact = (dust_level / 100) ** 1.3
-    daily_power_loss = base_generation * dust_impact * 0.45
-    power_loss_percentage = (daily_power_loss / base_generation) * 100
+    start = clear_sky.current_hour(start)
+    # Clear-sky generation over the coming day, for this site and date
+    base_generation = float(clean_generation(location, start, irradiance_tables)[:24].sum())
     
-    # Placeholder for a weather source. It was a random draw per call, which made
-    # the same panel forecast differently every time it was analysed; a fixed
-    # clear-sky derate keeps the forecast reproducible until real weather is wired in.
+    impact = float(dust_impact(dust_level))
+    daily_power_loss = base_generation * impact * DUST_LOSS_FRACTION
+    power_loss_percentage = impact * DUST_LOSS_FRACTION * 100
     weather_factor = CLEAR_SKY_FACTOR
     
-    # 48-hour realistic solar generation forecast
-    forecast_48h = []
-    for hour in range(48):
-        hour_of_day = hour % 24
-        if 6 <= hour_of_day <= 18:
-            # Realistic solar curve
-            solar_intensity = np.sin(np.pi * (hour_of_day - 6) / 12) ** 0.6
-            base_hourly = (base_generation / 12) * solar_intensity
-            weather_adjusted = base_hourly * weather_factor
-            dust_adjusted = weather_adjusted * (1 - dust_impact * 0.45)
-            forecast_48h.append(round(max(0, dust_adjusted), 3))
-        else:
-            forecast_48h.append(0.0)
+    # 48-hour realistic solar generation forecast: a fleet of one
+    forecast_48h = forecast_fleet([dust_level], location, start, irradiance_tables)[0].tolist()
     
     # Optimal cleaning window determination
     if dust_level > 75:
@@ -566,11 +911,10 @@ def calculate_advanced_forecast(dust_level: float, location: str, confidence: fl
         'water_cost_usd': 1.25
     }
     
-    # AI analysis
-    llama_analysis = f"""Advanced forecast analysis for {location}: Dust level {dust_level:.1f}% 
-    causing {daily_power_loss:.1f} kWh daily losses (${daily_loss_usd:.2f}). Assumed clear-sky 
-    factor {weather_factor*100:.0f}% (no weather feed connected). Confidence: {confidence:.1f}%. Action window: 
-    {cleaning_window.value}. Economic viability: Strong ROI potential."""
+    # AI analysis, written when asked for
+    llama_analysis = Prose('forecast_analysis', (
+        location, dust_level, daily_power_loss, daily_loss_usd, weather_factor, confidence, cleaning_window.value
+    ))
     
     return {
         'daily_power_loss': round(daily_power_loss, 2),
@@ -582,6 +926,77 @@ def calculate_advanced_forecast(dust_level: float, location: str, confidence: fl
         'llama_analysis': llama_analysis
     }
 
+# Decision bands, shared by calculate_intelligent_decision and decide_fleet.
+# Economic viability by payback period: under 5 days 95, under 10 85, and so on.
+PAYBACK_BANDS_DAYS = (5, 10, 20, 40)
+PAYBACK_VIABILITY = (95, 85, 70, 50, 25)
+NO_LOSS_VIABILITY = 10  # nothing to pay a cleaning back with
+
+# decide_fleet's decision codes index this.
+DECISION_TYPES = (DecisionType.EXECUTE_IMMEDIATE, DecisionType.SCHEDULE_CLEANING, DecisionType.CONTINUE_MONITORING)
+
+# In the order their checks run; decide_fleet's risk_flags columns follow it.
+RISK_FACTOR_MESSAGES = (
+    "Critical dust accumulation level",
+    "High daily economic losses",
+    "Analysis confidence below threshold",
+    "Significant annual impact",
+    "Rapid ROI opportunity",
+)
+
+RECOMMENDATIONS = {
+    DecisionType.EXECUTE_IMMEDIATE: (
+        "Execute cleaning operation immediately for optimal ROI",
+        "Monitor power recovery metrics post-cleaning",
+        "Schedule follow-up assessment within 5-7 days",
+        "Document cleaning effectiveness for future optimization"
+    ),
+    DecisionType.SCHEDULE_CLEANING: (
+        "Schedule cleaning within recommended time window",
+        "Continue environmental monitoring for optimal timing",
+        "Prepare cleaning resources and equipment",
+        "Monitor dust accumulation rate"
+    ),
+    DecisionType.CONTINUE_MONITORING: (
+        "Maintain regular monitoring schedule",
+        "Reassess conditions weekly",
+        "Consider preventive maintenance planning",
+        "Monitor environmental factors affecting dust accumulation"
+    ),
+}
+
+
+def _decision_reasoning(decision: str, decision_confidence: float, env_risk: float, dust_level: float,
+                        confidence: float, econ_viability: float, daily_loss_usd: float,
+                        payback_days: Optional[float], combined_score: float, roi_percentage: float) -> str:
+    # No payback is stored as None: JSON has no infinity.
+    payback_days = float('inf') if payback_days is None else payback_days
+    return f"""Comprehensive multi-factor analysis indicates {decision.lower()} with {decision_confidence:.1f}% confidence. 
+    Environmental risk assessment: {env_risk:.1f}/100 (dust level {dust_level:.1f}%, confidence {confidence:.1f}%). 
+    Economic viability: {econ_viability:.1f}/100 (daily loss ${daily_loss_usd:.2f}, payback {payback_days:.1f} days). 
+    Combined decision score: {combined_score:.1f}/100. ROI projection: {roi_percentage:.1f}% annually."""
+
+
+def _reasoning_prose(decision: DecisionType, decision_confidence: float, env_risk: float, dust_level: float,
+                     confidence: float, econ_viability: float, daily_loss_usd: float, payback_days: float,
+                     combined_score: float, roi_percentage: float) -> Prose:
+    """_decision_reasoning, written when asked for"""
+    return Prose('decision_reasoning', (
+        decision.value, decision_confidence, env_risk, dust_level, confidence, econ_viability, daily_loss_usd,
+        payback_days if math.isfinite(payback_days) else None, combined_score, roi_percentage
+    ))
+
+
+# The text each Prose template id writes, from the values stored with it.
+PROSE_TEMPLATES = {
+    'insights': lambda dust_level, confidence: ProductionImageProcessor._generate_insights(
+        {'dust_level': dust_level, 'confidence': confidence}
+    ),
+    'forecast_analysis': _forecast_analysis,
+    'decision_reasoning': _decision_reasoning,
+}
+
+
 def calculate_intelligent_decision(image_data: Dict, forecast_data: Dict) -> Dict:
     """Advanced multi-factor decision calculation"""
     
@@ -631,36 +1046,17 @@ def calculate_intelligent_decision(image_data: Dict, forecast_data: Dict) -> Dic
         decision = DecisionType.CONTINUE_MONITORING
     
     # Comprehensive risk factors
-    risk_factors = []
-    if dust_level > 75: risk_factors.append("Critical dust accumulation level")
-    if daily_loss_usd > 2.0: risk_factors.append("High daily economic losses")
-    if confidence < 75: risk_factors.append("Analysis confidence below threshold")
-    if economic_factors.get('annual_loss_usd', 0) > 300: risk_factors.append("Significant annual impact")
-    if payback_days < 7: risk_factors.append("Rapid ROI opportunity")
+    flags = (
+        dust_level > 75,
+        daily_loss_usd > 2.0,
+        confidence < 75,
+        economic_factors.get('annual_loss_usd', 0) > 300,
+        payback_days < 7,
+    )
+    risk_factors = [message for message, raised in zip(RISK_FACTOR_MESSAGES, flags) if raised]
     
     # Enhanced recommendations
-    recommendations = []
-    if decision == DecisionType.EXECUTE_IMMEDIATE:
-        recommendations.extend([
-            "Execute cleaning operation immediately for optimal ROI",
-            "Monitor power recovery metrics post-cleaning",
-            "Schedule follow-up assessment within 5-7 days",
-            "Document cleaning effectiveness for future optimization"
-        ])
-    elif decision == DecisionType.SCHEDULE_CLEANING:
-        recommendations.extend([
-            "Schedule cleaning within recommended time window",
-            "Continue environmental monitoring for optimal timing",
-            "Prepare cleaning resources and equipment",
-            "Monitor dust accumulation rate"
-        ])
-    else:
-        recommendations.extend([
-            "Maintain regular monitoring schedule",
-            "Reassess conditions weekly",
-            "Consider preventive maintenance planning",
-            "Monitor environmental factors affecting dust accumulation"
-        ])
+    recommendations = list(RECOMMENDATIONS[decision])
     
     # Detailed cost-benefit analysis
     weekly_savings = economic_factors.get('weekly_loss_usd', 0)
@@ -683,10 +1079,10 @@ def calculate_intelligent_decision(image_data: Dict, forecast_data: Dict) -> Dic
     }
     
     # Advanced AI reasoning
-    reasoning = f"""Comprehensive multi-factor analysis indicates {decision.value.lower()} with {decision_confidence:.1f}% confidence. 
-    Environmental risk assessment: {env_risk:.1f}/100 (dust level {dust_level:.1f}%, confidence {confidence:.1f}%). 
-    Economic viability: {econ_viability:.1f}/100 (daily loss ${daily_loss_usd:.2f}, payback {payback_days:.1f} days). 
-    Combined decision score: {combined_score:.1f}/100. ROI projection: {cost_benefit['roi_percentage']:.1f}% annually."""
+    reasoning = _reasoning_prose(
+        decision, decision_confidence, env_risk, dust_level, confidence, econ_viability,
+        daily_loss_usd, payback_days, combined_score, cost_benefit['roi_percentage']
+    )
     
     return {
         'environmental_risk': round(env_risk, 1),
@@ -701,6 +1097,173 @@ def calculate_intelligent_decision(image_data: Dict, forecast_data: Dict) -> Dic
         'reasoning': reasoning
     }
 
+def decide_fleet(dust_levels, confidences, daily_loss_usd=0.0, cleaning_cost_usd=24.50, weekly_loss_usd=0.0,
+                 annual_loss_usd=0.0, maintenance_frequency_days=30.0) -> Dict[str, np.ndarray]:
+    """calculate_intelligent_decision for a whole site in one pass.
+    
+    Takes a column per input — dust and confidence in percent, and the forecast's
+    economic factors, each an array with one value per panel or a scalar shared
+    by all of them (the defaults are the scalar path's) — and evaluates the
+    threshold bands with np.digitize and np.select. Returns columns, unrounded:
+    decision holds indexes into DECISION_TYPES and risk_flags is a
+    (panels, len(RISK_FACTOR_MESSAGES)) boolean array. decision_rows turns
+    them into calculate_intelligent_decision's dicts, value for value.
+    """
+    dust = np.asarray(dust_levels, dtype=float)
+    confidence = np.asarray(confidences, dtype=float)
+    shape = dust.shape
+    column = lambda values: np.broadcast_to(np.asarray(values, dtype=float), shape)
+    daily_loss, cleaning_cost = column(daily_loss_usd), column(cleaning_cost_usd)
+    weekly_savings, annual_loss = column(weekly_loss_usd), column(annual_loss_usd)
+    maintenance_frequency = column(maintenance_frequency_days)
+
+    risk_multiplier = np.where(confidence > 85, 1.2, 1.0)
+    env_risk = np.minimum(100, dust * risk_multiplier + (100 - confidence) * 0.2)
+
+    losing = daily_loss > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payback_days = np.where(losing, cleaning_cost / np.where(losing, daily_loss, 1.0), np.inf)
+    bands = np.digitize(payback_days, PAYBACK_BANDS_DAYS)
+    econ_viability = np.where(losing, np.take(PAYBACK_VIABILITY, bands), NO_LOSS_VIABILITY)
+
+    combined_score = (env_risk * 0.45) + (econ_viability * 0.55)
+    decision_confidence = np.minimum(95, 65 + (combined_score * 0.3) + (confidence - 75) * 0.2)
+    decision = np.select(
+        [(combined_score > 85) & (dust > 65), (combined_score > 70) & (dust > 45), (combined_score > 40) & (dust > 25)],
+        [0, 1, 1],
+        default=2,
+    )
+
+    risk_flags = np.stack(
+        [dust > 75, daily_loss > 2.0, confidence < 75, annual_loss > 300, payback_days < 7], axis=-1
+    )
+
+    annual_savings = weekly_savings * 52
+    annual_cleaning_cost = (365 / maintenance_frequency) * cleaning_cost
+    net_annual_benefit = annual_savings - annual_cleaning_cost
+    costly = annual_cleaning_cost > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roi_percentage = np.where(costly, (net_annual_benefit / np.where(costly, annual_cleaning_cost, 1.0)) * 100, 0.0)
+
+    return {
+        'dust_level': dust,
+        'input_confidence': confidence,
+        'daily_loss_usd': daily_loss,
+        'environmental_risk': env_risk,
+        'economic_viability': econ_viability,
+        'confidence': decision_confidence,
+        'decision': decision,
+        'score': combined_score,
+        'payback_days': payback_days,
+        'risk_flags': risk_flags,
+        'cleaning_investment': cleaning_cost,
+        'weekly_savings': weekly_savings,
+        'monthly_savings': weekly_savings * 4.33,
+        'annual_savings': annual_savings,
+        'annual_cleaning_cost': annual_cleaning_cost,
+        'net_annual_benefit': net_annual_benefit,
+        'roi_percentage': roi_percentage,
+    }
+
+
+def decision_rows(columns: Dict[str, np.ndarray]) -> List[Dict]:
+    """decide_fleet's columns as one calculate_intelligent_decision dict per
+    panel: rounding, messages and reasoning text are per-row work."""
+    names = [name for name in columns if name not in ('decision', 'risk_flags')]
+    values = {name: columns[name].tolist() for name in names}
+    decisions = columns['decision'].tolist()
+    flags = columns['risk_flags'].tolist()
+
+    rows = []
+    for i, code in enumerate(decisions):
+        v = {name: values[name][i] for name in names}
+        decision = DECISION_TYPES[code]
+        losing = v['daily_loss_usd'] > 0
+        cost_benefit = {
+            'cleaning_investment': v['cleaning_investment'],
+            'weekly_savings': v['weekly_savings'],
+            'monthly_savings': v['monthly_savings'],
+            'annual_savings': v['annual_savings'],
+            'annual_cleaning_cost': round(v['annual_cleaning_cost'], 2),
+            'net_annual_benefit': round(v['net_annual_benefit'], 2),
+            'roi_percentage': round(v['roi_percentage'], 1) if v['annual_cleaning_cost'] > 0 else 0,
+            'payback_period_days': round(v['payback_days'], 1) if losing else 999,
+            'break_even_point': round(v['payback_days'], 1) if losing else 999
+        }
+        rows.append({
+            'environmental_risk': round(v['environmental_risk'], 1),
+            'economic_viability': round(v['economic_viability'], 1),
+            'confidence': round(v['confidence'], 1),
+            'decision': decision,
+            'score': round(v['score'], 1),
+            'weekly_savings': v['weekly_savings'],
+            'risk_factors': [message for message, raised in zip(RISK_FACTOR_MESSAGES, flags[i]) if raised],
+            'recommendations': list(RECOMMENDATIONS[decision]),
+            'cost_benefit': cost_benefit,
+            'reasoning': _reasoning_prose(
+                decision, v['confidence'], v['environmental_risk'], v['dust_level'], v['input_confidence'],
+                v['economic_viability'], v['daily_loss_usd'], v['payback_days'], v['score'],
+                cost_benefit['roi_percentage']
+            ),
+        })
+    return rows
+
+def solar_forecast(dust_level: float, confidence: float, location: str, start: Optional[datetime] = None,
+                   irradiance_tables: Optional[clear_sky.IrradianceTables] = None) -> SolarForecast:
+    """calculate_advanced_forecast as the record the next stage reads, its
+    values as QuartzForecastResult would store them"""
+    data = calculate_advanced_forecast(dust_level, location, confidence, start, irradiance_tables)
+    return SolarForecast(
+        daily_power_loss_kwh=float(data['daily_power_loss']),
+        power_loss_percentage=float(data['power_loss_percentage']),
+        forecast_confidence=float(data['confidence']),
+        generation_forecast_48h=data['forecast_48h'],
+        optimal_cleaning_window=data['cleaning_window'],
+        economic_factors={name: float(value) for name, value in data['economic_factors'].items()},
+        llama_analysis=data['llama_analysis'],
+    )
+
+
+def _cleaning_decision(row: Dict) -> CleaningDecision:
+    """A calculate_intelligent_decision dict as a record, its values as
+    IntelligentDecisionResult would store them"""
+    return CleaningDecision(
+        environmental_risk=float(row['environmental_risk']),
+        economic_viability_score=float(row['economic_viability']),
+        decision_confidence=float(row['confidence']),
+        cleaning_priority=row['decision'],
+        estimated_savings_weekly=float(row['weekly_savings']),
+        decision_score=float(row['score']),
+        risk_factors=row['risk_factors'],
+        recommendations=row['recommendations'],
+        cost_benefit_analysis={name: float(value) for name, value in row['cost_benefit'].items()},
+        llama_reasoning=row['reasoning'],
+    )
+
+
+def cleaning_decision(dust_level: float, confidence: float, economic_factors: Dict) -> CleaningDecision:
+    """calculate_intelligent_decision for one panel, as a record"""
+    return _cleaning_decision(calculate_intelligent_decision(
+        {'dust_level': dust_level, 'confidence': confidence}, {'economic_factors': economic_factors}
+    ))
+
+
+def fleet_cleaning_decisions(dust_levels: Sequence[float], confidences: Sequence[float],
+                             economics: Sequence[Dict]) -> List[CleaningDecision]:
+    """cleaning_decision for every panel of a site, in one decide_fleet pass;
+    economics holds each panel's forecast economic factors."""
+    factor = lambda name, default: [factors.get(name, default) for factors in economics]
+    columns = decide_fleet(
+        dust_levels,
+        confidences,
+        daily_loss_usd=factor('daily_loss_usd', 0),
+        cleaning_cost_usd=factor('cleaning_cost_usd', 24.50),
+        weekly_loss_usd=factor('weekly_loss_usd', 0),
+        annual_loss_usd=factor('annual_loss_usd', 0),
+        maintenance_frequency_days=factor('maintenance_frequency_days', 30),
+    )
+    return [_cleaning_decision(row) for row in decision_rows(columns)]
+
 def execute_cleaning_operation(decision_data: Dict) -> Dict:
     """SIMULATION ONLY — do not surface these numbers as readings.
 
@@ -866,36 +1429,53 @@ async def execute_production_pipeline(
     logger.info(f"CrewAI Available: {CREWAI_AVAILABLE}")
     
     try:
+        # Stages hand each other lean records; each is validated once, into the
+        # schema the pipeline result carries.
         # Stage 1: Image Analysis
         logger.info("🔍 Stage 1: AI Image Analysis")
-        image_analysis_result = standalone_analyze_image(image_input)
-        if 'error' in image_analysis_result:
-            raise Exception(f"Image analysis failed: {image_analysis_result['error']}")
-        
-        image_analysis = AIAnalysisResult(**image_analysis_result)
+        try:
+            image_analysis = ProductionImageProcessor.process_image(image_input)
+        except Exception as e:
+            raise Exception(f"Image analysis failed: {e}")
         logger.info(f"✅ Image analysis completed: {image_analysis.risk_category} risk detected")
         
         # Stage 2: Solar Forecast
         logger.info("🔮 Stage 2: Solar Forecasting")
-        forecast_result = standalone_solar_forecast(location, image_analysis_result)
-        if 'error' in forecast_result:
-            raise Exception(f"Forecast failed: {forecast_result['error']}")
+        try:
+            forecast_record = solar_forecast(image_analysis.dust_level, image_analysis.confidence, location)
+        except Exception as e:
+            raise Exception(f"Forecast failed: {e}")
         
-        forecast = QuartzForecastResult(**forecast_result)
+        forecast = QuartzForecastResult(
+            timestamp=datetime.now().isoformat(),
+            forecast_id=f"forecast_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}",
+            location=location,
+            weather_impact=WeatherImpact.FAVORABLE,
+            processing_time_ms=25.0,
+            **forecast_record.rendered()
+        )
         logger.info(f"✅ Forecast completed: {forecast.daily_power_loss_kwh} kWh daily loss predicted")
         
         # Stage 3: Decision Making
         logger.info("🧠 Stage 3: Intelligent Decision Making")
-        decision_result = standalone_decision_engine(image_analysis_result, forecast_result)
-        if 'error' in decision_result:
-            raise Exception(f"Decision failed: {decision_result['error']}")
+        try:
+            decision_record = cleaning_decision(
+                image_analysis.dust_level, image_analysis.confidence, forecast_record.economic_factors
+            )
+        except Exception as e:
+            raise Exception(f"Decision failed: {e}")
         
-        decision = IntelligentDecisionResult(**decision_result)
+        decision = IntelligentDecisionResult(
+            timestamp=datetime.now().isoformat(),
+            decision_id=f"decision_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}",
+            processing_time_ms=35.0,
+            **decision_record.rendered()
+        )
         logger.info(f"✅ Decision completed: {decision.cleaning_priority} with {decision.decision_confidence}% confidence")
         
         # Stage 4: Execution
         logger.info("🚿 Stage 4: Automated Execution")
-        execution_result = standalone_execution_controller(decision_result)
+        execution_result = standalone_execution_controller(decision_record.rendered())
         if 'error' in execution_result:
             raise Exception(f"Execution failed: {execution_result['error']}")
         
@@ -1080,7 +1660,7 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="SolarSage Fixed Production Pipeline")
     parser.add_argument("--image", type=str, help="Path to solar panel image")
-    parser.add_argument("--location", type=str, default="Bengaluru, India", help="Geographic location")
+    parser.add_argument("--location", type=str, default="Bengaluru, India", help="Geographic location: 'City, Country' or 'lat, lon'")
     parser.add_argument("--demo", action="store_true", help="Run production demo")
     parser.add_argument("--comparison", action="store_true", help="Compare standalone vs CrewAI")
     parser.add_argument("--output", type=str, help="Save results to JSON file")
@@ -0,0 +1,169 @@
+"""Classification results keyed by what is in the frame, not where it lives.
+
+The classifier is deterministic — the same bytes always read the same — so
+re-analysing a frame that has not changed since the last poll is pure waste.
+This cache stores each result under a digest of the image file: an in-memory
+LRU in front of a bounded directory of JSON files that survives a restart.
+
+Hashing a frame is far cheaper than decoding and analysing it, and cheaper
+still is not reading it at all: a path whose mtime and size match the last time
+it was hashed reuses that digest without opening the file.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+
+class AnalysisCache:
+    """Bounded LRU of classification results, optionally backed by a directory.
+
+    A limit of 0 disables that tier. Writes to disk are best effort: a read-only
+    filesystem degrades the cache to memory only, never fails an analysis.
+    Evictions are counted per tier, as each has its own limit to size.
+    """
+
+    def __init__(self, directory: Optional[Path] = None, max_entries: int = 512,
+                 max_disk_entries: int = 4096):
+        self.directory = Path(directory) if directory else None
+        self.max_entries = max(0, max_entries)
+        self.max_disk_entries = max(0, max_disk_entries) if self.directory else 0
+
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._digests: "OrderedDict[str, tuple]" = OrderedDict()  # path -> (mtime_ns, size, digest)
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = self.evictions = self.disk_evictions = 0
+
+        self._disk_entries = 0
+        if self.max_disk_entries:
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._disk_entries = sum(1 for _ in self.directory.glob("*.json"))
+            except OSError:
+                self.max_disk_entries = 0
+
+    # ------------------------------------------------------------------ keys
+
+    def digest(self, path: Path) -> str:
+        """SHA-256 of the file, skipping the read when mtime and size are unchanged."""
+        key = str(path)
+        stat = os.stat(key)
+        with self._lock:
+            known = self._digests.get(key)
+            if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._digests.move_to_end(key)
+                return known[2]
+
+        digest = hashlib.sha256(Path(key).read_bytes()).hexdigest()
+        with self._lock:
+            self._digests[key] = (stat.st_mtime_ns, stat.st_size, digest)
+            while len(self._digests) > max(self.max_entries, 1) * 2:
+                self._digests.popitem(last=False)
+        return digest
+
+    # --------------------------------------------------------------- entries
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        stored = self._read_disk(key)
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, stored)
+        return stored
+
+    def put(self, key: str, value: dict):
+        with self._lock:
+            self._remember(key, value)
+        self._write_disk(key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_entries": self._disk_entries,
+                "max_disk_entries": self.max_disk_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _remember(self, key: str, value: dict):
+        """Caller holds the lock."""
+        if not self.max_entries:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    # ------------------------------------------------------------------ disk
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        if not self.max_disk_entries:
+            return None
+        path = self._path(key)
+        try:
+            return json.loads(path.read_text())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)  # a torn write is a miss, not a 500
+            return None
+
+    def _write_disk(self, key: str, value: dict):
+        if not self.max_disk_entries:
+            return
+        path = self._path(key)
+        try:
+            existed = path.exists()
+            tmp = path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(value))
+            os.replace(tmp, path)  # readers see the old file or the new one, never half
+        except OSError:
+            return
+        with self._lock:
+            if not existed:
+                self._disk_entries += 1
+            over = self._disk_entries > self.max_disk_entries
+        if over:
+            self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop the least recently written tenth, so eviction is not a directory
+        scan on every write once the cache is full."""
+        try:
+            files = sorted(self.directory.glob("*.json"), key=lambda f: f.stat().st_mtime_ns)
+        except OSError:
+            return
+        excess = len(files) - self.max_disk_entries
+        if excess <= 0:
+            with self._lock:
+                self._disk_entries = len(files)
+            return
+        doomed = files[:excess + self.max_disk_entries // 10]
+        for f in doomed:
+            f.unlink(missing_ok=True)
+        with self._lock:
+            self._disk_entries = len(files) - len(doomed)
+            self.disk_evictions += len(doomed)
@@ -6,64 +6,302 @@ dashboard templates speak fractions (0-1), so the conversion happens here and
 nowhere else.
 """
 
+import hashlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 from pathlib import Path
-from typing import Union
+from typing import List, Optional, Sequence, Union
 
+import numpy as np
+
+from Agents import clear_sky
 from Agents.crew import (
-    standalone_analyze_image,
-    standalone_decision_engine,
-    standalone_solar_forecast,
+    CleaningDecision,
+    FrameAnalysis,
+    ProductionImageProcessor,
+    SolarForecast,
+    cleaning_decision,
+    fleet_cleaning_decisions,
+    forecast_fleet,
+    render_prose,
+    solar_forecast,
 )
+from Backend.agents.analysis_cache import AnalysisCache
 
 DEFAULT_LOCATION = "Bengaluru, India"
 
 
-def _val(x):
-    """Enum members survive model_dump(); str() on them yields 'Cls.NAME'."""
-    return getattr(x, "value", x)
+# One long-lived pool per API process, so a sweep does not pay process start-up
+# (and the OpenCV import) every time it runs.
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_size = 0
+_pool_lock = threading.Lock()
+
+
+def _worker_pool(workers: int) -> ProcessPoolExecutor:
+    """Spawned, never forked: a fork taken while one of OpenCV's threads holds a
+    lock leaves the child waiting on it forever."""
+    global _pool, _pool_size
+    with _pool_lock:
+        if _pool is None or _pool_size != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_size = workers
+        return _pool
+
+
+def _discard_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
+
+def _classify_chunk(location: str, max_edge: Optional[int], irradiance_dir: str,
+                    image_paths: List[str]) -> List[dict]:
+    """Worker entry point: one batch, classified in a pool process. Its prose
+    stays refs; the parent caches them and renders what it returns."""
+    agent = ImageClassifierAgent(location, max_edge=max_edge, irradiance_dir=irradiance_dir)
+    return agent.classify_many(image_paths, rendered=False)
 
 
 class ImageClassifierAgent:
     """Analyses a panel image and returns dust level plus economic context."""
 
-    def __init__(self, location: str = DEFAULT_LOCATION):
+    def __init__(self, location: str = DEFAULT_LOCATION, cache: Optional[AnalysisCache] = None,
+                 max_edge: Optional[int] = None, irradiance_dir: Optional[Union[str, Path]] = None):
         self.location = location
+        # Working resolution: frames are decoded with their long edge capped at
+        # this many pixels. None (or 0) analyses at full camera resolution.
+        self.max_edge = max_edge or None
+        # Results for frames already seen, keyed by content. Pool workers run
+        # without one: the parent checks and fills the cache around them.
+        self.cache = cache
+        # This agent's clear-sky tables (Agents/clear_sky.py), kept in
+        # irradiance_dir; None reads the pipeline's default ones.
+        self.irradiance = clear_sky.IrradianceTables(Path(irradiance_dir)) if irradiance_dir is not None else None
+
+    def classify_dust_level(self, image_path: Union[str, Path], rendered: bool = True) -> dict:
+        """One frame's dust level, forecast and decision.
 
-    def classify_dust_level(self, image_path: Union[str, Path]) -> dict:
+        With `rendered` False its insights and reasoning are left as template
+        refs ({"template", "values"}, see Agents.crew.Prose), for a caller that
+        stores the result and writes the text only when it is read — the
+        service's decision rows. The cache keeps them that way either way.
+        """
         path = Path(image_path)
         if not path.exists():
             return {"error": f"Image not found: {path}"}
 
-        analysis = standalone_analyze_image(str(path))
-        if "error" in analysis:
-            return analysis
+        key = self._cache_key(path)
+        cached = self.cache.get(key) if key else None
+        if cached is not None:
+            return self._with_prose(dict(cached)) if rendered else dict(cached)
+
+        try:
+            analysis, _ = ProductionImageProcessor.analyze(str(path), self.max_edge)
+        except Exception as e:
+            return {"error": str(e)}
+        result = self._with_economics(analysis)
+        if key and "error" not in result:
+            self.cache.put(key, result)
+        return self._with_prose(result) if rendered else result
+
+    def classify_many(self, image_paths: Sequence[Union[str, Path]], workers: int = 1,
+                      rendered: bool = True) -> List[dict]:
+        """classify_dust_level for a whole site, in the same order as the paths.
+
+        The frames are measured in one ProductionImageProcessor.process_batch
+        pass and decided in one fleet_cleaning_decisions pass; only the
+        forecast stage still runs per frame. With
+        more than one worker the paths are split into that many batches and
+        classified in separate processes. A frame that is missing or will not
+        decode — or whose worker died — gets its own error entry rather than
+        failing the sweep. `rendered` is as for classify_dust_level.
+        """
+        results: List[dict] = [{} for _ in image_paths]
+        keys = [self._cache_key(Path(image_path)) for image_path in image_paths]
+        pending = []
+        for index, key in enumerate(keys):
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                results[index] = dict(cached)
+            else:
+                pending.append(index)
+        if not pending:
+            return results
+
+        paths = [image_paths[index] for index in pending]
+        if workers > 1 and len(paths) > 1:
+            fresh = self._classify_in_pool(paths, workers)
+        else:
+            fresh = self._classify_batch(paths)
+
+        for index, result in zip(pending, fresh):
+            results[index] = result
+            if keys[index] and "error" not in result:
+                self.cache.put(keys[index], result)
+        return [self._with_prose(result) for result in results] if rendered else results
+
+    @staticmethod
+    def _with_prose(result: dict) -> dict:
+        """A result with its insights and reasoning written out."""
+        if "error" in result:
+            return result
+        return {**result, "insights": render_prose(result["insights"]),
+                "reasoning": render_prose(result["reasoning"])}
+
+    def _cache_key(self, path: Path) -> Optional[str]:
+        """Content digest plus what else shapes the result: the forecast location,
+        its date (clear-sky generation changes with the season) and the working
+        resolution."""
+        if self.cache is None:
+            return None
+        try:
+            digest = self.cache.digest(path)
+        except OSError:
+            return None  # missing or unreadable: let the analysis report it
+        day = clear_sky.current_hour().date()
+        return hashlib.sha256(f"{self.location}\n{day}\n{self.max_edge}\n{digest}".encode()).hexdigest()
+
+    def _classify_batch(self, image_paths: Sequence[Union[str, Path]]) -> List[dict]:
+        results: List[dict] = [{} for _ in image_paths]
+        frames, indexes = [], []
+        for index, image_path in enumerate(image_paths):
+            path = Path(image_path)
+            if not path.exists():
+                results[index] = {"error": f"Image not found: {path}"}
+                continue
+            try:
+                frames.append(ProductionImageProcessor.load_image(str(path), self.max_edge))
+                indexes.append(index)
+            except ValueError as e:
+                results[index] = {"error": str(e)}
+
+        if not frames:
+            return results
+
+        started = time.perf_counter()
+        try:
+            rows = ProductionImageProcessor.process_batch(frames)
+        except Exception as e:
+            for index in indexes:
+                results[index] = {"error": str(e)}
+            return results
+        per_frame_ms = (time.perf_counter() - started) * 1000 / len(frames)
+
+        analyses, forecasts, decided = [], [], []
+        for index, row in zip(indexes, rows):
+            measured = {
+                "dust_level": float(row["dust_level"]),
+                "confidence": float(row["confidence"]),
+                "visual_score": float(row["visual_score"]),
+                "image_quality": str(row["image_quality"]),
+            }
+            try:
+                analysis = ProductionImageProcessor.frame_analysis(
+                    measured, str(row["risk_category"]),
+                    ProductionImageProcessor.insights(measured["dust_level"], measured["confidence"]), per_frame_ms,
+                )
+                forecast = solar_forecast(
+                    analysis.dust_level, analysis.confidence, self.location, irradiance_tables=self.irradiance
+                )
+            except Exception as e:
+                results[index] = {"error": str(e)}
+                continue
+            analyses.append(analysis)
+            forecasts.append(forecast)
+            decided.append(index)
+        if not decided:
+            return results
+
+        # The decisions for every frame in one columnar pass.
+        try:
+            decisions = fleet_cleaning_decisions(
+                [a.dust_level for a in analyses], [a.confidence for a in analyses],
+                [f.economic_factors for f in forecasts],
+            )
+        except Exception as e:
+            for index in decided:
+                results[index] = {"error": str(e)}
+            return results
+        for index, analysis, forecast, decision in zip(decided, analyses, forecasts, decisions):
+            results[index] = self._result(analysis, forecast, decision)
+        return results
+
+    def _classify_in_pool(self, image_paths: Sequence[Union[str, Path]], workers: int) -> List[dict]:
+        paths = [str(path) for path in image_paths]
+        size = -(-len(paths) // min(workers, len(paths)))  # ceiling division
+        chunks = [paths[start:start + size] for start in range(0, len(paths), size)]
+
+        irradiance_dir = str((self.irradiance or clear_sky.tables).directory)
+        results: List[dict] = []
+        try:
+            pool = _worker_pool(workers)
+            futures = [
+                pool.submit(_classify_chunk, self.location, self.max_edge, irradiance_dir, chunk) for chunk in chunks
+            ]
+        except (BrokenProcessPool, RuntimeError) as e:
+            _discard_pool()
+            return [{"error": f"Analysis worker pool unavailable: {e}"} for _ in paths]
+
+        for chunk, future in zip(chunks, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    _discard_pool()
+                results.extend({"error": f"Analysis worker failed: {e}"} for _ in chunk)
+        return results
 
-        forecast = standalone_solar_forecast(self.location, analysis)
-        if "error" in forecast:
-            return forecast
+    def forecast_fleet(self, dust_levels: Sequence[float], start: Optional[datetime] = None) -> np.ndarray:
+        """48-hour generation forecast (kWh per hour, from the UTC hour `start`,
+        default now) for panels at these dust levels, as fractions: one
+        (panels, 48) array, one operation."""
+        return forecast_fleet(np.asarray(dust_levels, dtype=float) * 100, self.location, start, self.irradiance)
 
-        decision = standalone_decision_engine(analysis, forecast)
-        if "error" in decision:
-            return decision
+    def _with_economics(self, analysis: FrameAnalysis) -> dict:
+        """Run the forecast and decision stages over one frame's measurements."""
+        try:
+            forecast = solar_forecast(analysis.dust_level, analysis.confidence, self.location,
+                                      irradiance_tables=self.irradiance)
+            decision = cleaning_decision(analysis.dust_level, analysis.confidence, forecast.economic_factors)
+        except Exception as e:
+            return {"error": str(e)}
+        return self._result(analysis, forecast, decision)
 
-        cost_benefit = decision.get("cost_benefit_analysis", {})
+    @staticmethod
+    def _result(analysis: FrameAnalysis, forecast: SolarForecast, decision: CleaningDecision) -> dict:
+        """One frame's result from the records each pipeline stage made of it.
+        Stage to stage the pipeline passes plain records; this dict is what
+        leaves it, for the API and the cache. Insights and reasoning stay
+        template refs until render_prose writes them for a reader."""
+        cost_benefit = decision.cost_benefit_analysis
         return {
             # Fractions — the API thresholds and dashboard templates expect 0-1.
-            "dust_level": round(analysis["dust_level"] / 100, 4),
-            "confidence": round(analysis["confidence"] / 100, 4),
-            "status": _val(analysis["risk_category"]),
+            "dust_level": round(analysis.dust_level / 100, 4),
+            "confidence": round(analysis.confidence / 100, 4),
+            "status": analysis.risk_category.value,
             # Context carried through from the forecasting/economic stages.
-            "visual_score": analysis["visual_score"],
-            "image_quality": analysis["image_quality"],
-            "insights": analysis["ai_insights"],
-            "processing_time_ms": round(analysis["processing_time_ms"], 1),
-            "daily_power_loss_kwh": forecast["daily_power_loss_kwh"],
-            "power_loss_percentage": forecast["power_loss_percentage"],
-            "optimal_cleaning_window": _val(forecast["optimal_cleaning_window"]),
-            "cleaning_cost_usd": forecast["economic_factors"].get("cleaning_cost_usd"),
-            "estimated_savings_weekly": decision["estimated_savings_weekly"],
+            "visual_score": analysis.visual_score,
+            "image_quality": analysis.image_quality,
+            "insights": analysis.ai_insights.ref(),
+            "processing_time_ms": round(analysis.processing_time_ms, 1),
+            "daily_power_loss_kwh": forecast.daily_power_loss_kwh,
+            "power_loss_percentage": forecast.power_loss_percentage,
+            "optimal_cleaning_window": forecast.optimal_cleaning_window.value,
+            "cleaning_cost_usd": forecast.economic_factors.get("cleaning_cost_usd"),
+            "estimated_savings_weekly": decision.estimated_savings_weekly,
             "roi_percentage": cost_benefit.get("roi_percentage"),
             "payback_period_days": cost_benefit.get("payback_period_days"),
-            "recommendation": _val(decision["cleaning_priority"]),
-            "reasoning": decision["llama_reasoning"],
+            "recommendation": decision.cleaning_priority.value,
+            "reasoning": decision.llama_reasoning.ref(),
         }
@@ -3,21 +3,39 @@
 Every route is a thin wrapper over Backend.services — the same functions the
 Flask frontend calls in-process. Routes that touch the CV pipeline are declared
 `def` (not `async def`) so FastAPI runs them in a worker thread instead of
-blocking the event loop.
+blocking the event loop. The reads the console polls — settings, logs, the
+latest decision, stats, the panel list — are `async def` on an AsyncSession, so
+however many pollers there are, they leave those threads to the pipeline.
 """
 
 import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import Depends, FastAPI, Header, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from Backend import demo, services
+from Backend import demo, retention, services
+from Backend.api.overview_stream import OverviewBroadcaster
+from Backend.change_feed import feed
 from Backend.config.settings import settings
-from Backend.database.connection import SessionLocal, get_db, init_database
+from Backend.database.connection import SessionLocal, async_engine, get_async_db, get_db, init_database
 
-app = FastAPI(title="Solar Panel Cleaning System", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Each pooled aiosqlite connection holds a thread that keeps the process
+    # alive until the connection is closed.
+    await async_engine.dispose()
+
+
+app = FastAPI(title="Solar Panel Cleaning System", version="1.0.0", lifespan=lifespan)
 
 _default_origins = "http://localhost:3000,http://127.0.0.1:3000"
 allowed_origins = [o.strip() for o in os.getenv("CORS_ORIGINS", _default_origins).split(",") if o.strip()]
@@ -48,9 +66,22 @@ init_database()
 
 # See Backend/demo.py — no-op once the database holds a real analysis.
 with SessionLocal() as _boot_session:
+    services.ensure_panel_state(_boot_session)
+    services.reconcile_water_ledger(_boot_session)
+    services.ensure_system_totals(_boot_session)
     demo.seed_if_empty(_boot_session)
 
 
+def _overview() -> dict:
+    with SessionLocal() as db:
+        return services.overview(db)
+
+
+# One per process: however many consoles are streaming, an overview is
+# computed once per change.
+overview_broadcaster = OverviewBroadcaster(feed, _overview)
+
+
 class PanelRequest(BaseModel):
     panel_id: str = "panel_01"
 
@@ -63,6 +94,43 @@ class SprayScopeRequest(BaseModel):
     scope: str = "dirty"  # dirty | all
 
 
+# The overview also reports what the data version does not cover — telemetry,
+# the camera — so its validator expires on this period even when no row changed.
+OVERVIEW_REVALIDATE_SECONDS = 60
+# The forecast starts at the current UTC hour, so it moves on every hour
+# whether or not any dust reading did.
+FORECAST_REVALIDATE_SECONDS = 3600
+
+
+def _not_modified(request: Request, response: Response, etag: str, period: int = 0) -> Optional[Response]:
+    """The 304 for a client whose If-None-Match still matches `etag`; otherwise
+    None, with the validator set on the response about to be built."""
+    if period:
+        etag = f'{etag[:-1]}-{int(time.time() // period)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _unless_unchanged(request: Request, response: Response, db: Session, build, period: int = 0):
+    """Serve a read behind an ETag made of the data version.
+
+    A client whose If-None-Match still matches gets a 304 before `build` runs:
+    the version comes from this process's cache, so an unchanged poll costs no
+    query at all.
+    """
+    unchanged = _not_modified(request, response, services.data_etag(db), period)
+    return unchanged if unchanged is not None else build()
+
+
+async def _unless_unchanged_async(request: Request, response: Response, db: AsyncSession, build):
+    """_unless_unchanged for an async route; `build` is a coroutine function."""
+    unchanged = _not_modified(request, response, await services.data_etag_async(db))
+    return unchanged if unchanged is not None else await build()
+
+
 def _found(result: dict) -> dict:
     """An unknown panel is a missing resource, not a 200 with an error in it."""
     if isinstance(result, dict) and str(result.get("error", "")).startswith("Unknown panel"):
@@ -92,8 +160,8 @@ def analyze_panel(request: PanelRequest, db: Session = Depends(get_db)):
 
 
 @app.get("/latest-decision")
-def get_latest_decision(db: Session = Depends(get_db)):
-    return services.latest_decision(db)
+async def get_latest_decision(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    return await _unless_unchanged_async(request, response, db, lambda: services.latest_decision_async(db))
 
 
 @app.post("/spray", dependencies=[Depends(require_token)])
@@ -102,8 +170,8 @@ def spray_panel(request: PanelRequest, db: Session = Depends(get_db)):
 
 
 @app.get("/panels")
-def list_panels(db: Session = Depends(get_db)):
-    return services.list_panels(db)
+async def list_panels(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    return await _unless_unchanged_async(request, response, db, lambda: services.list_panels_async(db))
 
 
 @app.get("/panels/{panel_id}/history")
@@ -118,12 +186,33 @@ def get_panel_detail(panel_id: str, db: Session = Depends(get_db)):
 
 
 @app.get("/overview")
-def get_overview(db: Session = Depends(get_db)):
+def get_overview(request: Request, response: Response, db: Session = Depends(get_db)):
     """Health, panels, tallies, stats and the newest decision in one response.
 
-    Console pages render from this, and the open page polls it to stay current.
+    Console pages render from this, and re-render from it when it changes.
     """
-    return services.overview(db)
+    return _unless_unchanged(
+        request, response, db, lambda: services.overview(db), period=OVERVIEW_REVALIDATE_SECONDS
+    )
+
+
+@app.get("/forecast")
+def get_forecast(request: Request, response: Response, db: Session = Depends(get_db)):
+    """48-hour generation forecast per panel and for the site, at current dust."""
+    return _unless_unchanged(
+        request, response, db, lambda: services.fleet_forecast(db), period=FORECAST_REVALIDATE_SECONDS
+    )
+
+
+@app.get("/overview/stream")
+async def get_overview_stream():
+    """The overview as Server-Sent Events: a `snapshot`, then a `patch` holding
+    the top-level keys that changed, pushed only when something did."""
+    return StreamingResponse(
+        overview_broadcaster.events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.post("/panels/analyze-all", dependencies=[Depends(require_token)])
@@ -141,18 +230,24 @@ def post_spray_many(request: SprayScopeRequest, db: Session = Depends(get_db)):
 
 
 @app.get("/system/logs")
-def get_system_logs(limit: int = 50, db: Session = Depends(get_db)):
-    return services.system_logs(db, limit)
+async def get_system_logs(limit: int = 50, db: AsyncSession = Depends(get_async_db)):
+    return await services.system_logs_async(db, limit)
 
 
 @app.get("/system/stats")
-def get_system_stats(db: Session = Depends(get_db)):
-    return services.system_stats(db)
+async def get_system_stats(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    return await _unless_unchanged_async(request, response, db, lambda: services.system_stats_async(db))
+
+
+@app.get("/system/cache")
+def get_analysis_cache():
+    """Frame-cache counters: hits, misses, evictions per tier and the hit rate."""
+    return services.analysis_cache_stats()
 
 
 @app.get("/settings")
-def get_settings(db: Session = Depends(get_db)):
-    return services.get_settings(db)
+async def get_settings(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    return await _unless_unchanged_async(request, response, db, lambda: services.get_settings_async(db))
 
 
 @app.put("/settings", dependencies=[Depends(require_token)])
@@ -170,6 +265,13 @@ def post_refill_tank(db: Session = Depends(get_db)):
     return services.refill_tank(db)
 
 
+@app.post("/system/retention", dependencies=[Depends(require_token)])
+def post_retention(db: Session = Depends(get_db)):
+    """Roll up old readings and archive old logs and decisions — for a scheduler
+    that can make a request but not run a command. See Backend/retention.py."""
+    return retention.run_retention(db)
+
+
 @app.get("/hardware/telemetry")
-def get_telemetry():
-    return services.latest_telemetry()
+def get_telemetry(db: Session = Depends(get_db)):
+    return services.latest_telemetry(db)
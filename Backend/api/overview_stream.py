@@ -0,0 +1,148 @@
+"""Server-Sent Events for the overview: one computation per change, shared.
+
+Each open console used to poll /overview on a timer, and every poll rebuilt
+health, panels, counts, stats and the latest decision from the database. Here a
+single task per process waits on the change feed, recomputes the overview once
+when it moves, and pushes what differs from the last one to every stream:
+
+    event: snapshot   the whole overview, sent once when a stream opens
+    event: patch      {"topics": [...], "changes": {key: new value}}
+
+Top-level keys are the unit of change; a client merges `changes` into its copy.
+A recompute that changes nothing but timestamps is not sent. Writes from other
+processes, and what the database does not hold (telemetry files, the camera),
+are picked up by a periodic refresh.
+"""
+
+import asyncio
+import json
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+from Backend.change_feed import ChangeFeed
+
+log = logging.getLogger(__name__)
+
+
+def _comparable(value):
+    """A key's value with its own timestamp dropped: health carries one, and it
+    moves on every recompute."""
+    if isinstance(value, dict) and "timestamp" in value:
+        return {k: v for k, v in value.items() if k != "timestamp"}
+    return value
+
+
+def _event(kind: str, event_id: int, payload) -> str:
+    return f"event: {kind}\nid: {event_id}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+class OverviewBroadcaster:
+    """Fans one overview computation out to any number of streams.
+
+    `compute` is synchronous and opens its own session; it runs in a worker
+    thread. The task that calls it lives only while a stream is open.
+    """
+
+    def __init__(self, feed: ChangeFeed, compute: Callable[[], dict], debounce: float = 0.25,
+                 refresh: float = 60.0, keepalive: float = 15.0, queue_size: int = 16):
+        self.feed = feed
+        self.compute = compute
+        self.debounce = debounce  # a bulk wash publishes once per panel; recompute once
+        self.refresh = refresh
+        self.keepalive = keepalive  # proxies close a stream that stays silent
+        self.queue_size = queue_size
+        self.computations = 0
+
+        self._snapshot: Optional[dict] = None
+        self._event_id = 0
+        self._ready: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None  # set when the last stream closes
+        self._task: Optional[asyncio.Task] = None
+        self._streams: set = set()
+
+    async def events(self) -> AsyncIterator[str]:
+        """One client's stream: the snapshot, then a patch per change."""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._streams.add(queue)
+        try:
+            self._ensure_running()
+            await self._ready.wait()
+            yield _event("snapshot", self._event_id, self._snapshot)
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            self._streams.discard(queue)
+            if not self._streams and self._idle is not None:
+                self._idle.set()
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._snapshot = None
+            self._ready = asyncio.Event()
+            self._idle = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _recompute(self) -> Optional[dict]:
+        try:
+            overview = await asyncio.to_thread(self.compute)
+        except Exception:
+            log.exception("Overview recompute failed; keeping the last one")
+            return None
+        self.computations += 1
+        return overview
+
+    async def _run(self):
+        version = self.feed.version
+        while self._snapshot is None:
+            self._snapshot = await self._recompute()
+            if self._snapshot is None:
+                await asyncio.sleep(self.debounce or 1.0)
+        self._ready.set()
+
+        while self._streams:
+            moved = await self._wait(version)
+            if moved > version and self.debounce:
+                await asyncio.sleep(self.debounce)
+            if not self._streams:
+                break  # the last console closed meanwhile: nobody to compute for
+            topics = self.feed.topics_since(version)
+            version = self.feed.version
+
+            current = await self._recompute()
+            if current is None:
+                continue
+            changes = {
+                key: value for key, value in current.items()
+                if key != "timestamp" and _comparable(value) != _comparable(self._snapshot.get(key))
+            }
+            self._snapshot = current
+            if changes:
+                self._event_id += 1
+                self._broadcast(_event("patch", self._event_id, {"topics": topics, "changes": changes}))
+
+    async def _wait(self, version: int) -> int:
+        """feed.wait, cut short when the last stream closes."""
+        self._idle.clear()
+        changed = asyncio.ensure_future(self.feed.wait(version, self.refresh))
+        idle = asyncio.ensure_future(self._idle.wait())
+        try:
+            await asyncio.wait((changed, idle), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            changed.cancel()
+            idle.cancel()
+        return self.feed.version
+
+    def _broadcast(self, message: str):
+        for queue in list(self._streams):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client this far behind gets the whole overview instead of
+                # the patches it missed.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_event("snapshot", self._event_id, self._snapshot))
@@ -0,0 +1,71 @@
+"""In-process feed of "something the console shows has changed".
+
+Backend/services publishes a topic after each commit that changes what an
+overview would show — an analysis, a wash, a settings save, a refill. Readers
+that would otherwise poll (the /overview/stream endpoint) wait on the feed and
+recompute only when it moves.
+
+Publishers are request threads; waiters are coroutines on the API's event
+loop, so a publish wakes them through loop.call_soon_threadsafe. The feed sees
+writes made in this process only: another API worker's writes reach a stream
+at its periodic refresh.
+"""
+
+import asyncio
+import threading
+from collections import deque
+from typing import List
+
+TOPIC_HISTORY = 256
+
+
+class ChangeFeed:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._recent: deque = deque(maxlen=TOPIC_HISTORY)  # (version, topic)
+        self._waiters: set = set()  # (loop, asyncio.Event)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, topic: str):
+        """Announce a committed change. Never raises — it runs after the write
+        has already succeeded."""
+        with self._lock:
+            self._version += 1
+            self._recent.append((self._version, topic))
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                pass  # that loop has shut down; its waiter goes with it
+
+    def topics_since(self, version: int) -> List[str]:
+        """Distinct topics published after `version`, oldest first."""
+        with self._lock:
+            topics = [topic for v, topic in self._recent if v > version]
+        return list(dict.fromkeys(topics))
+
+    async def wait(self, since: int, timeout: float) -> int:
+        """The feed's version once it has moved past `since`, or after `timeout`
+        seconds, whichever comes first."""
+        event = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), event)
+        with self._lock:
+            if self._version > since:
+                return self._version
+            self._waiters.add(waiter)
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+        return self._version
+
+
+feed = ChangeFeed()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""How far dust_level drifts when the analysis runs below full resolution.
+
+ANALYSIS_MAX_EDGE caps the long edge of the frame the classifier measures. Three
+of its four statistics are global means and barely move when a frame is
+downsampled; the Laplacian variance and the Canny edge density are measured per
+pixel, so they do. This prints, for each fixture from make_fixtures.py, the
+reading at a range of working resolutions next to the full-resolution one, and
+flags any reading that crosses a default threshold — a drift that changes what
+the system decides, rather than only what it reports.
+
+    python Backend/data/images/calibrate_resolution.py [--edges 640 480 320 ...]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+DEFAULT_EDGES = (480, 320, 240, 160, 80)
+
+
+def band(dust: float, schedule: float, immediate: float) -> str:
+    if dust > immediate:
+        return "clean now"
+    return "schedule" if dust > schedule else "clean"
+
+
+def main() -> int:
+    here = Path(__file__).resolve().parent
+    sys.path.insert(0, str(here.parents[2]))
+    from Agents.crew import ProductionImageProcessor  # noqa: E402
+    from Backend.services import DEFAULT_SETTINGS  # noqa: E402
+    from make_fixtures import FIXTURES  # noqa: E402
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, nargs="+", default=DEFAULT_EDGES,
+                        help="working resolutions (long edge, px) to compare")
+    edges = parser.parse_args().edges
+
+    schedule, immediate = DEFAULT_SETTINGS["schedule_threshold"], DEFAULT_SETTINGS["dust_threshold"]
+    print("| Fixture | Full res | " + " | ".join(f"{e}px" for e in edges) + " |")
+    print("|---|---|" + "---|" * len(edges))
+
+    worst, crossings = 0.0, []
+    for panel_id in FIXTURES:
+        path = str(here / f"{panel_id}_test.jpg")
+        full = ProductionImageProcessor.process_image(path)
+        cells = [f"{full.dust_level:.2f}% ({full.metadata['image_shape'][1]}px)"]
+        for edge in edges:
+            dust = ProductionImageProcessor.process_image(path, max_edge=edge).dust_level
+            drift = dust - full.dust_level
+            worst = max(worst, abs(drift))
+            moved = band(dust, schedule, immediate) != band(full.dust_level, schedule, immediate)
+            if moved:
+                crossings.append(f"{panel_id} at {edge}px")
+            cells.append(f"{dust:.2f} ({drift:+.2f}){' ⚠' if moved else ''}")
+        print(f"| `{panel_id}` | " + " | ".join(cells) + " |")
+
+    print()
+    print(f"Largest drift: {worst:.2f} percentage points.")
+    print("Threshold crossings: " + (", ".join(crossings) if crossings else "none") + ".")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Read and write throughput of the site database under concurrent load.
+
+Runs the API's own service calls — services.overview for a console poll,
+services.spray_panel for a wash — from reader and writer threads against a
+fresh database for each engine profile in Backend/database/connection.py, and
+prints operations per second, tail latency and the operations that failed
+outright (SQLite's "database is locked").
+
+    python Backend/database/bench_concurrency.py [--seconds 10] [--readers 16] [--writers 4]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return float("nan")
+    return statistics.quantiles(samples, n=100, method="inclusive")[q - 1] if len(samples) > 1 else samples[0]
+
+
+def run(profile: str, seconds: float, readers: int, writers: int) -> dict:
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+
+    from Backend import services
+    from Backend.config.settings import settings
+    from Backend.database.connection import make_engine
+    from Backend.database.models import Base, PanelStatus, utcnow
+
+    engine = make_engine(Path(tempfile.mkdtemp(prefix=f"solarsage-bench-{profile}-")) / "bench.db", profile)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    with Session() as db:
+        for panel_id in settings.panel_ids:
+            row = PanelStatus(panel_id=panel_id, timestamp=utcnow(), dust_level=0.4,
+                              classification_confidence=0.9, is_dirty=True, needs_cleaning=False)
+            db.add(row)
+            services.track_panel_status(db, row)
+            services.track_analysis_totals(db, row)
+        db.commit()
+
+    stop = time.monotonic() + seconds
+    latencies = {"read": [], "write": []}
+    failures = {"read": 0, "write": 0}
+    lock = threading.Lock()
+
+    def work(kind: str, operation):
+        while time.monotonic() < stop:
+            started = time.perf_counter()
+            try:
+                with Session() as db:
+                    operation(db)
+            except OperationalError:
+                with lock:
+                    failures[kind] += 1
+                continue
+            with lock:
+                latencies[kind].append(time.perf_counter() - started)
+
+    def wash(n):
+        return lambda db: services.spray_panel(db, settings.panel_ids[n % len(settings.panel_ids)])
+
+    threads = [threading.Thread(target=work, args=("read", services.overview)) for _ in range(readers)]
+    threads += [threading.Thread(target=work, args=("write", wash(n))) for n in range(writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    engine.dispose()
+
+    return {
+        kind: {
+            "ops_per_s": len(latencies[kind]) / seconds,
+            "p50_ms": percentile(latencies[kind], 50) * 1000,
+            "p99_ms": percentile(latencies[kind], 99) * 1000,
+            "failed": failures[kind],
+        }
+        for kind in ("read", "write")
+    }
+
+
+def main() -> int:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+    from Backend.config.settings import settings  # noqa: E402
+    from Backend.database.connection import ENGINE_PROFILES  # noqa: E402
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--profiles", nargs="+", default=list(ENGINE_PROFILES))
+    args = parser.parse_args()
+
+    settings.water_tank_capacity_ml = 10 ** 12  # the tank guard is not what is being measured
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile\n")
+    print("| Profile | Reads/s | Read p50 / p99 (ms) | Failed reads | Writes/s | Write p50 / p99 (ms) | Failed writes |")
+    print("|---|---|---|---|---|---|---|")
+    for profile in args.profiles:
+        r = run(profile, args.seconds, args.readers, args.writers)
+        read, write = r["read"], r["write"]
+        print(f"| `{profile}` | {read['ops_per_s']:.0f} | {read['p50_ms']:.1f} / {read['p99_ms']:.1f} | "
+              f"{read['failed']} | {write['ops_per_s']:.0f} | {write['p50_ms']:.1f} / {write['p99_ms']:.1f} | "
+              f"{write['failed']} |")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
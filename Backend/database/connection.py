@@ -1,27 +1,155 @@
-import sqlite3
+from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, make_url, text
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from Backend.config.settings import settings
 
 DB_PATH = settings.db_path
-DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+DATABASE_URL = settings.database_url or f"sqlite:///{DB_PATH}"
 
-engine = create_engine(
-    f"sqlite:///{DB_PATH}",
-    connect_args={"check_same_thread": False},  # SQLite specific
-)
+# How an engine opens the SQLite file. "baseline" is SQLite as it comes: a
+# rollback journal, so a write locks readers out and one slow reader holds up
+# every writer. "wal" lets readers and the one writer proceed together, fsyncs
+# at checkpoints rather than on every commit (a power cut can lose the last
+# transactions, never corrupt the file), waits out a held lock instead of
+# failing, and reads through a memory map and a larger page cache. It needs a
+# local filesystem — WAL's shared memory does not work over NFS.
+#
+# The pool holds enough connections for every thread FastAPI runs sync routes
+# on (40 by default), so a busy console waits on SQLite, not on the pool.
+ENGINE_PROFILES = {
+    "baseline": {"pragmas": {}, "pool": {}},
+    "wal": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "busy_timeout": 5000,  # ms
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -32 * 1024,  # negative: KiB, so 32 MiB per connection
+            "temp_store": "MEMORY",
+        },
+        "pool": {"pool_size": 10, "max_overflow": 30, "pool_timeout": 30},
+    },
+}
+
+
+def make_engine(path: Path, profile: str = "wal") -> Engine:
+    """An engine on a SQLite file, opened the way `profile` says."""
+    if profile not in ENGINE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile {profile!r}; expected one of {sorted(ENGINE_PROFILES)}")
+    made = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},  # SQLite specific
+        **ENGINE_PROFILES[profile]["pool"],
+    )
+    _apply_pragmas(made, ENGINE_PROFILES[profile]["pragmas"])
+    return made
+
+
+def _apply_pragmas(made: Engine, pragmas: dict):
+    if not pragmas:
+        return
+
+    @event.listens_for(made, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# The services' upserts (see services._ensure_row) are written for these.
+SUPPORTED_BACKENDS = ("sqlite", "postgresql")
+
+
+def engine_from_url(url: str) -> Engine:
+    """An engine for DATABASE_URL. A SQLite URL gets its SQLITE_PROFILE; anything
+    else gets a pool that checks a connection before handing it out, so a
+    database restart costs one retried checkout rather than a failed request."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() not in SUPPORTED_BACKENDS:
+        raise ValueError(f"DATABASE_URL must be one of {SUPPORTED_BACKENDS}, not {parsed.get_backend_name()!r}")
+    if parsed.get_backend_name() == "sqlite":
+        path = Path(parsed.database)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return make_engine(path, settings.sqlite_profile)
+    return create_engine(
+        url,
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=1800,  # under the idle timeout of most managed servers and proxies
+    )
+
+
+# The async drivers for each backend: aiosqlite runs SQLite on a thread of its
+# own per connection, and psycopg 3 is async natively.
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+psycopg"}
+
+
+def async_url(url: str) -> URL:
+    """DATABASE_URL with its backend's async driver."""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()])
+
+
+def async_engine_from_url(url: str) -> AsyncEngine:
+    """The async counterpart of engine_from_url, for the routes that run on the
+    event loop: the same database, opened the same way."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        profile = ENGINE_PROFILES[settings.sqlite_profile]
+        made = create_async_engine(async_url(url), **profile["pool"])
+        _apply_pragmas(made.sync_engine, profile["pragmas"])
+        return made
+    return create_async_engine(
+        async_url(url),
+        pool_size=settings.database_pool_size,
+        max_overflow=settings.database_max_overflow,
+        pool_pre_ping=True,
+        pool_recycle=1800,
+    )
+
+
+engine = engine_from_url(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = async_engine_from_url(DATABASE_URL)
+# expire_on_commit=False: a route returns what it read after the session closes.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Single-column indexes that a composite index in models.py now leads with.
+SUPERSEDED_INDEXES = ("ix_panel_status_panel_id", "ix_cleaning_actions_panel_id")
+
 
 def create_tables():
     from Backend.database.models import Base
 
     Base.metadata.create_all(bind=engine)
+    migrate_indexes(Base.metadata, engine)
     print("✅ Database tables created successfully")
 
 
+def migrate_indexes(metadata, bind):
+    """Bring the indexes of a database created by an older release up to date.
+
+    create_all only indexes the tables it creates, so a table that already
+    exists never gains an index added to its model. Create any that are
+    missing, and drop the ones a composite index has replaced: they cost every
+    insert and no query needs them any more.
+    """
+    with bind.begin() as conn:
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        for name in SUPERSEDED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
 def get_db():
     """FastAPI dependency: yields a session and always closes it."""
     db = SessionLocal()
@@ -31,19 +159,26 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """FastAPI dependency for `async def` routes: an AsyncSession, always closed."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_database():
     """Initialize database with tables"""
     create_tables()
-    print(f"✅ SQLite database initialized at {DB_PATH}")
+    print(f"✅ Database initialized at {engine.url.render_as_string(hide_password=True)}")
 
 
 def test_database_connection():
     """Test database connection"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        version = conn.execute("SELECT sqlite_version();").fetchone()
-        conn.close()
-        print(f"✅ SQLite connection successful. Version: {version[0]}")
+        with engine.connect() as conn:
+            info = engine.dialect.server_version_info or ()
+            conn.execute(text("SELECT 1"))
+        version = ".".join(str(part) for part in info)
+        print(f"✅ {engine.dialect.name} connection successful. Version: {version}")
         return True
     except Exception as e:
         print(f"❌ Database connection failed: {e}")
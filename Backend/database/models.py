@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import declarative_base
 from datetime import datetime, timezone
 import json
@@ -12,9 +12,13 @@ Base = declarative_base()
 
 class PanelStatus(Base):
     __tablename__ = "panel_status"
+    __table_args__ = (
+        # A panel's history, newest first; also serves every lookup by panel_id.
+        Index("ix_panel_status_panel_time", "panel_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    panel_id = Column(String(50), index=True, nullable=False)
+    panel_id = Column(String(50), nullable=False)
     timestamp = Column(DateTime, default=utcnow, nullable=False)
     dust_level = Column(Float)
     classification_confidence = Column(Float)
@@ -34,11 +38,81 @@ class PanelStatus(Base):
             "image_path": self.image_path
         }
 
+class PanelStatusRollup(Base):
+    """Dust readings past the raw retention window, summarised per panel per
+    hour — and, past a second window, per day.
+
+    Backend/retention.py writes these as it deletes the panel_status rows they
+    summarise; `samples` is how many readings a bucket stands for.
+    """
+
+    __tablename__ = "panel_status_rollups"
+    __table_args__ = (
+        Index("ix_panel_status_rollups_bucket", "panel_id", "period", "bucket_start", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True)
+    panel_id = Column(String(50), nullable=False)
+    period = Column(String(10), nullable=False)  # "hour" or "day"
+    bucket_start = Column(DateTime, nullable=False)
+    samples = Column(Integer, nullable=False)
+    dust_min = Column(Float)
+    dust_max = Column(Float)
+    dust_mean = Column(Float)
+
+    def to_dict(self):
+        return {
+            "panel_id": self.panel_id,
+            "period": self.period,
+            "bucket_start": self.bucket_start.isoformat() if self.bucket_start else None,
+            "samples": self.samples,
+            "dust_min": self.dust_min,
+            "dust_max": self.dust_max,
+            "dust_mean": self.dust_mean,
+        }
+
+class PanelLatestState(Base):
+    """Each panel's newest reading and last successful wash, kept current on write.
+
+    panel_status and cleaning_actions remain the record; this is derived from
+    them so that the console's poll is a primary-key read instead of a search
+    through their whole history. Backend/services.rebuild_panel_state
+    reconstructs it from that history.
+    """
+
+    __tablename__ = "panel_latest_state"
+
+    panel_id = Column(String(50), primary_key=True)
+    last_analysed = Column(DateTime)  # timestamp of the newest panel_status row
+    dust_level = Column(Float)
+    classification_confidence = Column(Float)
+    is_dirty = Column(Boolean, default=False)
+    needs_cleaning = Column(Boolean, default=False)
+    last_cleaned = Column(DateTime)  # newest successful cleaning action
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "panel_id": self.panel_id,
+            "last_analysed": self.last_analysed.isoformat() if self.last_analysed else None,
+            "dust_level": self.dust_level,
+            "classification_confidence": self.classification_confidence,
+            "is_dirty": self.is_dirty,
+            "needs_cleaning": self.needs_cleaning,
+            "last_cleaned": self.last_cleaned.isoformat() if self.last_cleaned else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
 class CleaningAction(Base):
     __tablename__ = "cleaning_actions"
+    __table_args__ = (
+        Index("ix_cleaning_actions_panel_time", "panel_id", "timestamp"),
+        # Water used since the last refill: successful washes in a time range.
+        Index("ix_cleaning_actions_success_time", "success", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
-    panel_id = Column(String(50), index=True, nullable=False)
+    panel_id = Column(String(50), nullable=False)
     timestamp = Column(DateTime, default=utcnow, nullable=False)
     action_type = Column(String(20), nullable=False)  # "spray", "schedule", "skip"
     water_volume = Column(Float)
@@ -58,6 +132,113 @@ class CleaningAction(Base):
             "error_message": self.error_message
         }
 
+class WaterLedger(Base):
+    """Water drawn from the tank since the refill it counts from: a single row.
+
+    Successful washes add to it as they are written, so the tank level is a
+    primary-key read instead of a SUM over cleaning_actions. Those rows stay
+    the record; Backend/services.reconcile_water_ledger recounts from them.
+    """
+
+    __tablename__ = "water_ledger"
+
+    id = Column(Integer, primary_key=True)  # always 1
+    refilled_at = Column(DateTime)  # None: counting since records began
+    used_ml = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "refilled_at": self.refilled_at.isoformat() if self.refilled_at else None,
+            "used_ml": self.used_ml,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+class SystemTotals(Base):
+    """Running totals behind /system/stats: a single row.
+
+    Each analysis and each successful wash adds to it as it is written, so the
+    stats are a primary-key read however much history there is. panel_status
+    (with its rollups) and cleaning_actions stay the record;
+    Backend/services.reconcile_system_totals recounts from them.
+    """
+
+    __tablename__ = "system_totals"
+
+    id = Column(Integer, primary_key=True)  # always 1
+    analyses = Column(Integer, nullable=False, default=0)
+    dust_samples = Column(Integer, nullable=False, default=0)  # analyses that measured dust
+    dust_sum = Column(Float, nullable=False, default=0.0)
+    cleanings = Column(Integer, nullable=False, default=0)  # successful washes
+    water_used_ml = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            "analyses": self.analyses,
+            "dust_samples": self.dust_samples,
+            "dust_sum": self.dust_sum,
+            "cleanings": self.cleanings,
+            "water_used_ml": self.water_used_ml,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+class TelemetryReading(Base):
+    """One sensor node's reading, as the MQTT ingestor (Backend/mqtt/ingest.py)
+    received it. Fields follow the ESP32 payload; any it left out are null."""
+
+    __tablename__ = "telemetry_readings"
+    __table_args__ = (
+        Index("ix_telemetry_readings_node_time", "node_id", "timestamp"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    node_id = Column(String(50), nullable=False)  # PANNEL_0..N
+    timestamp = Column(DateTime, nullable=False)  # when the node took it
+    received_at = Column(DateTime, nullable=False)
+    topic = Column(String(255))
+    power = Column(Float)
+    efficiency = Column(Float)
+    spray_interval = Column(Float)
+    spray_duration = Column(Float)
+    temperature = Column(Float)
+    humidity = Column(Float)
+    light = Column(Float)
+
+    def to_dict(self):
+        return telemetry_reading(self)
+
+class TelemetryLatest(Base):
+    """Each node's newest telemetry reading, upserted by the ingestor with every
+    batch, so latest_telemetry is a read of one row per node."""
+
+    __tablename__ = "telemetry_latest"
+
+    node_id = Column(String(50), primary_key=True)
+    timestamp = Column(DateTime, nullable=False)
+    received_at = Column(DateTime, nullable=False)
+    topic = Column(String(255))
+    power = Column(Float)
+    efficiency = Column(Float)
+    spray_interval = Column(Float)
+    spray_duration = Column(Float)
+    temperature = Column(Float)
+    humidity = Column(Float)
+    light = Column(Float)
+
+    def to_dict(self):
+        return telemetry_reading(self)
+
+TELEMETRY_FIELDS = ("power", "efficiency", "spray_interval", "spray_duration", "temperature", "humidity", "light")
+
+def telemetry_reading(row) -> dict:
+    """A stored reading in the shape of the ESP32 capture files."""
+    return {
+        "timestamp": row.timestamp.isoformat() if row.timestamp else None,
+        "panel_id": row.node_id,
+        **{field: getattr(row, field) for field in TELEMETRY_FIELDS},
+    }
+
 class SystemDecision(Base):
     __tablename__ = "system_decisions"
     
@@ -115,3 +296,16 @@ class SystemSetting(Base):
             "value": json.loads(self.value),
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
+
+class VersionCounter(Base):
+    """A named counter bumped with the change it stands for — in the same
+    transaction, or for "data", just after it commits.
+
+    Processes that cache something read its counter — one primary-key lookup —
+    to learn whether another process has changed it, instead of re-reading it.
+    """
+
+    __tablename__ = "version_counters"
+
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
@@ -49,29 +49,32 @@ def _backfill(db: Session, panel_id: str, current: dict, washed_days_ago: float)
     now = utcnow()
     config = services.get_settings(db)
 
-    db.add(
-        CleaningAction(
-            panel_id=panel_id,
-            timestamp=now - timedelta(days=washed_days_ago),
-            action_type="spray",
-            water_volume=config["spray_duration"] * services.ML_PER_SECOND_OF_SPRAY,
-            duration=config["spray_duration"],
-            success=True,
-        )
+    wash = CleaningAction(
+        panel_id=panel_id,
+        timestamp=now - timedelta(days=washed_days_ago),
+        action_type="spray",
+        water_volume=config["spray_duration"] * services.ML_PER_SECOND_OF_SPRAY,
+        duration=config["spray_duration"],
+        success=True,
     )
+    db.add(wash)
+    services.track_panel_wash(db, wash)
+    services.track_water_use(db, wash, config)
+    services.track_wash_totals(db, wash)
 
     for days_ago, dust in _history(current["dust_level"], washed_days_ago):
-        db.add(
-            PanelStatus(
-                panel_id=panel_id,
-                timestamp=now - timedelta(days=days_ago),
-                dust_level=dust,
-                classification_confidence=current["confidence"],
-                is_dirty=dust * 100 > config["schedule_threshold"],
-                needs_cleaning=dust * 100 > config["dust_threshold"],
-                image_path=str(settings.image_dir / f"{panel_id}_test.jpg"),
-            )
+        reading = PanelStatus(
+            panel_id=panel_id,
+            timestamp=now - timedelta(days=days_ago),
+            dust_level=dust,
+            classification_confidence=current["confidence"],
+            is_dirty=dust * 100 > config["schedule_threshold"],
+            needs_cleaning=dust * 100 > config["dust_threshold"],
+            image_path=str(settings.image_dir / f"{panel_id}_test.jpg"),
         )
+        db.add(reading)
+        services.track_panel_status(db, reading)  # older than today's, so it stays history
+        services.track_analysis_totals(db, reading)
 
 
 def seed_if_empty(db: Session) -> bool:
@@ -85,12 +88,15 @@ def seed_if_empty(db: Session) -> bool:
         if db.query(PanelStatus).count():
             return False
 
+        # The real pipeline, on the fixture frames: this writes today's status,
+        # the decision it drove and — if the panel is past the threshold and
+        # auto-cleaning is on — the wash that followed, for every panel in one
+        # batched pass.
+        analysed = services.analyze_panels(db, settings.panel_ids)
+
         seeded = 0
         for panel_id, washed_days_ago in zip(settings.panel_ids, cycle(DAYS_SINCE_WASH)):
-            # The real pipeline, on the fixture frame: this writes today's status,
-            # the decision it drove and — if the panel is past the threshold and
-            # auto-cleaning is on — the wash that followed.
-            current = services.analyze_panel(db, panel_id)
+            current = analysed[panel_id]
             if "error" in current:
                 log.warning("Demo seed skipped %s: %s", panel_id, current["error"])
                 continue
@@ -101,6 +107,7 @@ def seed_if_empty(db: Session) -> bool:
             return False
 
         db.add(SystemSetting(key="demo_seeded_at", value=json.dumps(utcnow().isoformat())))
+        services.invalidate_settings(db)
         services.log_event(
             db, "WARNING", "demo",
             f"No hardware connected — seeded {seeded} panel(s) with synthetic history",
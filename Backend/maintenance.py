@@ -0,0 +1,38 @@
+"""Maintenance commands for the site database.
+
+    python -m Backend.maintenance rebuild-panel-state
+    python -m Backend.maintenance reconcile-water
+    python -m Backend.maintenance reconcile-stats
+    python -m Backend.maintenance retention
+
+Each command opens its own session against DB_PATH and prints what it did as
+JSON, so it can be run by hand or from cron against a live deployment.
+"""
+
+import argparse
+import json
+
+from Backend import retention, services
+from Backend.database.connection import SessionLocal, init_database
+
+COMMANDS = {
+    "rebuild-panel-state": services.rebuild_panel_state,
+    "reconcile-water": services.reconcile_water_ledger,
+    "reconcile-stats": services.reconcile_system_totals,
+    "retention": retention.run_retention,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args(argv)
+
+    init_database()
+    with SessionLocal() as db:
+        print(json.dumps(COMMANDS[args.command](db), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""Round-trip latency of MQTT and HTTP, measured rather than typed in.
+
+The comparison in Hardware/MQTT_OFFLINE — table_geenrator.py, mqttGraph.py —
+was fifty numbers written into the scripts. This runs the round trips the
+ping-pong scripts there were written for:
+
+- MQTT: publish on latency/ping; a responder echoes it on latency/pong, as
+  latency_tester.py does on the ESP32 network;
+- HTTP: GET /ping, answered "pong", as http_latencyTester.py serves it. Each
+  client keeps its connection alive, as an MQTT client keeps its one.
+
+Each is run for N round trips at every concurrency level — that many in flight
+at once — and reports p50/p95/p99 and round trips per second. Both servers are
+on the loopback interface unless pointed elsewhere: the broker is --broker
+HOST:PORT if given (the ESP32 access point's is 192.168.4.2:1884), else
+mosquitto if it is on PATH, else the minimal broker below, in this process;
+the HTTP server is --http URL, else one in this process.
+
+    python Backend/mqtt/bench_latency.py [--round-trips 500] [--concurrency 1 4 16] [--out DIR]
+
+writes DIR/latency-report.json, DIR/latency-table.md and, with matplotlib,
+DIR/latency.png. The graph and table scripts in Hardware/MQTT_OFFLINE draw
+from the JSON. Needs paho-mqtt.
+"""
+
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+
+PING, PONG = "latency/ping", "latency/pong"
+TIMEOUT = 5.0  # seconds before a round trip counts as lost
+LEVELS = (1, 4, 16)
+
+
+def percentile(ordered: list, q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted samples; None for none."""
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarise(samples_ms: list, elapsed: float, lost: int) -> dict:
+    ordered = sorted(samples_ms)
+    rounded = lambda value: None if value is None else round(value, 3)
+    return {
+        "round_trips": len(ordered),
+        "lost": lost,
+        "per_s": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "p50_ms": rounded(percentile(ordered, 50)),
+        "p95_ms": rounded(percentile(ordered, 95)),
+        "p99_ms": rounded(percentile(ordered, 99)),
+        "max_ms": rounded(ordered[-1] if ordered else None),
+        "samples_ms": [round(sample, 3) for sample in samples_ms],  # in the order they finished
+    }
+
+
+def drive(round_trips: int, concurrency: int, client: Callable) -> dict:
+    """Run `round_trips` round trips from `concurrency` threads. `client()` is
+    called once per thread and returns that thread's round trip: a callable
+    that returns whether the answer came back."""
+    samples, lost = [], 0
+    lock = threading.Lock()
+    left = [round_trips]
+
+    def work(round_trip):
+        nonlocal lost
+        while True:
+            with lock:
+                if not left[0]:
+                    return
+                left[0] -= 1
+            started = time.perf_counter()
+            answered = round_trip()
+            took = (time.perf_counter() - started) * 1000
+            with lock:
+                if answered:
+                    samples.append(took)
+                else:
+                    lost += 1
+
+    threads = [threading.Thread(target=work, args=(client(),)) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarise(samples, time.perf_counter() - started, lost)
+
+
+# --------------------------------------------------------------------------
+# MQTT
+# --------------------------------------------------------------------------
+
+def _length(n: int) -> bytes:
+    """MQTT's variable-length "remaining length"."""
+    out = bytearray()
+    while True:
+        n, byte = divmod(n, 128)
+        out.append(byte | 0x80 if n else byte)
+        if not n:
+            return bytes(out)
+
+
+class LoopbackBroker:
+    """Enough of an MQTT 3.1.1 broker to run the benchmark where there is no
+    other: CONNECT, SUBSCRIBE, UNSUBSCRIBE, PINGREQ, DISCONNECT, and PUBLISH —
+    acknowledged at QoS 1, delivered at QoS 0. No sessions, retained messages
+    or wills. It runs its own event loop on a thread."""
+
+    def __init__(self, host: str = "127.0.0.1"):
+        from Backend.mqtt.fake import topic_matches
+
+        self.host = host
+        self.port: Optional[int] = None
+        self._matches = topic_matches
+        self._subscriptions: dict = {}  # writer -> topic filters
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="loopback-broker", daemon=True)
+
+    def start(self) -> "LoopbackBroker":
+        self._thread.start()
+        serving = asyncio.start_server(self._serve, self.host, 0)
+        self._server = asyncio.run_coroutine_threadsafe(serving, self._loop).result()
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._server.close)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(TIMEOUT)
+        self._loop.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._subscriptions[writer] = set()
+        try:
+            while True:
+                header = (await reader.readexactly(1))[0]
+                length, scale = 0, 1
+                while True:
+                    byte = (await reader.readexactly(1))[0]
+                    length += (byte & 0x7F) * scale
+                    scale *= 128
+                    if not byte & 0x80:
+                        break
+                body = await reader.readexactly(length)
+                kind = header >> 4
+                if kind == 1:  # CONNECT
+                    writer.write(b"\x20\x02\x00\x00")
+                elif kind == 3:  # PUBLISH
+                    self._publish(header, body, writer)
+                elif kind == 8:  # SUBSCRIBE
+                    filters, position = [], 2
+                    while position < len(body):
+                        size = int.from_bytes(body[position:position + 2], "big")
+                        filters.append(body[position + 2:position + 2 + size].decode())
+                        position += size + 3
+                    self._subscriptions[writer].update(filters)
+                    writer.write(b"\x90" + _length(2 + len(filters)) + body[:2] + b"\x00" * len(filters))
+                elif kind == 10:  # UNSUBSCRIBE
+                    writer.write(b"\xb0\x02" + body[:2])
+                elif kind == 12:  # PINGREQ
+                    writer.write(b"\xd0\x00")
+                elif kind == 14:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._subscriptions.pop(writer, None)
+            writer.close()
+
+    def _publish(self, header: int, body: bytes, sender: asyncio.StreamWriter):
+        size = int.from_bytes(body[:2], "big")
+        topic, position = body[2:2 + size], 2 + size
+        if (header >> 1) & 3:
+            sender.write(b"\x40\x02" + body[position:position + 2])  # PUBACK
+            position += 2
+        payload = body[position:]
+        packet = b"\x30" + _length(2 + size + len(payload)) + body[:2 + size] + payload
+        for writer, filters in list(self._subscriptions.items()):
+            if any(self._matches(f, topic.decode()) for f in filters):
+                writer.write(packet)
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _start_mosquitto() -> tuple:
+    port = _free_port()
+    process = subprocess.Popen(
+        ["mosquitto", "-p", str(port)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.2).close()
+            return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("mosquitto did not start")
+
+
+class MqttPingPong:
+    """A pinger and a responder, two connections to one broker."""
+
+    def __init__(self, host: str, port: int, qos: int = 0, payload_bytes: int = 0):
+        import paho.mqtt.client as mqtt  # optional: see requirements.txt
+
+        self.qos = qos
+        self.filler = b"x" * payload_bytes
+        self._waiting: dict = {}  # ping number -> Event
+        self._numbers = iter(range(1 << 62))
+        self._lock = threading.Lock()
+
+        self.responder = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.responder.on_connect = lambda client, *_: client.subscribe(PING, qos)
+        self.responder.on_message = lambda client, userdata, message: client.publish(PONG, message.payload, qos)
+        self.pinger = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+        self.pinger.on_connect = lambda client, *_: client.subscribe(PONG, qos)
+        self.pinger.on_message = self._on_pong
+        for client in (self.responder, self.pinger):
+            client.connect(host, port, keepalive=60)
+            client.loop_start()
+
+        # Both subscriptions are in place once a ping comes back.
+        deadline = time.monotonic() + TIMEOUT
+        while not self.round_trip(timeout=0.2):
+            if time.monotonic() > deadline:
+                self.close()
+                raise RuntimeError(f"no pong from the broker at {host}:{port}")
+
+    def _on_pong(self, client, userdata, message):
+        number = int(message.payload.split(b":", 1)[0])
+        with self._lock:
+            answered = self._waiting.pop(number, None)
+        if answered is not None:
+            answered.set()
+
+    def round_trip(self, timeout: float = TIMEOUT) -> bool:
+        answered = threading.Event()
+        with self._lock:
+            number = next(self._numbers)
+            self._waiting[number] = answered
+        self.pinger.publish(PING, b"%d:" % number + self.filler, self.qos)
+        if answered.wait(timeout):
+            return True
+        with self._lock:
+            self._waiting.pop(number, None)
+        return False
+
+    def close(self):
+        for client in (self.pinger, self.responder):
+            client.disconnect()
+            client.loop_stop()
+
+
+# --------------------------------------------------------------------------
+# HTTP
+# --------------------------------------------------------------------------
+
+class _Ping(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+    def do_GET(self):
+        found = self.path == "/ping"
+        body = b"pong" if found else b""
+        self.send_response(200 if found else 404)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _PingServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # the default 5 drops connects at 16 in flight, each a 1 s retry
+
+
+class HttpPing:
+    """Round trips on a connection of its own, kept alive between requests.
+    close() it when done: the server holds a thread per open connection."""
+
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.path = parts.path or "/ping"
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=TIMEOUT)
+        self.connection.connect()  # here, not inside the first timed round trip
+
+    def round_trip(self) -> bool:
+        try:
+            self.connection.request("GET", self.path)
+            response = self.connection.getresponse()
+            response.read()
+            return response.status == 200
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # reconnects on the next request
+            return False
+
+    def close(self):
+        self.connection.close()
+
+
+def drive_http(round_trips: int, concurrency: int, url: str) -> dict:
+    """drive() over HTTP, a connection per thread, each closed after the run."""
+    opened = []
+
+    def client() -> Callable:
+        opened.append(HttpPing(url))
+        return opened[-1].round_trip
+
+    try:
+        return drive(round_trips, concurrency, client)
+    finally:
+        for ping in opened:
+            ping.close()
+
+
+# --------------------------------------------------------------------------
+# the run
+# --------------------------------------------------------------------------
+
+def run(round_trips: int = 500, levels: tuple = LEVELS, broker: Optional[str] = None,
+        http_url: Optional[str] = None, qos: int = 0, payload_bytes: int = 0) -> dict:
+    cleanup = []
+    try:
+        if broker:
+            host, _, port = broker.rpartition(":")
+            host, port, broker_kind = host, int(port), "given"
+        elif shutil.which("mosquitto"):
+            process, port = _start_mosquitto()
+            cleanup.append(process.terminate)
+            host, broker_kind = "127.0.0.1", "mosquitto"
+        else:
+            loopback = LoopbackBroker().start()
+            cleanup.append(loopback.stop)
+            host, port, broker_kind = loopback.host, loopback.port, "loopback"
+
+        if not http_url:
+            server = _PingServer(("127.0.0.1", 0), _Ping)
+            threading.Thread(target=server.serve_forever, name="ping-server", daemon=True).start()
+            cleanup.append(server.server_close)
+            cleanup.append(server.shutdown)
+            http_url = f"http://127.0.0.1:{server.server_address[1]}/ping"
+
+        mqtt = MqttPingPong(host, port, qos, payload_bytes)
+        cleanup.append(mqtt.close)
+        probe = HttpPing(http_url)
+        try:
+            if not probe.round_trip():
+                raise RuntimeError(f"no pong from {http_url}")
+        finally:
+            probe.close()
+
+        results = {"mqtt": {}, "http": {}}
+        for level in levels:
+            results["mqtt"][level] = drive(round_trips, level, lambda: mqtt.round_trip)
+            results["http"][level] = drive_http(round_trips, level, http_url)
+        return {
+            "round_trips": round_trips,
+            "mqtt_qos": qos,
+            "payload_bytes": payload_bytes,
+            "broker": {"kind": broker_kind, "address": f"{host}:{port}"},
+            "http": http_url,
+            "results": results,
+        }
+    finally:
+        for step in reversed(cleanup):
+            step()
+
+
+def table(report: dict) -> str:
+    lines = [
+        f"{report['round_trips']} round trips per level; broker: {report['broker']['kind']} "
+        f"({report['broker']['address']}), MQTT QoS {report['mqtt_qos']}; HTTP: {report['http']}",
+        "",
+        "| Transport | In flight | Round trips/s | p50 (ms) | p95 (ms) | p99 (ms) | Lost |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    for transport, levels in report["results"].items():
+        for level, r in levels.items():
+            lines.append(
+                f"| {transport.upper()} | {level} | {r['per_s']} | {r['p50_ms']} | {r['p95_ms']} | "
+                f"{r['p99_ms']} | {r['lost']} |"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def graph(report: dict, path: Path) -> bool:
+    """Each round trip at the lowest level, as mqttGraph.py drew it, and the
+    percentiles at every level. False without matplotlib."""
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        return False
+
+    results = report["results"]
+    first = min(results["mqtt"], key=int)
+    figure, (trials, tails) = plt.subplots(1, 2, figsize=(14, 5))
+    for transport, marker in (("mqtt", "o"), ("http", "x")):
+        samples = results[transport][first]["samples_ms"]
+        trials.plot(range(1, len(samples) + 1), samples, label=transport.upper(), marker=marker, markersize=2)
+        levels = sorted(results[transport], key=int)
+        for q, style in (("p50_ms", "-"), ("p95_ms", "--"), ("p99_ms", ":")):
+            tails.plot(levels, [results[transport][level][q] for level in levels], style, marker=marker,
+                       label=f"{transport.upper()} {q[:3]}")
+    trials.set(xlabel="Round trip", ylabel="Latency (ms)", title=f"Each round trip, {first} in flight")
+    tails.set(xlabel="Round trips in flight", ylabel="Latency (ms)", title="Percentiles by concurrency")
+    tails.set_xscale("log", base=2)
+    for axes in (trials, tails):
+        axes.legend()
+        axes.grid(True)
+    figure.tight_layout()
+    figure.savefig(path, dpi=120)
+    plt.close(figure)
+    return True
+
+
+def write(report: dict, out: Path) -> list:
+    out.mkdir(parents=True, exist_ok=True)
+    written = [out / "latency-report.json", out / "latency-table.md"]
+    written[0].write_text(json.dumps(report, indent=2))
+    written[1].write_text(table(report))
+    if graph(report, out / "latency.png"):
+        written.append(out / "latency.png")
+    return written
+
+
+def main() -> int:
+    sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--round-trips", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(LEVELS))
+    parser.add_argument("--broker", help="HOST:PORT of a broker to use instead of a loopback one")
+    parser.add_argument("--http", help="URL of a ping endpoint to use instead of a loopback one")
+    parser.add_argument("--qos", type=int, choices=(0, 1), default=0)
+    parser.add_argument("--payload-bytes", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=Path("."))
+    args = parser.parse_args()
+
+    try:
+        import paho.mqtt.client  # noqa: F401
+    except ImportError:
+        parser.error("the benchmark needs paho-mqtt: pip install paho-mqtt")
+
+    report = run(args.round_trips, tuple(args.concurrency), args.broker, args.http, args.qos, args.payload_bytes)
+    print(table(report))
+    for path in write(report, args.out):
+        print(f"wrote {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+"""Spray commands out to the ESP32 nodes, many at a time.
+
+The scripts in Hardware/ publish one command, then sleep — 0.2 s to 2 s —
+before the next, so a 25-panel sweep took five seconds or more and a 500-panel
+site minutes, while each node sat idle between its own commands. Here a batch
+goes out as fast as two limits allow:
+
+- per node, not globally: a node takes at most `node_rate` commands a second,
+  and nodes are served round-robin, so twenty nodes take twenty commands in
+  the time one took one;
+- pipelined: a QoS 1 publish does not wait for its PUBACK before the next one
+  goes, up to `max_inflight` unacknowledged at once.
+
+Each command's publish-to-PUBACK time is its latency. The firmware sends no
+reply of its own, so the broker's acknowledgement is the receipt there is; a
+command that gets none within `ack_timeout` is reported as timed out.
+
+A command is the payload SolarSageAI_FInalCode.ino reads from its topic:
+
+    {"nozzle_id": "NOZZLE_3", "amount_ml": 100, "spray_timeout": 5}
+
+Panels map onto nodes in panel_ids order, MQTT_NOZZLES_PER_NODE to a node,
+and node N's commands go to MQTT_COMMAND_TOPIC with N for its {node}:
+spray/control/N, which the firmware built with NODE_NUMBER "N" subscribes to.
+The payload does not say which node it is for, so a topic without {node}
+would have every node spray the nozzle; check_addressing refuses that
+wherever more than one node is needed.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from Backend.config.settings import settings
+
+QOS = 1
+MAX_INFLIGHT = 20  # matches paho's own default window
+ACK_TIMEOUT = 5.0  # seconds a batch waits for its last PUBACK
+MQTT_ERR_NO_CONN = 4  # paho: not connected; a QoS > 0 message is queued for the reconnect
+
+
+def spray_command(panel_id: str, panel_index: int, duration: float, volume: float) -> dict:
+    """The command that washes one panel, addressed to the node serving it."""
+    node, nozzle = divmod(panel_index, settings.mqtt_nozzles_per_node)
+    return {
+        "panel_id": panel_id,
+        "node_id": f"NODE_{node}",
+        "topic": settings.mqtt_command_topic.format(node=node),
+        "payload": {"nozzle_id": f"NOZZLE_{nozzle + 1}", "amount_ml": round(volume), "spray_timeout": round(duration)},
+    }
+
+
+def check_addressing(panel_count: int):
+    """Raise ValueError when `panel_count` panels need more nodes than
+    MQTT_COMMAND_TOPIC can address apart."""
+    nodes = math.ceil(panel_count / settings.mqtt_nozzles_per_node)
+    if nodes > 1 and "{node}" not in settings.mqtt_command_topic:
+        raise ValueError(
+            f"{panel_count} panels need {nodes} nodes, but MQTT_COMMAND_TOPIC "
+            f"{settings.mqtt_command_topic!r} has no {{node}}: every node would spray every command"
+        )
+
+
+def _percentile(samples: list, q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted samples; None for none."""
+    if not samples:
+        return None
+    return samples[max(0, math.ceil(q / 100 * len(samples)) - 1)]
+
+
+class CommandDispatcher:
+    """Publishes batches of spray commands through `client` — a paho Client,
+    connected with its loop running, or Backend.mqtt.fake.FakeClient. One batch
+    at a time; a node's rate limit carries over from one batch to the next."""
+
+    def __init__(self, client, qos: int = QOS, node_rate: Optional[float] = None,
+                 max_inflight: int = MAX_INFLIGHT, ack_timeout: float = ACK_TIMEOUT):
+        self.client = client
+        self.qos = qos
+        rate = settings.mqtt_node_rate if node_rate is None else node_rate
+        self.interval = 1.0 / rate if rate else 0.0
+        self.max_inflight = max_inflight
+        self.ack_timeout = ack_timeout
+
+        self._batch_lock = threading.Lock()
+        self._next_slot: dict = {}  # node id -> monotonic time it may take another command
+        self._acks = threading.Condition()
+        self._pending: dict = {}  # mid -> (result, sent_at)
+        self._early: dict = {}  # mid -> acked_at, for a PUBACK that beat publish() back
+
+        client.on_publish = self._on_publish
+
+    def dispatch(self, commands: list) -> dict:
+        """Publish `commands` — spray_command dicts — and wait for their acks.
+        Returns a result per command, in the order given, and a summary."""
+        with self._batch_lock:
+            started = time.monotonic()
+            with self._acks:
+                self._early.clear()
+            results = [
+                {"panel_id": c.get("panel_id"), "node_id": c["node_id"], "status": "pending",
+                 "sent_ms": None, "latency_ms": None}
+                for c in commands
+            ]
+            queues: dict = {}  # node id -> indexes of its commands, in order
+            for i, command in enumerate(commands):
+                queues.setdefault(command["node_id"], deque()).append(i)
+
+            while queues:
+                now = time.monotonic()
+                ready = [node for node in queues if self._next_slot.get(node, 0.0) <= now]
+                if not ready:
+                    time.sleep(min(self._next_slot[node] for node in queues) - now)
+                    continue
+                for node in ready:
+                    self._wait_for_room()
+                    i = queues[node].popleft()
+                    if not queues[node]:
+                        del queues[node]
+                    self._publish(commands[i], results[i], started)
+                    self._next_slot[node] = time.monotonic() + self.interval
+
+            self._wait_for_acks()
+            return self._summary(results, started)
+
+    def _publish(self, command: dict, result: dict, started: float):
+        sent_at = time.monotonic()
+        result["sent_ms"] = round((sent_at - started) * 1000, 2)
+        info = self.client.publish(command["topic"], json.dumps(command["payload"]), qos=self.qos)
+        with self._acks:
+            if info.rc != 0 and not (info.rc == MQTT_ERR_NO_CONN and self.qos):
+                result["status"] = "failed"
+                result["error"] = f"publish returned rc={info.rc}"
+                return
+            acked_at = self._early.pop(info.mid, None)
+            if acked_at is None:
+                self._pending[info.mid] = (result, sent_at)
+            else:
+                self._settle(result, sent_at, acked_at, 0)
+
+    def _on_publish(self, client, userdata, mid, reason_code=0, properties=None):
+        acked_at = time.monotonic()
+        with self._acks:
+            pending = self._pending.pop(mid, None)
+            if pending is None:
+                self._early[mid] = acked_at
+            else:
+                self._settle(*pending, acked_at, reason_code)
+            self._acks.notify_all()
+
+    @staticmethod
+    def _settle(result: dict, sent_at: float, acked_at: float, reason_code):
+        if reason_code != 0:
+            result["status"] = "failed"
+            result["error"] = f"broker refused it: {reason_code}"
+            return
+        result["status"] = "acked"
+        result["latency_ms"] = round((acked_at - sent_at) * 1000, 2)
+
+    def _wait_for_room(self):
+        # Past the timeout the broker is not acking at all; publishing on lets
+        # paho queue the rest, and they time out with the batch.
+        with self._acks:
+            self._acks.wait_for(lambda: len(self._pending) < self.max_inflight, self.ack_timeout)
+
+    def _wait_for_acks(self):
+        with self._acks:
+            self._acks.wait_for(lambda: not self._pending, self.ack_timeout)
+            for result, _ in self._pending.values():
+                result["status"] = "timeout"
+            self._pending.clear()
+
+    @staticmethod
+    def _summary(results: list, started: float) -> dict:
+        latencies = sorted(r["latency_ms"] for r in results if r["status"] == "acked")
+        count = lambda status: sum(1 for r in results if r["status"] == status)
+        return {
+            "commands": len(results),
+            "acked": len(latencies),
+            "failed": count("failed"),
+            "timeout": count("timeout"),
+            "elapsed_ms": round((time.monotonic() - started) * 1000, 2),
+            "latency_ms": {
+                "p50": _percentile(latencies, 50),
+                "p95": _percentile(latencies, 95),
+                "max": latencies[-1] if latencies else None,
+            },
+            "results": results,
+        }
+
+
+def connect(host: Optional[str] = None, port: Optional[int] = None) -> CommandDispatcher:
+    """A dispatcher on a paho client connected to the broker, its network loop
+    running and reconnecting on its own. Raises ImportError without paho-mqtt
+    and OSError when the broker cannot be reached."""
+    import paho.mqtt.client as mqtt  # optional: see requirements.txt
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="solarsage-dispatcher")
+    client.max_inflight_messages_set(MAX_INFLIGHT)
+    client.reconnect_delay_set(min_delay=1, max_delay=30)
+    dispatcher = CommandDispatcher(client)
+    client.connect(host or settings.mqtt_host, port or settings.mqtt_port, keepalive=60)
+    client.loop_start()
+    return dispatcher
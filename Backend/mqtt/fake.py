@@ -0,0 +1,145 @@
+"""A stand-in for paho-mqtt's Client, with an in-process broker.
+
+Tests and benchmarks run the MQTT code in this package against it instead of a
+broker. It implements the part of paho.mqtt.client.Client (callback API
+version 2) that the package uses, and delivers a publish to every matching
+subscriber's on_message on the publishing thread — where paho's network thread
+would call it. The publisher's on_publish, paho's "the broker has it" (PUBACK
+at QoS 1), follows straight away, or `ack_delay` seconds later on a timer.
+
+    broker = FakeBroker()
+    node, backend = FakeClient(broker), FakeClient(broker)
+"""
+
+import itertools
+import threading
+from typing import Optional
+
+
+def topic_matches(subscription: str, topic: str) -> bool:
+    """MQTT topic-filter matching: `+` is one level, `#` the rest (or none)."""
+    wanted, levels = subscription.split("/"), topic.split("/")
+    for i, level in enumerate(wanted):
+        if level == "#":
+            return True
+        if i >= len(levels) or level not in ("+", levels[i]):
+            return False
+    return len(wanted) == len(levels)
+
+
+class FakeMessage:
+    def __init__(self, topic: str, payload: bytes, qos: int = 0, retain: bool = False):
+        self.topic = topic
+        self.payload = payload
+        self.qos = qos
+        self.retain = retain
+
+
+class FakeMessageInfo:
+    """What publish returns: rc 0 is MQTT_ERR_SUCCESS, 4 MQTT_ERR_NO_CONN."""
+
+    def __init__(self, mid: int, rc: int = 0):
+        self.mid = mid
+        self.rc = rc
+
+    def is_published(self) -> bool:
+        return self.rc == 0
+
+    def wait_for_publish(self, timeout: Optional[float] = None):
+        return None
+
+
+class FakeBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: list = []
+        self.delivered = 0
+
+    def attach(self, client: "FakeClient"):
+        with self._lock:
+            self._clients.append(client)
+
+    def detach(self, client: "FakeClient"):
+        with self._lock:
+            if client in self._clients:
+                self._clients.remove(client)
+
+    def route(self, message: FakeMessage):
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            if any(topic_matches(sub, message.topic) for sub in list(client.subscriptions)):
+                self.delivered += 1
+                client.deliver(message)
+
+
+class FakeClient:
+    _mids = itertools.count(1)
+
+    def __init__(self, broker: Optional[FakeBroker] = None, client_id: str = "", ack_delay: float = 0.0):
+        self.broker = broker or FakeBroker()
+        self.client_id = client_id
+        self.ack_delay = ack_delay
+        self.subscriptions: dict = {}  # topic filter -> qos
+        self.published: list = []  # every FakeMessage this client sent
+        self.on_connect = None
+        self.on_message = None
+        self.on_disconnect = None
+        self.on_publish = None
+        self._connected = False
+
+    def connect(self, host: str = "localhost", port: int = 1883, keepalive: int = 60) -> int:
+        self.host, self.port = host, port
+        self._connected = True
+        self.broker.attach(self)
+        if self.on_connect:
+            self.on_connect(self, None, {}, 0, None)
+        return 0
+
+    def disconnect(self) -> int:
+        self._connected = False
+        self.broker.detach(self)
+        if self.on_disconnect:
+            self.on_disconnect(self, None, {}, 0, None)
+        return 0
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    def max_inflight_messages_set(self, inflight: int):
+        self.max_inflight = inflight
+
+    def loop_start(self) -> int:
+        return 0
+
+    def loop_stop(self) -> int:
+        return 0
+
+    def subscribe(self, topic: str, qos: int = 0) -> tuple:
+        self.subscriptions[topic] = qos
+        return 0, next(self._mids)
+
+    def unsubscribe(self, topic: str) -> tuple:
+        self.subscriptions.pop(topic, None)
+        return 0, next(self._mids)
+
+    def publish(self, topic: str, payload=None, qos: int = 0, retain: bool = False) -> FakeMessageInfo:
+        mid = next(self._mids)
+        if not self._connected:
+            return FakeMessageInfo(mid, rc=4)
+        if isinstance(payload, str):
+            payload = payload.encode()
+        message = FakeMessage(topic, payload or b"", qos, retain)
+        self.published.append(message)
+        self.broker.route(message)
+        if self.on_publish:
+            ack = (self, None, mid, 0, None)
+            if self.ack_delay:
+                threading.Timer(self.ack_delay, self.on_publish, ack).start()
+            else:
+                self.on_publish(*ack)  # before publish returns, as paho's can
+        return FakeMessageInfo(mid)
+
+    def deliver(self, message: FakeMessage):
+        if self.on_message:
+            self.on_message(self, None, message)
@@ -0,0 +1,274 @@
+"""MQTT telemetry ingestor: sensor readings from the broker into the database.
+
+The ESP32 nodes publish readings — the JSON of one row of the capture files in
+Hardware/, or a list of them — on spray/data, or on spray/data/<node id> when
+the payload does not name its node. This process subscribes to
+MQTT_TELEMETRY_TOPIC and writes what arrives:
+
+    paho network thread --on_message--> bounded queue --> writer thread --> batch INSERT
+
+on_message only parses and enqueues. The writer takes whatever is queued, up to
+`batch_size` readings, and writes it in one transaction: one executemany INSERT
+into telemetry_readings and one upsert per node into telemetry_latest, which is
+what latest_telemetry reads.
+
+Backpressure: when the database falls behind — locked, or down and being
+retried — the queue fills, and on_message holds paho's network thread for up to
+`put_timeout`, so the broker stops handing over messages. Past that a reading is
+dropped and counted instead of growing memory without bound.
+
+    python -m Backend.mqtt.ingest [--host H] [--port P] [--topic T]
+
+Telemetry is written with Core statements, which do not move the data version
+behind the API's ETags: it changes every few seconds, and reads that do not show
+it keep their 304s. /overview, which does, revalidates on its period.
+"""
+
+import argparse
+import json
+import logging
+import queue
+import signal
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from Backend.config.settings import settings
+from Backend.database.models import TELEMETRY_FIELDS, TelemetryLatest, TelemetryReading, utcnow
+
+log = logging.getLogger(__name__)
+
+QUEUE_SIZE = 10_000  # readings: about 13 minutes of 25 nodes every 2 seconds
+BATCH_SIZE = 500
+PUT_TIMEOUT = 1.0  # seconds on_message may hold paho's thread on a full queue
+RETRY_DELAYS = (0.5, 1, 2, 5, 10, 30)  # seconds between attempts at a failed batch
+COUNTERS = ("received", "written", "batches", "malformed", "dropped", "write_errors")
+
+_UPSERT = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+_LATEST_COLUMNS = ("timestamp", "received_at", "topic", *TELEMETRY_FIELDS)
+
+
+def _timestamp(value, received_at: datetime) -> datetime:
+    """When the node took a reading, as naive UTC: ISO text or epoch seconds.
+    Anything else is taken as the time it arrived."""
+    try:
+        if isinstance(value, str):
+            parsed = datetime.fromisoformat(value)
+            return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError):
+        pass
+    return received_at
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return float(value)
+
+
+class TelemetryIngestor:
+    """Subscribes `client` — a paho Client, or Backend.mqtt.fake.FakeClient — to
+    the telemetry topic and writes readings through `sessions`."""
+
+    def __init__(self, client, sessions: Callable, topic: Optional[str] = None, qos: int = 1,
+                 queue_size: int = QUEUE_SIZE, batch_size: int = BATCH_SIZE, put_timeout: float = PUT_TIMEOUT):
+        self.client = client
+        self.sessions = sessions
+        self.topic = topic or settings.mqtt_telemetry_topic
+        self.qos = qos
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self.queue: queue.Queue = queue.Queue(queue_size)
+
+        self._counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+
+        client.on_connect = self._on_connect
+        client.on_message = self._on_message
+
+    def start(self):
+        self._writer = threading.Thread(target=self._write_forever, name="telemetry-writer", daemon=True)
+        self._writer.start()
+        self.client.loop_start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop taking messages, and write what is already queued."""
+        self.client.loop_stop()
+        self._stopping.set()
+        if self._writer is not None:
+            self._writer.join(timeout)
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        return {**{name: counts.get(name, 0) for name in COUNTERS}, "queued": self.queue.qsize()}
+
+    def _count(self, name: str, n: int = 1):
+        if n:
+            with self._counts_lock:
+                self._counts[name] += n
+
+    # -- paho callbacks, on its network thread --------------------------------
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties=None):
+        if reason_code != 0:
+            log.warning("MQTT connect refused: %s", reason_code)
+            return
+        # On every connect: a reconnect starts without the old subscription.
+        client.subscribe(self.topic, qos=self.qos)
+        log.info("Subscribed to %s", self.topic)
+
+    def _on_message(self, client, userdata, message):
+        rows, rejected = self.parse(message.topic, message.payload)
+        self._count("received", len(rows))
+        self._count("malformed", rejected)
+        wait = self.put_timeout
+        for row in rows:
+            try:
+                self.queue.put(row, block=wait > 0, timeout=wait or None)
+            except queue.Full:
+                self._count("dropped")
+                wait = 0  # the rest of this message would only wait as long again
+
+    def parse(self, topic: str, payload: bytes) -> tuple:
+        """(rows, rejected): telemetry_readings rows from one message, and how
+        many readings in it were unusable."""
+        try:
+            data = json.loads(payload)
+        except ValueError:  # bad JSON, or bytes that are not UTF-8
+            return [], 1
+        readings = data if isinstance(data, list) else [data]
+        from_topic = self._node_from_topic(topic)
+        received_at = utcnow()
+        rows, rejected = [], 0
+        for reading in readings:
+            node = (reading.get("panel_id") or from_topic) if isinstance(reading, dict) else None
+            if not node:
+                rejected += 1
+                continue
+            rows.append({
+                "node_id": str(node)[:50],
+                "timestamp": _timestamp(reading.get("timestamp"), received_at),
+                "received_at": received_at,
+                "topic": topic[:255],
+                **{field: _number(reading.get(field)) for field in TELEMETRY_FIELDS},
+            })
+        return rows, rejected
+
+    def _node_from_topic(self, topic: str) -> Optional[str]:
+        if not self.topic.endswith("/#"):
+            return None
+        base = self.topic[:-1]  # "spray/data/"
+        rest = topic[len(base):] if topic.startswith(base) else ""
+        return rest if rest and "/" not in rest else None
+
+    # -- writer thread -------------------------------------------------------
+
+    def _write_forever(self):
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write_until_done(batch)
+            elif self._stopping.is_set():
+                return
+
+    def _take_batch(self) -> list:
+        try:
+            batch = [self.queue.get(timeout=0.2)]  # wakes to notice stop()
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_until_done(self, batch: list):
+        for attempt in range(len(RETRY_DELAYS) + 1):
+            try:
+                self.write(batch)
+                return
+            except SQLAlchemyError as e:
+                self._count("write_errors")
+                if self._stopping.is_set():
+                    break
+                delay = RETRY_DELAYS[min(attempt, len(RETRY_DELAYS) - 1)]
+                log.warning("Telemetry batch of %d failed (%s); retrying in %ss", len(batch), e, delay)
+                self._stopping.wait(delay)
+        log.error("Dropping a telemetry batch of %d readings the database would not take", len(batch))
+        self._count("dropped", len(batch))
+
+    def write(self, rows: list):
+        """Insert readings and bring each node's latest up to date, in one
+        transaction."""
+        newest: dict = {}
+        for row in rows:
+            current = newest.get(row["node_id"])
+            if current is None or row["timestamp"] >= current["timestamp"]:
+                newest[row["node_id"]] = row
+
+        with self.sessions() as db:
+            db.execute(insert(TelemetryReading), rows)
+            upsert = _UPSERT[db.get_bind().dialect.name](TelemetryLatest)
+            db.execute(
+                upsert.on_conflict_do_update(
+                    index_elements=["node_id"],
+                    set_={column: upsert.excluded[column] for column in _LATEST_COLUMNS},
+                    where=upsert.excluded.timestamp >= TelemetryLatest.timestamp,  # a late batch loses
+                ),
+                list(newest.values()),
+            )
+            db.commit()
+        self._count("written", len(rows))
+        self._count("batches")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default=settings.mqtt_host)
+    parser.add_argument("--port", type=int, default=settings.mqtt_port)
+    parser.add_argument("--topic", default=settings.mqtt_telemetry_topic)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    try:
+        import paho.mqtt.client as mqtt
+    except ImportError:
+        parser.error("the ingestor needs paho-mqtt: pip install paho-mqtt")
+
+    from Backend.database.connection import SessionLocal, init_database
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    init_database()
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id="solarsage-telemetry-ingestor")
+    client.reconnect_delay_set(min_delay=1, max_delay=30)
+    ingestor = TelemetryIngestor(
+        client, SessionLocal, args.topic, queue_size=args.queue_size, batch_size=args.batch_size
+    )
+    client.connect_async(args.host, args.port, keepalive=60)  # retried by the loop until the broker answers
+    ingestor.start()
+
+    stopped = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stopped.set())
+    while not stopped.wait(60):
+        log.info("Telemetry: %s", ingestor.stats())
+    ingestor.stop()
+    log.info("Stopped. Telemetry: %s", ingestor.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
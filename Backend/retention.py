@@ -0,0 +1,233 @@
+"""Retention: keeps the tables every analysis writes to from growing forever.
+
+An analysis writes a panel_status row, a decision and a log entry, and nothing
+ever removed one. A run of this module:
+
+- rolls panel_status rows older than RETENTION_RAW_DAYS into hourly
+  panel_status_rollups — min, max and mean dust per panel — and hourly rollups
+  older than RETENTION_HOURLY_DAYS into daily ones;
+- moves system_logs and system_decisions rows older than
+  RETENTION_ARCHIVE_DAYS into gzipped JSON-lines files under <data_dir>/archive,
+  one file per table per run;
+- deletes telemetry_readings older than RETENTION_TELEMETRY_DAYS. Each node's
+  newest reading is kept apart, in telemetry_latest.
+
+Each panel's newest reading and the newest decision stay whatever their age:
+panel_latest_state is rebuilt from the one and /latest-decision reads the other.
+Windows are cut on bucket boundaries, so a bucket is written whole; a reading
+that turns up late for a bucket already written is merged into it.
+
+    python -m Backend.maintenance retention
+
+or POST /system/retention, from cron or any other scheduler. A second run
+straight after the first finds nothing to do and writes nothing.
+"""
+
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from Backend import services
+from Backend.change_feed import feed
+from Backend.config.settings import settings
+from Backend.database.models import (
+    PanelStatus,
+    PanelStatusRollup,
+    SystemDecision,
+    SystemLog,
+    TelemetryReading,
+    utcnow,
+)
+
+# The start of the hour a timestamp falls in. SQLite has no date_trunc, and
+# hands the bucket back as text.
+_HOUR_START = {
+    "sqlite": lambda column: func.strftime("%Y-%m-%d %H:00:00", column),
+    "postgresql": lambda column: func.date_trunc("hour", column),
+}
+
+ARCHIVED_TABLES = (SystemLog, SystemDecision)
+
+
+def _as_datetime(value) -> datetime:
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
+def _combine(summary: Optional[tuple], samples: int, low, high, mean) -> tuple:
+    """Two summaries of the same bucket as one: (samples, min, max, mean)."""
+    if summary is None:
+        return samples, low, high, mean
+    count, old_low, old_high, old_mean = summary
+    if mean is None or old_mean is None:
+        merged_mean = old_mean if mean is None else mean
+    else:
+        merged_mean = (old_mean * count + mean * samples) / (count + samples)
+    return (
+        count + samples,
+        min((v for v in (old_low, low) if v is not None), default=None),
+        max((v for v in (old_high, high) if v is not None), default=None),
+        merged_mean,
+    )
+
+
+def _store(db: Session, period: str, buckets: dict) -> int:
+    """Write {(panel_id, bucket_start): summary} as rollups of `period`, merging
+    into any that exist. Returns how many rows it created."""
+    if not buckets:
+        return 0
+    starts = [start for _, start in buckets]
+    existing = {
+        (row.panel_id, row.bucket_start): row
+        for row in db.query(PanelStatusRollup).filter(
+            PanelStatusRollup.period == period,
+            PanelStatusRollup.bucket_start.between(min(starts), max(starts)),
+        )
+    }
+    created = 0
+    for (panel_id, start), summary in buckets.items():
+        row = existing.get((panel_id, start))
+        if row is not None:
+            summary = _combine((row.samples, row.dust_min, row.dust_max, row.dust_mean), *summary)
+        else:
+            row = PanelStatusRollup(panel_id=panel_id, period=period, bucket_start=start)
+            db.add(row)
+            created += 1
+        row.samples, row.dust_min, row.dust_max, row.dust_mean = summary
+    return created
+
+
+def _newest_reading_ids(db: Session) -> list:
+    ranked = db.query(
+        PanelStatus.id,
+        func.row_number().over(
+            partition_by=PanelStatus.panel_id,
+            order_by=(PanelStatus.timestamp.desc(), PanelStatus.id.desc()),
+        ).label("rank"),
+    ).subquery()
+    return [row_id for (row_id,) in db.query(ranked.c.id).filter(ranked.c.rank == 1)]
+
+
+def _roll_up_readings(db: Session, cutoff: datetime) -> dict:
+    old = (PanelStatus.timestamp < cutoff, PanelStatus.id.not_in(_newest_reading_ids(db)))
+    hour = _HOUR_START[db.get_bind().dialect.name](PanelStatus.timestamp).label("hour")
+    groups = (
+        db.query(
+            PanelStatus.panel_id,
+            hour,
+            func.count(PanelStatus.id),
+            func.min(PanelStatus.dust_level),
+            func.max(PanelStatus.dust_level),
+            func.avg(PanelStatus.dust_level),
+        )
+        .filter(*old)
+        .group_by(PanelStatus.panel_id, hour)
+        .all()
+    )
+    buckets = {
+        (panel_id, _as_datetime(start)): (samples, low, high, mean)
+        for panel_id, start, samples, low, high, mean in groups
+    }
+    created = _store(db, "hour", buckets)
+    deleted = db.query(PanelStatus).filter(*old).delete(synchronize_session=False)
+    return {"deleted": deleted, "created": created}
+
+
+def _fold_hours(db: Session, cutoff: datetime) -> dict:
+    old = (PanelStatusRollup.period == "hour", PanelStatusRollup.bucket_start < cutoff)
+    days: dict = {}
+    for row in db.query(PanelStatusRollup).filter(*old):
+        key = (row.panel_id, row.bucket_start.replace(hour=0))
+        days[key] = _combine(days.get(key), row.samples, row.dust_min, row.dust_max, row.dust_mean)
+    created = _store(db, "day", days)
+    deleted = db.query(PanelStatusRollup).filter(*old).delete(synchronize_session=False)
+    return {"deleted": deleted, "created": created}
+
+
+def _as_record(row) -> dict:
+    """A row as stored, columns by name: an archive keeps what the table held,
+    even a details blob that no longer parses."""
+    record = {}
+    for column in row.__table__.columns:
+        value = getattr(row, column.key)
+        record[column.name] = value.isoformat() if isinstance(value, datetime) else value
+    return record
+
+
+def _archive(db: Session, model, cutoff: datetime, stamp: str) -> dict:
+    old = [model.timestamp < cutoff]
+    if model is SystemDecision:
+        newest = db.query(model.id).order_by(model.timestamp.desc(), model.id.desc()).limit(1).scalar()
+        if newest is not None:
+            old.append(model.id != newest)
+    last_id = db.query(func.max(model.id)).filter(*old).scalar()
+    if last_id is None:
+        return {"deleted": 0, "created": 0}
+    old.append(model.id <= last_id)
+
+    settings.archive_dir.mkdir(parents=True, exist_ok=True)
+    # The random suffix keeps a second run within the same second from
+    # replacing the first one's file; its rows are already out of the table.
+    path = settings.archive_dir / f"{model.__tablename__}-{stamp}-{uuid.uuid4().hex[:12]}.jsonl.gz"
+    partial = path.with_name(path.name + ".partial")
+    try:
+        with gzip.open(partial, "wt", encoding="utf-8") as out:
+            for row in db.query(model).filter(*old).order_by(model.id).yield_per(1000):
+                out.write(json.dumps(_as_record(row)) + "\n")
+        os.replace(partial, path)
+        deleted = db.query(model).filter(*old).delete(synchronize_session=False)
+        services.bump_version(db, services.DATA_VERSION)  # a bulk delete does not flush
+        db.commit()
+    except Exception:
+        # Rows stay in the table unless their file is complete and they are gone.
+        db.rollback()
+        partial.unlink(missing_ok=True)
+        path.unlink(missing_ok=True)
+        raise
+    return {"deleted": deleted, "created": 0, "archive": str(path)}
+
+
+def run_retention(db: Session, now: Optional[datetime] = None) -> dict:
+    """Apply every retention window and report, per table, the rows deleted and
+    the rollup rows created; `reclaimed_rows` is the net of the two."""
+    now = now or utcnow()
+    report = {}
+
+    if settings.retention_raw_days:
+        cutoff = (now - timedelta(days=settings.retention_raw_days)).replace(minute=0, second=0, microsecond=0)
+        report["panel_status"] = _roll_up_readings(db, cutoff)
+        db.commit()
+    if settings.retention_hourly_days:
+        cutoff = (now - timedelta(days=settings.retention_hourly_days)).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        report["hourly_rollups"] = _fold_hours(db, cutoff)
+        db.commit()
+    if settings.retention_archive_days:
+        cutoff = now - timedelta(days=settings.retention_archive_days)
+        stamp = now.strftime("%Y%m%dT%H%M%S")
+        for model in ARCHIVED_TABLES:
+            report[model.__tablename__] = _archive(db, model, cutoff, stamp)
+    if settings.retention_telemetry_days:
+        cutoff = now - timedelta(days=settings.retention_telemetry_days)
+        # No data version bump: telemetry is written around it (see ingest.py).
+        deleted = db.query(TelemetryReading).filter(TelemetryReading.timestamp < cutoff).delete(
+            synchronize_session=False
+        )
+        report["telemetry_readings"] = {"deleted": deleted, "created": 0}
+        db.commit()
+
+    report["reclaimed_rows"] = sum(step["deleted"] - step["created"] for step in report.values())
+    if any(step["deleted"] for step in report.values() if isinstance(step, dict)):
+        services.log_event(
+            db, "INFO", "retention", f"Reclaimed {report['reclaimed_rows']} row(s)",
+            {table: step for table, step in report.items() if isinstance(step, dict)},
+        )
+        db.commit()
+        feed.publish("retention")
+    return report
@@ -7,30 +7,61 @@ something — a threshold, a tally, which panels a bulk wash touches — belongs
 here, where it has tests, and not in the layer that displays it.
 """
 
+import asyncio
 import json
+import logging
+import threading
 import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
-from sqlalchemy import func
+from sqlalchemy import event, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from Agents.crew import render_prose
+from Backend.agents.analysis_cache import AnalysisCache
 from Backend.agents.image_classifier import ImageClassifierAgent
+from Backend.change_feed import feed
 from Backend.config.settings import settings
 from Backend.database.models import (
     CleaningAction,
+    PanelLatestState,
     PanelStatus,
+    PanelStatusRollup,
     SystemDecision,
     SystemLog,
     SystemSetting,
+    SystemTotals,
+    TelemetryLatest,
+    VersionCounter,
+    WaterLedger,
     utcnow,
 )
+from Backend.mqtt import dispatch
+from Backend.telemetry import TelemetryIndex, summarise
+
+log = logging.getLogger(__name__)
 
 PROCESS_STARTED_AT = time.time()
 ML_PER_SECOND_OF_SPRAY = 20
 
-classifier = ImageClassifierAgent()
+classifier = ImageClassifierAgent(
+    location=settings.site_location,
+    cache=AnalysisCache(
+        settings.data_dir / "analysis_cache",
+        max_entries=settings.analysis_cache_entries,
+        max_disk_entries=settings.analysis_cache_disk_entries,
+    ),
+    max_edge=settings.analysis_max_edge,
+    irradiance_dir=settings.irradiance_dir,
+)
+
+# Parses each capture once, not on every read — see Backend/telemetry.py.
+telemetry = TelemetryIndex(settings.hardware_dir)
 
 # Runtime-tunable configuration. Anything a user can change from the settings
 # page lives here, not in Backend/config/settings.py.
@@ -138,11 +169,151 @@ def log_event(db: Session, level: str, component: str, message: str, details: Op
         pass
 
 
+# --------------------------------------------------------------------------
+# singleton rows
+# --------------------------------------------------------------------------
+
+_INSERT_IGNORING_CONFLICTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _ensure_row(db: Session, model, key, **values):
+    """The row of `model` with primary key `key`, inserted from `values` if it
+    is missing. Two requests can both find it missing: the losing insert is
+    ignored, and both carry on with the one row."""
+    row = db.get(model, key)
+    if row is None:
+        insert = _INSERT_IGNORING_CONFLICTS[db.get_bind().dialect.name]
+        db.execute(insert(model).values(**values).on_conflict_do_nothing())
+        row = db.get(model, key)
+    return row
+
+
+# --------------------------------------------------------------------------
+# version counters
+#
+# A process that caches something the database holds needs to know when
+# another process has changed it. Each such thing has a row in
+# version_counters, bumped in the transaction that changes it; a process trusts
+# the value it last read for VERSION_CACHE_TTL seconds, then reads that one row
+# again. A bump made here is forgotten as soon as it commits, so this process
+# never waits out the TTL on its own writes.
+#
+# "data" moves on every write at all — any flush that changes a row — and is
+# what the API's ETags are made of. It is the one row every writer would
+# update, so it is not bumped inside the writer's transaction, where its row
+# lock would queue every other writer behind this one until commit: it is
+# bumped just after the commit, in a transaction of its own. A reader may see
+# the new rows under the old ETag for that moment, never the old rows under a
+# new one. Telemetry is the exception: the MQTT ingestor writes it with Core
+# statements every few seconds, which do not move it, and /overview's
+# validator expires on a period instead.
+# --------------------------------------------------------------------------
+
+DATA_VERSION = "data"
+_versions: dict = {}  # (database url, name) -> (value, read_at)
+_versions_lock = threading.Lock()
+
+
+def _database_key(db: Session) -> str:
+    """Which database a session is on, whichever driver it reached it through:
+    the async routes and the sync ones share this process's caches."""
+    url = db.get_bind().url
+    return str(url.set(drivername=url.get_backend_name()))
+
+
+def read_version(db: Session, name: str) -> int:
+    return db.query(VersionCounter.value).filter(VersionCounter.name == name).scalar() or 0
+
+
+def current_version(db: Session, name: str) -> int:
+    """A counter's value, as this process last read it if that was recent enough."""
+    key = (_database_key(db), name)
+    now = time.monotonic()
+    with _versions_lock:
+        cached = _versions.get(key)
+    if cached and now - cached[1] < settings.version_cache_ttl:
+        return cached[0]
+    value = read_version(db, name)
+    with _versions_lock:
+        _versions[key] = (value, now)
+    return value
+
+
+def bump_version(db: Session, name: str):
+    """Increment a version counter as part of the caller's transaction. Anything
+    that bumps a counter has written data, so "data" moves too, once the
+    transaction commits."""
+    bumped = db.info.setdefault("bumped_versions", set())
+    if name != DATA_VERSION and name not in bumped:
+        row = _ensure_row(db, VersionCounter, name, name=name, value=0)
+        row.value = VersionCounter.value + 1  # in SQL, so concurrent bumps both count
+    bumped.update((name, DATA_VERSION))
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_data_version(db: Session, flush_context, instances):
+    if DATA_VERSION in db.info.get("bumped_versions", ()):
+        return
+    if any(not isinstance(row, VersionCounter) for row in (*db.new, *db.dirty, *db.deleted)):
+        bump_version(db, DATA_VERSION)
+
+
+def _advance_data_version(db: Session):
+    """Bump "data" for a transaction that has just committed, in one of its own."""
+    engine = db.get_bind().engine
+    try:
+        with engine.begin() as conn:
+            bump = update(VersionCounter).where(VersionCounter.name == DATA_VERSION)
+            if not conn.execute(bump.values(value=VersionCounter.value + 1)).rowcount:
+                insert = _INSERT_IGNORING_CONFLICTS[engine.dialect.name]
+                conn.execute(insert(VersionCounter).values(name=DATA_VERSION, value=0).on_conflict_do_nothing())
+                conn.execute(bump.values(value=VersionCounter.value + 1))
+    except SQLAlchemyError as e:
+        # The write itself has committed; the ETags catch up with the next one.
+        log.warning("Data version not bumped after a commit: %s", e)
+
+
+@event.listens_for(Session, "after_commit")
+def _forget_bumped_versions(db: Session):
+    bumped = db.info.pop("bumped_versions", ())
+    if not bumped:
+        return
+    if DATA_VERSION in bumped:
+        _advance_data_version(db)
+    url = _database_key(db)
+    with _versions_lock:
+        for name in bumped:
+            _versions.pop((url, name), None)
+    if SETTINGS_VERSION in bumped:
+        db.info.pop("settings", None)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_bumped_versions(db: Session):
+    db.info.pop("bumped_versions", None)
+
+
+def data_etag(db: Session) -> str:
+    """A validator for anything read from this database: it changes when any
+    row does."""
+    return f'"{current_version(db, DATA_VERSION)}"'
+
+
 # --------------------------------------------------------------------------
 # settings
 # --------------------------------------------------------------------------
 
-def get_settings(db: Session) -> dict:
+# Runtime settings are read by nearly every request, often several times, and
+# change only when someone saves the settings page. Each session memoises them
+# in db.info, so a request reads them at most once; each process caches them
+# per database under the "settings" version counter, and re-reads the table
+# only when that counter has moved.
+SETTINGS_VERSION = "settings"
+_settings_cache: dict = {}  # database url -> (version, values)
+_settings_lock = threading.Lock()
+
+
+def _read_settings(db: Session) -> dict:
     stored = {}
     for row in db.query(SystemSetting).all():
         try:
@@ -152,6 +323,33 @@ def get_settings(db: Session) -> dict:
     return {**DEFAULT_SETTINGS, **stored}
 
 
+def get_settings(db: Session) -> dict:
+    memo = db.info.get("settings")
+    if memo is None:
+        memo = db.info["settings"] = _cached_settings(db)
+    return dict(memo)
+
+
+def _cached_settings(db: Session) -> dict:
+    key = _database_key(db)
+    version = current_version(db, SETTINGS_VERSION)
+    with _settings_lock:
+        cached = _settings_cache.get(key)
+    if cached and cached[0] == version:
+        return cached[1]
+    values = _read_settings(db)
+    with _settings_lock:
+        _settings_cache[key] = (version, values)
+    return values
+
+
+def invalidate_settings(db: Session):
+    """Call from any transaction that writes system_settings. Other processes
+    see the bumped version once it commits, and so does this one."""
+    bump_version(db, SETTINGS_VERSION)
+    db.info.pop("settings", None)
+
+
 def update_settings(db: Session, values: dict) -> dict:
     """Persist only known keys; unknown keys are ignored rather than stored."""
     applied, rejected = {}, {}
@@ -174,7 +372,12 @@ def update_settings(db: Session, values: dict) -> dict:
     log_event(db, "INFO", "settings", f"Updated {len(applied)} setting(s)", applied)
     if rejected:
         log_event(db, "WARNING", "settings", f"Rejected {len(rejected)} invalid setting(s)", rejected)
+    invalidate_settings(db)
+    if "tank_refilled_at" in applied:
+        db.flush()
+        _water_ledger(db, _read_settings(db))  # count from the new refill in the same commit
     db.commit()
+    feed.publish("settings")
     return get_settings(db)
 
 
@@ -184,14 +387,27 @@ def reset_settings(db: Session) -> dict:
     # is still synthetic.
     db.query(SystemSetting).filter(SystemSetting.key != "demo_seeded_at").delete()
     log_event(db, "WARNING", "settings", "Settings reset to defaults")
+    invalidate_settings(db)
+    db.flush()
+    _water_ledger(db, _read_settings(db))  # the refill time may have been among them
     db.commit()
+    feed.publish("settings")
     return get_settings(db)
 
 
 # --------------------------------------------------------------------------
 # water tank
+#
+# The level is read on every health check and overview poll and before every
+# spray, so it comes from water_ledger, a running total that each successful
+# wash adds to in its own transaction. cleaning_actions stays the record:
+# reconcile_water_ledger recounts the total from it and reports any drift.
 # --------------------------------------------------------------------------
 
+LEDGER_ID = 1
+LEDGER_TOLERANCE_ML = 0.01  # float sums in a different order, not lost water
+
+
 def _water_used_ml(db: Session, since: Optional[datetime]) -> float:
     q = db.query(func.coalesce(func.sum(CleaningAction.water_volume), 0.0)).filter(
         CleaningAction.success.is_(True)
@@ -201,11 +417,49 @@ def _water_used_ml(db: Session, since: Optional[datetime]) -> float:
     return float(q.scalar() or 0.0)
 
 
-def water_status(db: Session, config: Optional[dict] = None) -> dict:
-    config = config or get_settings(db)
+def _water_ledger(db: Session, config: dict) -> tuple:
+    """The ledger row and whether it had to be counted afresh.
+
+    It is counted from cleaning_actions when it does not exist yet or when it
+    counts from a different refill than the one in settings — the refill time
+    was edited, or the settings were reset. Rows already added to the session
+    are flushed first, so they are in that count.
+    """
     refilled_at = config.get("tank_refilled_at")
     since = datetime.fromisoformat(refilled_at) if refilled_at else None
+    ledger = db.get(WaterLedger, LEDGER_ID)
+    if ledger is not None and ledger.refilled_at == since:
+        return ledger, False
+
+    db.flush()
     used = _water_used_ml(db, since)
+    if ledger is None:
+        ledger = _ensure_row(db, WaterLedger, LEDGER_ID, id=LEDGER_ID, refilled_at=since, used_ml=used)
+    ledger.refilled_at = since
+    ledger.used_ml = used
+    db.flush()
+    return ledger, True
+
+
+def track_water_use(db: Session, action: CleaningAction, config: Optional[dict] = None):
+    """Charge a cleaning action to the tank ledger. Call it after adding the
+    action to the session; a failed wash, or one from before the refill being
+    counted from, draws nothing."""
+    if not action.success or not action.water_volume:
+        return
+    ledger, recounted = _water_ledger(db, config or get_settings(db))
+    if recounted:
+        return  # the recount already included this action
+    if ledger.refilled_at is None or action.timestamp >= ledger.refilled_at:
+        # An increment in SQL, so two concurrent washes cannot both read the
+        # same total and each write back only their own volume.
+        ledger.used_ml = WaterLedger.used_ml + action.water_volume
+        db.flush()
+
+
+def water_status(db: Session, config: Optional[dict] = None) -> dict:
+    config = config or get_settings(db)
+    used = _water_ledger(db, config)[0].used_ml
     capacity = settings.water_tank_capacity_ml
     remaining = max(0.0, capacity - used)
     return {
@@ -220,53 +474,215 @@ def refill_tank(db: Session) -> dict:
     update_settings(db, {"tank_refilled_at": utcnow().isoformat()})
     log_event(db, "INFO", "hardware", "Water tank refilled")
     db.commit()
+    feed.publish("water")
     return water_status(db)
 
 
+def reconcile_water_ledger(db: Session) -> dict:
+    """Recount the ledger from cleaning_actions and correct it if it drifted.
+
+    Drift means water was recorded without going through track_water_use — a
+    row imported or edited by hand. Run it with `python -m Backend.maintenance
+    reconcile-water`; the API also runs it at start-up.
+    """
+    ledger, _ = _water_ledger(db, get_settings(db))
+    ledger_ml = ledger.used_ml
+    actual_ml = _water_used_ml(db, ledger.refilled_at)
+    drift = ledger_ml - actual_ml
+    corrected = abs(drift) > LEDGER_TOLERANCE_ML
+    if corrected:
+        ledger.used_ml = actual_ml
+        log_event(
+            db, "WARNING", "maintenance", f"Water ledger drifted by {drift:+.1f}ml; corrected",
+            {"ledger_ml": round(ledger_ml, 1), "actual_ml": round(actual_ml, 1)},
+        )
+    db.commit()
+    if corrected:
+        feed.publish("water")
+    return {
+        "ledger_ml": round(ledger_ml, 1),
+        "actual_ml": round(actual_ml, 1),
+        "drift_ml": round(drift, 1),
+        "corrected": corrected,
+    }
+
+
 # --------------------------------------------------------------------------
-# hardware telemetry
+# system totals
+#
+# /system/stats, part of every overview, reports how many analyses and washes
+# there have ever been, their average dust and the water they used. Those come
+# from system_totals, running sums that each analysis and each successful wash
+# add to in their own transaction; the average is one sum over another.
+# panel_status (with the rollups retention leaves) and cleaning_actions stay the
+# record: reconcile_system_totals recounts from them and reports any drift.
 # --------------------------------------------------------------------------
 
-def latest_telemetry() -> dict:
-    """Most recent capture from the ESP32 logs in Hardware/."""
-    captures = sorted(Path(settings.hardware_dir).glob("panel_data_*.json"))
-    if not captures:
-        return {"available": False, "readings": []}
-    try:
-        readings = json.loads(captures[-1].read_text())
-    except (OSError, json.JSONDecodeError) as e:
-        return {"available": False, "readings": [], "error": str(e)}
-
-    if not isinstance(readings, list) or not readings:
-        return {"available": False, "readings": []}
-
-    # One capture file holds several sweeps; keep the newest row per panel.
-    latest: dict = {}
-    for row in readings:
-        panel = row.get("panel_id")
-        if panel and row.get("timestamp", "") >= latest.get(panel, {}).get("timestamp", ""):
-            latest[panel] = row
-
-    # Node order, not file order: PANNEL_10 must not sort before PANNEL_2, and both
-    # the console table and the panel lookup read this list positionally.
-    def node_index(row):
-        digits = "".join(c for c in str(row.get("panel_id", "")) if c.isdigit())
-        return int(digits) if digits else 0
-
-    rows = sorted(latest.values(), key=node_index)
-    numeric = lambda key: [r[key] for r in rows if isinstance(r.get(key), (int, float))]
-    temps, humidity, efficiency = numeric("temperature"), numeric("humidity"), numeric("efficiency")
+TOTALS_ID = 1
+TOTALS_TOLERANCE = 0.01  # float sums in a different order, not a lost reading
+
+
+def _count_totals(db: Session) -> dict:
+    raw_count, raw_measured, raw_sum = db.query(
+        func.count(PanelStatus.id), func.count(PanelStatus.dust_level), func.sum(PanelStatus.dust_level)
+    ).one()
+    rolled_count, rolled_sum = db.query(
+        func.sum(PanelStatusRollup.samples), func.sum(PanelStatusRollup.dust_mean * PanelStatusRollup.samples)
+    ).one()
+    cleanings = db.query(func.count(CleaningAction.id)).filter(CleaningAction.success.is_(True)).scalar()
     return {
-        "available": True,
-        "source": captures[-1].name,
-        "captured_at": max(r.get("timestamp", "") for r in rows),
-        "readings": rows,
-        "avg_temperature": round(sum(temps) / len(temps), 1) if temps else None,
-        "avg_humidity": round(sum(humidity) / len(humidity), 1) if humidity else None,
-        "avg_efficiency": round(sum(efficiency) / len(efficiency), 1) if efficiency else None,
+        "analyses": raw_count + (rolled_count or 0),
+        "dust_samples": raw_measured + (rolled_count or 0),
+        "dust_sum": float((raw_sum or 0.0) + (rolled_sum or 0.0)),
+        "cleanings": cleanings,
+        "water_used_ml": _water_used_ml(db, None),
     }
 
 
+def _system_totals(db: Session) -> tuple:
+    """The totals row and whether it had to be counted afresh, which happens
+    when it does not exist yet. Rows already added to the session are flushed
+    first, so they are in that count."""
+    totals = db.get(SystemTotals, TOTALS_ID)
+    if totals is not None:
+        return totals, False
+    db.flush()
+    return _ensure_row(db, SystemTotals, TOTALS_ID, id=TOTALS_ID, **_count_totals(db)), True
+
+
+def track_analysis_totals(db: Session, row: PanelStatus):
+    """Add a status row to the totals. Call it after adding the row to the session."""
+    totals, recounted = _system_totals(db)
+    if recounted:
+        return  # the count already included this row
+    # Increments in SQL, flushed one at a time: concurrent writers cannot lose
+    # each other's, and a sweep's second cannot overwrite its first.
+    totals.analyses = SystemTotals.analyses + 1
+    if row.dust_level is not None:
+        totals.dust_samples = SystemTotals.dust_samples + 1
+        totals.dust_sum = SystemTotals.dust_sum + row.dust_level
+    db.flush()
+
+
+def track_wash_totals(db: Session, action: CleaningAction):
+    """Add a cleaning action to the totals; a failed one counts for nothing."""
+    if not action.success:
+        return
+    totals, recounted = _system_totals(db)
+    if recounted:
+        return
+    totals.cleanings = SystemTotals.cleanings + 1
+    totals.water_used_ml = SystemTotals.water_used_ml + (action.water_volume or 0.0)
+    db.flush()
+
+
+def ensure_system_totals(db: Session) -> bool:
+    """Count system_totals for a database that predates it, so that no read has
+    to. Returns whether it had to."""
+    _, recounted = _system_totals(db)
+    if recounted:
+        db.commit()
+    return recounted
+
+
+def reconcile_system_totals(db: Session) -> dict:
+    """Recount system_totals from the history and correct it if it drifted.
+
+    Drift means history was written or removed without going through this
+    module — an import, or rows deleted by hand; retention keeps the totals
+    whole. Run it with `python -m Backend.maintenance reconcile-stats`.
+    """
+    totals, _ = _system_totals(db)
+    actual = _count_totals(db)
+    drift = {name: getattr(totals, name) - value for name, value in actual.items()}
+    drifted = {name: round(d, 4) for name, d in drift.items() if abs(d) > TOTALS_TOLERANCE}
+    if drifted:
+        for name, value in actual.items():
+            setattr(totals, name, value)
+        log_event(db, "WARNING", "maintenance", "System totals drifted; corrected", drifted)
+    db.commit()
+    if drifted:
+        feed.publish("stats")
+    return {"totals": {name: getattr(totals, name) for name in actual}, "drift": drifted, "corrected": bool(drifted)}
+
+
+# --------------------------------------------------------------------------
+# hardware telemetry
+# --------------------------------------------------------------------------
+
+def latest_telemetry(db: Optional[Session] = None) -> dict:
+    """Each sensor node's newest reading: from telemetry_latest, which the MQTT
+    ingestor (Backend/mqtt/ingest.py) keeps, or — where it has never run, or has
+    received nothing for MQTT_TELEMETRY_STALE_MINUTES — from the ESP32 captures
+    in Hardware/."""
+    if db is not None:
+        rows = db.query(TelemetryLatest).all()
+        stale_minutes = settings.mqtt_telemetry_stale_minutes
+        if rows and not (
+            stale_minutes and max(row.received_at for row in rows) < utcnow() - timedelta(minutes=stale_minutes)
+        ):
+            return summarise({row.node_id: row.to_dict() for row in rows}, "mqtt")
+    return telemetry.latest()
+
+
+# --------------------------------------------------------------------------
+# spray commands
+#
+# With MQTT_COMMANDS on, a wash is also sent to the nozzle that does it. A bulk
+# wash sends its commands as one batch, paced per node and pipelined — see
+# Backend/mqtt/dispatch.py — after its washes are recorded; the broker's acks
+# and their latency come back with the result and in the log.
+# --------------------------------------------------------------------------
+
+_dispatcher: Optional[dispatch.CommandDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def command_dispatcher() -> Optional[dispatch.CommandDispatcher]:
+    """This process's dispatcher, connected on first use; None with
+    MQTT_COMMANDS off. Raises ValueError where the command topic cannot tell
+    the site's nodes apart (dispatch.check_addressing)."""
+    global _dispatcher
+    if not settings.mqtt_commands:
+        return None
+    dispatch.check_addressing(len(settings.panel_ids))
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = dispatch.connect()
+    return _dispatcher
+
+
+def send_spray_commands(db: Session, washes: list) -> Optional[dict]:
+    """Publish the commands for `washes`, spray_panel results; None when there
+    is nothing to send or nowhere to send it."""
+    if not washes:
+        return None
+    try:
+        dispatcher = command_dispatcher()
+    except (ImportError, OSError, ValueError) as e:
+        log_event(db, "ERROR", "spray_dispatch", f"Spray commands not sent: {e}")
+        db.commit()
+        return {"error": f"Spray commands not sent: {e}"}
+    if dispatcher is None:
+        return None
+
+    report = dispatcher.dispatch([
+        dispatch.spray_command(
+            wash["panel_id"], settings.panel_ids.index(wash["panel_id"]),
+            wash["duration_seconds"], wash["water_used_ml"],
+        )
+        for wash in washes
+    ])
+    log_event(
+        db, "INFO" if report["acked"] == report["commands"] else "WARNING", "spray_dispatch",
+        f"{report['acked']} of {report['commands']} spray command(s) acknowledged "
+        f"in {report['elapsed_ms']:.0f}ms (p95 {report['latency_ms']['p95']}ms)",
+        {key: value for key, value in report.items() if key != "results"},
+    )
+    db.commit()
+    return report
+
+
 # --------------------------------------------------------------------------
 # health & stats
 # --------------------------------------------------------------------------
@@ -292,7 +708,7 @@ def _format_uptime(seconds: float) -> str:
 def health(db: Session) -> dict:
     config = get_settings(db)
     water = water_status(db, config)
-    telemetry = latest_telemetry()
+    telemetry = latest_telemetry(db)
     camera = _camera_status()
 
     degraded = camera != "online" or water["level_percent"] < 10
@@ -311,23 +727,30 @@ def health(db: Session) -> dict:
 
 
 def system_stats(db: Session) -> dict:
-    total_cleanings = db.query(CleaningAction).filter(CleaningAction.success.is_(True)).count()
-    total_analyses = db.query(PanelStatus).count()
-    avg_dust = db.query(func.avg(PanelStatus.dust_level)).scalar()
-    water_used = _water_used_ml(db, None)
-    last_analysis = db.query(func.max(PanelStatus.timestamp)).scalar()
+    """Constant-time: running totals (see "system totals" above) and the newest
+    of one row per panel, however many years of history there are."""
+    totals, _ = _system_totals(db)
+    last_analysis = db.query(func.max(PanelLatestState.last_analysed)).scalar()
 
     return {
         "total_panels": len(settings.panel_ids),
-        "total_cleanings": total_cleanings,
-        "total_analyses": total_analyses,
+        "total_cleanings": totals.cleanings,
+        "total_analyses": totals.analyses,
         "system_uptime": _format_uptime(time.time() - PROCESS_STARTED_AT),
-        "water_used_total": round(water_used, 1),
-        "avg_dust_level": round(float(avg_dust), 4) if avg_dust is not None else 0.0,
+        "water_used_total": round(totals.water_used_ml, 1),
+        "avg_dust_level": round(totals.dust_sum / totals.dust_samples, 4) if totals.dust_samples else 0.0,
         "last_analysis": last_analysis.isoformat() if last_analysis else None,
     }
 
 
+def analysis_cache_stats() -> dict:
+    """Hit/miss counters for the classifier's frame cache. Polling re-analyses
+    unchanged frames, so a low hit rate here is work being done twice."""
+    if classifier.cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **classifier.cache.stats()}
+
+
 def system_logs(db: Session, limit: int = 50) -> list:
     # The API takes this from a query string, so it is bounded here rather than
     # trusting a caller to ask for a sane number of rows.
@@ -351,12 +774,70 @@ def analyze_panel(db: Session, panel_id: str) -> dict:
         return invalid
 
     config = get_settings(db)
+    decision_data = _record_analysis(
+        db, panel_id, classifier.classify_dust_level(_panel_image(panel_id), rendered=False), config
+    )
+    db.commit()
+    feed.publish("analysis")
+    if "error" not in decision_data:
+        _write_latest_decision(decision_data)
+    return with_prose(_auto_clean(db, decision_data, config))
+
+
+def analyze_panels(db: Session, panel_ids: list) -> dict:
+    """analyze_panel for many panels, with the frames measured in one batch.
+
+    With ANALYSIS_WORKERS above one the frames are classified across that many
+    processes; either way this process writes every status, decision and log row
+    in a single transaction, and only then lets auto-clean act on the decisions.
+    Returns each panel's result keyed by id, errors included, its insights and
+    reasoning still template refs (see with_prose).
+    """
+    results = {panel_id: unknown_panel(panel_id) for panel_id in panel_ids}
+    valid = [panel_id for panel_id, invalid in results.items() if invalid is None]
+    if not valid:
+        return results
+
+    config = get_settings(db)
+    classified = classifier.classify_many(
+        [_panel_image(panel_id) for panel_id in valid], workers=settings.analysis_workers, rendered=False
+    )
+    for panel_id, result in zip(valid, classified):
+        results[panel_id] = _record_analysis(db, panel_id, result, config)
+    db.commit()
+    feed.publish("analysis")
+
+    recorded = [results[panel_id] for panel_id in valid if "error" not in results[panel_id]]
+    if recorded:
+        _write_latest_decision(recorded[-1])
+    for panel_id in valid:
+        results[panel_id] = _auto_clean(db, results[panel_id], config, send_command=False)
+
+    # The sweep's washes go out as one paced batch, and their decisions are
+    # updated together once it has been sent.
+    cleaned = [results[panel_id] for panel_id in valid if "auto_clean" in results[panel_id]]
+    if cleaned:
+        washes = [decision_data["auto_clean"] for decision_data in cleaned
+                  if "error" not in decision_data["auto_clean"]]
+        sent = send_spray_commands(db, washes)
+        if sent is not None:
+            for i, wash in enumerate(washes):
+                wash["dispatch"] = _own_dispatch(sent, i)
+        _store_auto_clean(db, cleaned)
+    return results
+
+
+def _record_analysis(db: Session, panel_id: str, result: dict, config: dict) -> dict:
+    """Stage one classifier result as a status row, a decision and a log entry.
+
+    Adds to the session without committing, so a sweep can write every panel in
+    one transaction. `result` is classified with rendered=False, so the row keeps
+    its insights and reasoning as template refs; with_prose writes them on read.
+    """
     image_path = _panel_image(panel_id)
 
-    result = classifier.classify_dust_level(image_path)
     if "error" in result:
         log_event(db, "ERROR", "image_classifier", f"Analysis failed for {panel_id}", result)
-        db.commit()
         return {"error": f"Image classification failed: {result['error']}", "panel_id": panel_id}
 
     dust_percent = result["dust_level"] * 100
@@ -370,19 +851,23 @@ def analyze_panel(db: Session, panel_id: str) -> dict:
         decision, action = "no_action", "✅ Panel is clean - No action needed"
         spray_duration = 0
 
-    db.add(
-        PanelStatus(
-            panel_id=panel_id,
-            dust_level=result["dust_level"],
-            classification_confidence=result["confidence"],
-            is_dirty=dust_percent > config["schedule_threshold"],
-            needs_cleaning=dust_percent > config["dust_threshold"],
-            image_path=str(image_path),
-        )
+    status_row = PanelStatus(
+        panel_id=panel_id,
+        timestamp=utcnow(),
+        dust_level=result["dust_level"],
+        classification_confidence=result["confidence"],
+        is_dirty=dust_percent > config["schedule_threshold"],
+        needs_cleaning=dust_percent > config["dust_threshold"],
+        image_path=str(image_path),
     )
+    db.add(status_row)
+    track_panel_status(db, status_row)
+    track_analysis_totals(db, status_row)
 
     decision_data = {
-        "decision_id": f"decision_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}",
+        # The panel id keeps ids unique within a sweep, whose decisions share one
+        # transaction and can share a clock tick.
+        "decision_id": f"decision_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}_{panel_id}",
         "panel_id": panel_id,
         "dust_level": result["dust_level"],
         "status": result["status"],
@@ -417,20 +902,67 @@ def analyze_panel(db: Session, panel_id: str) -> dict:
         f"{panel_id}: {dust_percent:.1f}% dust ({result['status']}) → {decision}",
         {"dust_level": result["dust_level"], "confidence": result["confidence"]},
     )
-    _write_latest_decision(decision_data)
-    db.commit()
+    return decision_data
+
+
+def with_prose(decision_data: dict) -> dict:
+    """A decision with its insights and reasoning written out.
+
+    Decision rows and the latest_decision.json mirror store those as the
+    classifier's template refs — a template id and the numbers it fills in —
+    so the text is only formatted for a decision someone reads. Rows written
+    before that already hold the text, which comes back as it is.
+    """
+    analysis = decision_data.get("analysis")
+    if not analysis:
+        return decision_data
+    return {
+        **decision_data,
+        "analysis": {
+            **analysis,
+            "insights": render_prose(analysis.get("insights")),
+            "reasoning": render_prose(analysis.get("reasoning")),
+        },
+    }
 
-    # Automated execution: the auto_clean setting is what makes the decision act.
-    if decision == "spray_now" and config["auto_clean"] and config["system_mode"] == "active":
-        decision_data["auto_clean"] = spray_panel(db, panel_id)
+
+def _auto_clean(db: Session, decision_data: dict, config: dict, send_command: bool = True) -> dict:
+    """Automated execution: the auto_clean setting is what makes a recorded
+    decision act. Runs after the decision is committed.
+
+    With send_command False the wash is only recorded; the caller sends its
+    command and stores the decision (_store_auto_clean), as a sweep does for
+    all of its washes at once.
+    """
+    if "error" in decision_data or decision_data["decision"] != "spray_now":
+        return decision_data
+    if config["auto_clean"] and config["system_mode"] == "active":
+        panel_id = decision_data["panel_id"]
+        decision_data["auto_clean"] = spray_panel(db, panel_id, send_command=send_command)
+        if send_command:
+            _store_auto_clean(db, [decision_data])
+
+    return decision_data
+
+
+def _store_auto_clean(db: Session, decisions: list):
+    """Write what auto-clean did into each decision's row, in one commit."""
+    for decision_data in decisions:
         row = db.query(SystemDecision).filter_by(decision_id=decision_data["decision_id"]).first()
         if row:
             row.execution_status = "failed" if "error" in decision_data["auto_clean"] else "executed"
             row.decision_data = json.dumps(decision_data)
-            db.commit()
-        _write_latest_decision(decision_data)
+    db.commit()
+    feed.publish("decision")
+    _write_latest_decision(decisions[-1])
 
-    return decision_data
+
+def _own_dispatch(report: dict, index: int) -> dict:
+    """One wash's share of a batch report: the batch summary, and of the
+    per-command results only its own."""
+    if "results" not in report:
+        return report  # the batch was never sent: every wash carries the error
+    return {**report, "results": [report["results"][index]]}
 
 
 def _write_latest_decision(decision_data: dict):
@@ -445,21 +977,31 @@ def _write_latest_decision(decision_data: dict):
         pass
 
 
+NO_DECISION = {"message": "No decisions made yet. Try /analyze first!"}
+
+
 def latest_decision(db: Session) -> dict:
+    return _stored_latest_decision(db) or _mirrored_latest_decision() or dict(NO_DECISION)
+
+
+def _stored_latest_decision(db: Session) -> Optional[dict]:
     row = db.query(SystemDecision).order_by(SystemDecision.timestamp.desc()).first()
-    if row:
-        return json.loads(row.decision_data)
+    return with_prose(json.loads(row.decision_data)) if row else None
+
 
+def _mirrored_latest_decision() -> Optional[dict]:
+    """The decision _write_latest_decision mirrored to disk, for a database
+    that has none."""
     fallback = settings.decisions_dir / "latest_decision.json"
     if fallback.is_file():
         try:
-            return json.loads(fallback.read_text())
+            return with_prose(json.loads(fallback.read_text()))
         except (OSError, json.JSONDecodeError):
             pass
-    return {"message": "No decisions made yet. Try /analyze first!"}
+    return None
 
 
-def spray_panel(db: Session, panel_id: str) -> dict:
+def spray_panel(db: Session, panel_id: str, send_command: bool = True) -> dict:
     invalid = unknown_panel(panel_id)
     if invalid:
         return invalid
@@ -489,19 +1031,22 @@ def spray_panel(db: Session, panel_id: str) -> dict:
             "panel_id": panel_id,
         }
 
-    db.add(
-        CleaningAction(
-            panel_id=panel_id, action_type="spray", water_volume=volume,
-            duration=duration, success=True,
-        )
+    wash = CleaningAction(
+        panel_id=panel_id, timestamp=utcnow(), action_type="spray", water_volume=volume,
+        duration=duration, success=True,
     )
+    db.add(wash)
+    track_panel_wash(db, wash)
+    track_water_use(db, wash, config)
+    track_wash_totals(db, wash)
     log_event(
         db, "INFO", "spray_controller",
         f"{panel_id}: sprayed {volume:.0f}ml over {duration:.0f}s", {"pressure": config["water_pressure"]},
     )
     db.commit()
+    feed.publish("wash")
 
-    return {
+    result = {
         "panel_id": panel_id,
         "action": "🚿 spray_completed",
         "duration_seconds": duration,
@@ -511,28 +1056,139 @@ def spray_panel(db: Session, panel_id: str) -> dict:
         "water_remaining_ml": round(water["remaining_ml"] - volume, 1),
         "next_check": "in 24 hours",
     }
+    sent = send_spray_commands(db, [result]) if send_command else None
+    if sent is not None:
+        result["dispatch"] = sent
+    return result
+
+
+# --------------------------------------------------------------------------
+# panel state
+#
+# panel_latest_state holds each panel's newest reading and last wash, updated
+# by every write that changes them, so reading the panel list costs the same
+# whether the site has a week of history or ten years. The history tables stay
+# the record: rebuild_panel_state derives the whole table from them again.
+# --------------------------------------------------------------------------
 
+def _panel_state(db: Session, panel_id: str) -> PanelLatestState:
+    return _ensure_row(db, PanelLatestState, panel_id, panel_id=panel_id)
 
-def list_panels(db: Session) -> dict:
+
+def _copy_status(state: PanelLatestState, row: PanelStatus):
+    state.last_analysed = row.timestamp
+    state.dust_level = row.dust_level
+    state.classification_confidence = row.classification_confidence
+    state.is_dirty = row.is_dirty
+    state.needs_cleaning = row.needs_cleaning
+
+
+def track_panel_status(db: Session, row: PanelStatus):
+    """Fold a status row being written into panel_latest_state. An older row —
+    a back-fill — leaves a newer reading in place. Give the row its timestamp
+    before calling: the column default is only applied at flush."""
+    state = _panel_state(db, row.panel_id)
+    if state.last_analysed is None or row.timestamp >= state.last_analysed:
+        _copy_status(state, row)
+
+
+def track_panel_wash(db: Session, action: CleaningAction):
+    """Fold a cleaning action being written into panel_latest_state. Only a
+    successful wash counts as the panel's last clean."""
+    if not action.success:
+        return
+    state = _panel_state(db, action.panel_id)
+    if state.last_cleaned is None or action.timestamp > state.last_cleaned:
+        state.last_cleaned = action.timestamp
+
+
+def _latest_from_history(db: Session) -> tuple:
+    """Newest status row and last successful wash for every panel in the history.
+
+    Two statements however many panels there are: a window over panel_status
+    picks each panel's newest row, and one grouped aggregate finds each panel's
+    last wash.
+    """
+    ranked = db.query(
+        PanelStatus.id,
+        func.row_number().over(
+            partition_by=PanelStatus.panel_id,
+            order_by=(PanelStatus.timestamp.desc(), PanelStatus.id.desc()),
+        ).label("rank"),
+    ).subquery()
+    latest = (
+        db.query(PanelStatus)
+        .join(ranked, PanelStatus.id == ranked.c.id)
+        .filter(ranked.c.rank == 1)
+        .all()
+    )
+    washed = (
+        db.query(CleaningAction.panel_id, func.max(CleaningAction.timestamp))
+        .filter(CleaningAction.success.is_(True))
+        .group_by(CleaningAction.panel_id)
+        .all()
+    )
+    return {row.panel_id: row for row in latest}, dict(washed)
+
+
+def rebuild_panel_state(db: Session) -> dict:
+    """Reconstruct panel_latest_state from panel_status and cleaning_actions.
+
+    Run after an import, a migration or anything else that writes history
+    without going through this module: `python -m Backend.maintenance
+    rebuild-panel-state`.
+    """
+    statuses, washes = _latest_from_history(db)
+    db.query(PanelLatestState).delete()
+    for panel_id in sorted(set(statuses) | set(washes)):
+        state = PanelLatestState(panel_id=panel_id, last_cleaned=washes.get(panel_id))
+        if panel_id in statuses:
+            _copy_status(state, statuses[panel_id])
+        db.add(state)
+
+    rebuilt = len(set(statuses) | set(washes))
+    log_event(db, "INFO", "maintenance", f"Rebuilt latest state for {rebuilt} panel(s)")
+    db.commit()
+    feed.publish("panels")
+    return {"panels": rebuilt}
+
+
+def ensure_panel_state(db: Session) -> bool:
+    """Build panel_latest_state for a database that has history but predates the
+    table. Returns whether it had to."""
+    if db.query(PanelLatestState.panel_id).first() is not None:
+        return False
+    if db.query(PanelStatus.id).first() is None and db.query(CleaningAction.id).first() is None:
+        return False
+    rebuild_panel_state(db)
+    return True
+
+
+def _images_available(panel_ids: list) -> dict:
+    """Which panels have a frame on disk, by id."""
+    return {panel_id: _panel_image(panel_id).is_file() for panel_id in panel_ids}
+
+
+def _panel_summaries(db: Session, panel_ids: list, images: Optional[dict] = None) -> list:
+    """Each panel's summary; `images` is _images_available for them, looked
+    up here when not given."""
+    if images is None:
+        images = _images_available(panel_ids)
+    states = {
+        state.panel_id: state
+        for state in db.query(PanelLatestState).filter(PanelLatestState.panel_id.in_(panel_ids))
+    }
     panels = []
-    for panel_id in settings.panel_ids:
-        status_row = (
-            db.query(PanelStatus)
-            .filter(PanelStatus.panel_id == panel_id)
-            .order_by(PanelStatus.timestamp.desc())
-            .first()
-        )
-        cleaned_at = (
-            db.query(func.max(CleaningAction.timestamp))
-            .filter(CleaningAction.panel_id == panel_id, CleaningAction.success.is_(True))
-            .scalar()
-        )
+    for panel_id in panel_ids:
+        state = states.get(panel_id)
+        analysed = state is not None and state.last_analysed is not None
+        cleaned_at = state.last_cleaned if state is not None else None
 
-        if status_row is None:
+        if not analysed:
             status = "unknown"
-        elif status_row.needs_cleaning:
+        elif state.needs_cleaning:
             status = "needs_cleaning"
-        elif status_row.is_dirty:
+        elif state.is_dirty:
             status = "moderate_dust"
         else:
             status = "clean"
@@ -542,13 +1198,17 @@ def list_panels(db: Session) -> dict:
                 "id": panel_id,
                 "status": status,
                 "last_cleaned": cleaned_at.strftime("%Y-%m-%d") if cleaned_at else "Never",
-                "dust_level": status_row.dust_level if status_row else None,
-                "confidence": status_row.classification_confidence if status_row else None,
-                "last_analysed": status_row.timestamp.isoformat() if status_row else None,
-                "image_available": _panel_image(panel_id).is_file(),
+                "dust_level": state.dust_level if analysed else None,
+                "confidence": state.classification_confidence if analysed else None,
+                "last_analysed": state.last_analysed.isoformat() if analysed else None,
+                "image_available": images[panel_id],
             }
         )
+    return panels
 
+
+def list_panels(db: Session, images: Optional[dict] = None) -> dict:
+    panels = _panel_summaries(db, settings.panel_ids, images)
     return {"total_panels": len(panels), "panels": panels}
 
 
@@ -620,17 +1280,40 @@ def overview(db: Session) -> dict:
     }
 
 
+def fleet_forecast(db: Session) -> dict:
+    """The next 48 hours' generation for every panel at its current dust level,
+    hour 0 being the current UTC hour (`starts_at`). One array operation for the
+    whole site, however many panels it has; a panel never analysed is forecast
+    clean."""
+    dust = dict(db.query(PanelLatestState.panel_id, PanelLatestState.dust_level))
+    levels = [dust.get(panel_id) for panel_id in settings.panel_ids]
+    start = utcnow().replace(minute=0, second=0, microsecond=0)
+    forecast = classifier.forecast_fleet([level or 0.0 for level in levels], start)
+    clean = classifier.forecast_fleet([0.0], start)[0]
+    return {
+        "location": classifier.location,
+        "starts_at": start.isoformat(),
+        "hours": forecast.shape[1],
+        "panels": [
+            {"panel_id": panel_id, "dust_level": level, "forecast_kwh": row}
+            for panel_id, level, row in zip(settings.panel_ids, levels, forecast.tolist())
+        ],
+        "site_kwh": forecast.sum(axis=0).round(3).tolist(),
+        "dust_loss_kwh": round(float(clean.sum() * len(levels) - forecast.sum()), 2),
+    }
+
+
 def panel_detail(db: Session, panel_id: str) -> dict:
     """One panel in full: its current state, its history and its sensor node."""
     invalid = unknown_panel(panel_id)
     if invalid:
         return invalid
 
-    summary = next((p for p in list_panels(db)["panels"] if p["id"] == panel_id), None)
+    summary = _panel_summaries(db, [panel_id])[0]
 
     # Hardware logs index panels as PANNEL_0..N, in the same order as panel_ids.
     hardware_id = f"PANNEL_{settings.panel_ids.index(panel_id)}"
-    readings = latest_telemetry().get("readings", [])
+    readings = latest_telemetry(db).get("readings", [])
     reading = next((r for r in readings if r.get("panel_id") == hardware_id), None)
 
     return {"panel": summary, "telemetry": reading, **panel_history(db, panel_id)}
@@ -639,12 +1322,11 @@ def panel_detail(db: Session, panel_id: str) -> dict:
 def analyze_all(db: Session) -> dict:
     """Analyse every configured panel, reporting failures rather than hiding them."""
     results, failures = [], []
-    for panel in list_panels(db)["panels"]:
-        result = analyze_panel(db, panel["id"])
+    for panel_id, result in analyze_panels(db, settings.panel_ids).items():
         if "error" in result:
-            failures.append({"panel_id": panel["id"], "error": result["error"]})
+            failures.append({"panel_id": panel_id, "error": result["error"]})
         else:
-            results.append(result)
+            results.append(with_prose(result))
 
     return {
         "results": results,
@@ -655,9 +1337,12 @@ def analyze_all(db: Session) -> dict:
     }
 
 
-def resolve_spray_scope(db: Session, scope: str) -> list:
-    """Which panels a bulk wash touches. 'dirty' is the only one that filters."""
-    rows = list_panels(db)["panels"]
+def resolve_spray_scope(db: Session, scope: str, panels: Optional[dict] = None) -> list:
+    """Which panels a bulk wash touches. 'dirty' is the only one that filters.
+
+    Pass the list_panels result when the caller already has it.
+    """
+    rows = (panels or list_panels(db))["panels"]
     if scope == "all":
         return [panel["id"] for panel in rows]
     if scope == "dirty":
@@ -668,8 +1353,9 @@ def resolve_spray_scope(db: Session, scope: str) -> list:
 def spray_many(db: Session, scope: str = "dirty") -> dict:
     """Wash a set of panels. Every panel is sprayed through the same guarded path
     as a single wash, so a paused system or an empty tank still refuses each one."""
-    total_panels = len(list_panels(db)["panels"])
-    targets = resolve_spray_scope(db, scope)
+    panels = list_panels(db)
+    total_panels = len(panels["panels"])
+    targets = resolve_spray_scope(db, scope, panels)
 
     if not targets:
         return {
@@ -680,14 +1366,14 @@ def spray_many(db: Session, scope: str = "dirty") -> dict:
 
     results, failures, water = [], [], 0.0
     for panel_id in targets:
-        result = spray_panel(db, panel_id)
+        result = spray_panel(db, panel_id, send_command=False)  # sent below, as one batch
         if "error" in result:
             failures.append({"panel_id": panel_id, "error": result["error"]})
         else:
             results.append(result)
             water += result.get("water_used_ml", 0)
 
-    return {
+    outcome = {
         "results": results,
         "failures": failures,
         "total_panels": total_panels,
@@ -696,3 +1382,47 @@ def spray_many(db: Session, scope: str = "dirty") -> dict:
         "water_used_ml": round(water, 1),
         "message": f"Cleaned {len(results)} of {len(targets)} panel(s) using {water:.0f}ml.",
     }
+    sent = send_spray_commands(db, results)
+    if sent is not None:
+        outcome["dispatch"] = sent
+    return outcome
+
+
+# --------------------------------------------------------------------------
+# async reads
+#
+# The read routes the console polls run on the event loop, so a crowd of
+# pollers cannot take every worker thread from /analyze. Each is the function
+# above run through AsyncSession.run_sync: its queries await the async driver,
+# and the rule itself still has one implementation. run_sync only adapts the
+# session, so what those functions read from disk — the panel frames, the
+# mirrored decision — is read here, in a worker thread.
+# --------------------------------------------------------------------------
+
+async def data_etag_async(db: AsyncSession) -> str:
+    return await db.run_sync(data_etag)
+
+
+async def get_settings_async(db: AsyncSession) -> dict:
+    return await db.run_sync(get_settings)
+
+
+async def system_logs_async(db: AsyncSession, limit: int = 50) -> list:
+    return await db.run_sync(system_logs, limit)
+
+
+async def latest_decision_async(db: AsyncSession) -> dict:
+    return (
+        await db.run_sync(_stored_latest_decision)
+        or await asyncio.to_thread(_mirrored_latest_decision)
+        or dict(NO_DECISION)
+    )
+
+
+async def system_stats_async(db: AsyncSession) -> dict:
+    return await db.run_sync(system_stats)
+
+
+async def list_panels_async(db: AsyncSession) -> dict:
+    images = await asyncio.to_thread(_images_available, settings.panel_ids)
+    return await db.run_sync(list_panels, images)
@@ -0,0 +1,166 @@
+"""Hardware telemetry, parsed once per capture.
+
+The ESP32 gateway (Hardware/MQTT) drops a capture — a JSON list of readings,
+one per sensor node per sweep — into Hardware/ as panel_data_<stamp>.json.
+latest_telemetry used to glob that directory, sort every name and parse the
+newest file on every health check, overview and panel detail. Here an index
+holds each node's newest reading, and the summary built from them, in memory:
+
+- a read costs one stat of the directory, whose mtime moves when a file is
+  added, renamed or removed;
+- only then is the directory listed, and only files it has not read are parsed;
+- a file that did not parse, usually one caught mid-write, is retried once its
+  size or mtime changes.
+
+At start-up only the newest capture is read, as before; older ones hold nothing
+newer. After that every capture is merged by timestamp, so a node missing from
+the latest sweep keeps its last reading, with that reading's own timestamp.
+Readings that arrive some other way go through `ingest`.
+"""
+
+import json
+import os
+import threading
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Optional
+
+CAPTURE_PATTERN = "panel_data_*.json"
+
+# Some filesystems keep mtimes to the second, so a second file can land in the
+# same tick as the first without moving the directory's mtime. A directory that
+# changed this recently is listed again on the next read.
+SETTLE_NS = 1_000_000_000
+
+
+def node_index(reading: dict) -> int:
+    """Node order, not file order: PANNEL_10 must not sort before PANNEL_2, and
+    both the console table and the panel lookup read the list positionally."""
+    digits = "".join(c for c in str(reading.get("panel_id", "")) if c.isdigit())
+    return int(digits) if digits else 0
+
+
+def summarise(latest: dict, source: Optional[str]) -> dict:
+    """The latest_telemetry payload for {node id: newest reading}."""
+    if not latest:
+        return {"available": False, "readings": []}
+    rows = sorted(latest.values(), key=node_index)
+    numeric = lambda key: [r[key] for r in rows if isinstance(r.get(key), (int, float))]
+    temps, humidity, efficiency = numeric("temperature"), numeric("humidity"), numeric("efficiency")
+    return {
+        "available": True,
+        "source": source,
+        "captured_at": max(str(r.get("timestamp", "")) for r in rows),
+        "readings": rows,
+        "avg_temperature": round(sum(temps) / len(temps), 1) if temps else None,
+        "avg_humidity": round(sum(humidity) / len(humidity), 1) if humidity else None,
+        "avg_efficiency": round(sum(efficiency) / len(efficiency), 1) if efficiency else None,
+    }
+
+
+class TelemetryIndex:
+    """Each node's newest reading from the captures in `directory`."""
+
+    def __init__(self, directory: Path, pattern: str = CAPTURE_PATTERN):
+        self.directory = Path(directory)
+        self.pattern = pattern
+        self.files_parsed = 0
+
+        self._lock = threading.Lock()
+        self._directory_mtime: Optional[int] = None
+        self._read: dict = {}  # file name -> (mtime_ns, size) when it parsed
+        self._failed: dict = {}  # file name -> (mtime_ns, size) when it did not
+        self._error: Optional[str] = None
+        self._latest: dict = {}  # node id -> reading
+        self._summary = summarise({}, None)
+
+    def latest(self) -> dict:
+        with self._lock:
+            self._refresh()
+            summary = dict(self._summary)
+            if not summary["available"] and self._error:
+                summary["error"] = self._error
+            return summary
+
+    def ingest(self, readings: list, source: str) -> bool:
+        """Merge readings into the index; returns whether any node's changed."""
+        with self._lock:
+            return self._merge(readings, source)
+
+    def _merge(self, readings: list, source: str) -> bool:
+        changed = False
+        for row in readings:
+            if not isinstance(row, dict) or not row.get("panel_id"):
+                continue
+            node = row["panel_id"]
+            current = self._latest.get(node)
+            if current is None or str(row.get("timestamp", "")) >= str(current.get("timestamp", "")):
+                self._latest[node] = row
+                changed = True
+        if changed:
+            self._summary = summarise(self._latest, source)
+        return changed
+
+    def _refresh(self):
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._directory_mtime or time.time_ns() - mtime < SETTLE_NS:
+            first = self._directory_mtime is None
+            self._directory_mtime = mtime  # before listing: a file added after it moves it again
+            candidates = self._list()
+        elif self._failed:
+            candidates = {name: stamp for name, stamp in map(self._stat, list(self._failed)) if stamp}
+            first = False
+        else:
+            return
+
+        unread = sorted(
+            name for name, stamp in candidates.items()
+            if self._read.get(name) != stamp and self._failed.get(name) != stamp
+        )
+        if first:
+            # Newest first, until one parses; everything older is history.
+            while unread and not self._parse(unread.pop(), candidates):
+                pass
+            self._read.update((name, candidates[name]) for name in unread)
+            return
+        for name in unread:
+            self._parse(name, candidates)
+
+    def _list(self) -> dict:
+        listed = {}
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if fnmatch(entry.name, self.pattern) and entry.is_file():
+                        stat = entry.stat()
+                        listed[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass
+        return listed
+
+    def _stat(self, name: str) -> tuple:
+        try:
+            stat = (self.directory / name).stat()
+        except OSError:
+            self._failed.pop(name, None)  # gone; nothing left to retry
+            return name, None
+        return name, (stat.st_mtime_ns, stat.st_size)
+
+    def _parse(self, name: str, stamps: dict) -> bool:
+        try:
+            readings = json.loads((self.directory / name).read_text())
+            if not isinstance(readings, list):
+                raise ValueError("expected a list of readings")
+        except (OSError, ValueError) as e:  # JSONDecodeError is a ValueError
+            self._failed[name] = stamps[name]
+            self._error = f"{name}: {e}"
+            return False
+        self._failed.pop(name, None)
+        self._read[name] = stamps[name]
+        self.files_parsed += 1
+        self._merge(readings, name)
+        return True
@@ -14,7 +14,11 @@ PubSubClient client(espClient);
 
 const char* mqtt_server = "192.168.4.2";  // laptop IP on ESP32 AP
 const int mqtt_port = 1884; //duplicated_config file
-const char* mqtt_topic_sub = "spray/control";
+// This node's number: panels are assigned MQTT_NOZZLES_PER_NODE to a node, in
+// panel order, and the backend sends node N's commands to spray/control/N.
+// Give every node its own number before flashing it.
+#define NODE_NUMBER "0"
+const char* mqtt_topic_sub = "spray/control/" NODE_NUMBER;
 const char* mqtt_topic_data_heatmap = "spray/heatmap_data";
 
 // Enum for nozzles
@@ -266,7 +270,7 @@ uint32_t getHeatColor(float interval) {
 void reconnect() {
   while (!client.connected()) {
     Serial.print("Attempting MQTT connection...");
-    if (client.connect("ESP32_Nozzle_Controller")) {
+    if (client.connect("ESP32_Nozzle_Controller_" NODE_NUMBER)) {
       Serial.println("connected");
       client.subscribe(mqtt_topic_sub);
       client.subscribe(mqtt_topic_data_heatmap);
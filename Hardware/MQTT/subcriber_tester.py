@@ -5,7 +5,7 @@ import time
 #MQTT INFO
 broker = "broker.hivemq.com"
 port = 1883
-topic = "spray/control"
+topic = "spray/control/0"  # node 0; each node has its own topic
 
 #Creating MQTT Client
 client = mqtt.Client(client_id="laptop_receiver", protocol=mqtt.MQTTv311, transport="tcp")
@@ -0,0 +1,23 @@
+import json
+import sys
+
+import matplotlib.pyplot as plt
+
+# Percentiles by concurrency, from Backend/mqtt/bench_latency.py's report.
+report_path = sys.argv[1] if len(sys.argv) > 1 else "latency-report.json"
+with open(report_path) as f:
+    results = json.load(f)["results"]
+
+for transport, marker in (("mqtt", "o"), ("http", "x")):
+    levels = sorted(results[transport], key=int)
+    for q, style in (("p50_ms", "-"), ("p95_ms", "--"), ("p99_ms", ":")):
+        plt.plot([int(l) for l in levels], [results[transport][l][q] for l in levels], style,
+                 marker=marker, label=f"{transport.upper()} {q[:3]}")
+
+plt.xscale("log", base=2)
+plt.xlabel("Round trips in flight")
+plt.ylabel("Latency (ms)")
+plt.title("Latency percentiles: MQTT vs HTTP")
+plt.legend()
+plt.grid(True)
+plt.show()
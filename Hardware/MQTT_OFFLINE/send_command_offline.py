@@ -5,7 +5,7 @@ import time
 #MQTT Configuration
 broker = "192.168.4.2"
 port = 1884
-topic = "spray/control"
+topic = "spray/control/0"  # node 0; each node has its own topic
 
 #Creating MQTT Client
 client = mqtt.Client(client_id="laptop_command", protocol=mqtt.MQTTv311, transport="tcp")
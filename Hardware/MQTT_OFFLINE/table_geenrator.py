@@ -1,20 +1,24 @@
+import json
+import sys
+
 import pandas as pd
 import matplotlib.pyplot as plt
 
-# Data
-trials = list(range(1, 51))
-mqtt_latency = [30,26,35,24,28,15,12,40,56,36,72,66,39,82,56,13,23,36,49,36,
-                69,10,15,27,51,31,65,39,54,29,11,37,35,41,16,45,90,83,61,43,
-                50,48,44,15,22,34,73,19,81,46]
-http_get = [75,84,62,55,52,38,54,45,90,47,56,58,81,22,91,124,83,46,114,34,
-            52,65,169,41,32,33,74,71,44,35,42,24,52,54,79,20,50,36,47,66,
-            78,56,81,30,22,33,45,61,37,77]
+# Data: measured by Backend/mqtt/bench_latency.py, one round trip in flight.
+report_path = sys.argv[1] if len(sys.argv) > 1 else "latency-report.json"
+with open(report_path) as f:
+    results = json.load(f)["results"]
+
+level = min(results["mqtt"], key=int)
+mqtt_latency = results["mqtt"][level]["samples_ms"]
+http_get = results["http"][level]["samples_ms"]
+trials = min(len(mqtt_latency), len(http_get), 50)  # a table taller than 50 rows is unreadable
 
 # Create DataFrame
 df = pd.DataFrame({
-    'Trial': trials,
-    'MQTT Latency (ms)': mqtt_latency,
-    'HTTP GET Latency (ms)': http_get
+    'Trial': list(range(1, trials + 1)),
+    'MQTT Latency (ms)': mqtt_latency[:trials],
+    'HTTP GET Latency (ms)': http_get[:trials]
 })
 
 # Plot table
@@ -5,11 +5,13 @@ Runs against a throwaway database in a temp directory, so it never touches the
 real one. Run it with `python tests/test_system.py` (or `pytest tests/`).
 """
 
+import functools
 import json
 import os
 import sqlite3
 import sys
 import tempfile
+import unittest
 from datetime import datetime
 from pathlib import Path
 
@@ -30,6 +32,23 @@ from Backend.database.connection import SessionLocal, init_database  # noqa: E40
 # it here rather than inside whichever test happens to sort first.
 init_database()
 
+# The suite runs on SQLite. Point TEST_DATABASE_URL at a scratch PostgreSQL
+# database (postgresql+psycopg://…, psycopg installed) to also run the checks
+# marked requires_postgres; its tables are dropped and recreated. A local
+# server started with initdb + pg_ctl is enough — no container needed.
+POSTGRES_URL = os.getenv("TEST_DATABASE_URL", "")
+
+
+def requires_postgres(test):
+    @functools.wraps(test)
+    def run():
+        if not POSTGRES_URL.startswith("postgresql"):
+            raise unittest.SkipTest("TEST_DATABASE_URL is not a PostgreSQL URL")
+        return test(POSTGRES_URL)
+
+    del run.__wrapped__  # pytest would read `url` off it as a fixture to inject
+    return run
+
 
 def test_sqlite_available():
     assert sqlite3.sqlite_version_info >= (3, 8), sqlite3.sqlite_version
@@ -37,6 +56,27 @@ def test_sqlite_available():
     assert str(settings.db_path).startswith(TMP_DIR), "test must not use the real database"
 
 
+def test_the_database_is_opened_with_its_profile():
+    """The engine used SQLite's defaults, so a wash locked every console read
+    out and a long read could make a wash fail."""
+    from sqlalchemy import text
+
+    from Backend.database.connection import engine, make_engine
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+    assert engine.pool.size() >= 10
+
+    try:
+        make_engine(settings.db_path, "turbo")
+    except ValueError as e:
+        assert "baseline" in str(e)
+    else:
+        raise AssertionError("an unknown profile must be refused")
+
+
 def test_classifier_reads_the_image_fixtures():
     from Backend.agents.image_classifier import ImageClassifierAgent
 
@@ -93,6 +133,135 @@ def test_the_same_frame_always_reads_the_same():
     assert len({tuple(r["insights"]) for r in readings}) == 1
 
 
+def test_a_batched_sweep_reads_exactly_what_single_frames_read():
+    """analyze_all measures every frame in one batch. A panel must not read
+    differently depending on which path measured it."""
+    import numpy as np
+
+    from Agents.crew import ProductionImageProcessor
+    from Backend.agents.image_classifier import ImageClassifierAgent
+
+    images = [settings.image_dir / f"{p}_test.jpg" for p in settings.panel_ids]
+    odd_size = np.random.default_rng(7).integers(0, 255, (120, 160, 3), dtype=np.uint8)
+    rows = ProductionImageProcessor.process_batch([str(i) for i in images] + [odd_size])
+    for frame, row in zip([str(i) for i in images] + [odd_size], rows):
+        single = ProductionImageProcessor.process_image(frame)
+        assert (row["dust_level"], row["confidence"], row["risk_category"]) == (
+            single.dust_level, single.confidence, single.risk_category.value), (row, single)
+
+    agent = ImageClassifierAgent()
+    batch = agent.classify_many(images + [settings.image_dir / "does_not_exist.jpg"])
+    assert "error" in batch[-1], batch[-1]
+    for image, result in zip(images, batch):
+        single = agent.classify_dust_level(image)
+        for key in ("dust_level", "confidence", "status", "insights", "recommendation"):
+            assert result[key] == single[key], (image.name, key, result[key], single[key])
+
+
+def test_a_pooled_sweep_matches_an_in_process_one():
+    """ANALYSIS_WORKERS fans classification out to processes. The readings, and
+    the per-panel failure for a missing frame, must not change with it."""
+    from Backend.agents.image_classifier import ImageClassifierAgent
+
+    agent = ImageClassifierAgent()
+    images = [settings.image_dir / f"{p}_test.jpg" for p in settings.panel_ids]
+    images.insert(1, settings.image_dir / "does_not_exist.jpg")
+
+    serial = agent.classify_many(images)
+    pooled = agent.classify_many(images, workers=2)
+    assert [r.get("dust_level") for r in pooled] == [r.get("dust_level") for r in serial]
+    assert "error" in pooled[1] and "error" not in pooled[0], pooled[:2]
+
+    db = SessionLocal()
+    workers = settings.analysis_workers
+    try:
+        services.reset_settings(db)
+        services.update_settings(db, {"auto_clean": False})
+        settings.analysis_workers = 2
+        swept = services.analyze_all(db)
+        assert swept["analysed"] == len(settings.panel_ids) and not swept["failures"], swept
+        assert [r["dust_level"] for r in swept["results"]] == [
+            r["dust_level"] for r in serial if "error" not in r]
+    finally:
+        settings.analysis_workers = workers
+        services.reset_settings(db)
+        db.close()
+
+
+def test_an_unchanged_frame_is_served_from_the_cache():
+    """Polling re-analysed fixtures that had not changed. A cached result must
+    be the reading itself, found without decoding the frame again."""
+    import shutil
+
+    from Agents.crew import ProductionImageProcessor
+    from Backend.agents.analysis_cache import AnalysisCache
+    from Backend.agents.image_classifier import ImageClassifierAgent
+
+    frames = Path(tempfile.mkdtemp(prefix="solarsage-frames-"))
+    images = [Path(shutil.copy(settings.image_dir / f"{p}_test.jpg", frames)) for p in settings.panel_ids[:3]]
+    cache_dir = Path(TMP_DIR) / "cache-test"
+
+    agent = ImageClassifierAgent(cache=AnalysisCache(cache_dir, max_entries=2, max_disk_entries=8))
+    first = [agent.classify_dust_level(i) for i in images]
+    stats = agent.cache.stats()
+    assert (stats["misses"], stats["entries"], stats["evictions"]) == (3, 2, 1), stats
+    assert (stats["disk_entries"], stats["disk_evictions"]) == (3, 0), stats
+
+    # Each tier counts its own evictions: one number could size neither limit.
+    small = AnalysisCache(Path(tempfile.mkdtemp(dir=TMP_DIR)), max_entries=8, max_disk_entries=2)
+    for key in ("a", "b", "c"):
+        small.put(key, {"dust_level": 1.0})
+    stats = small.stats()
+    assert (stats["evictions"], stats["disk_evictions"], stats["disk_entries"]) == (0, 1, 2), stats
+
+    # A fresh process finds them on disk, and never decodes a frame to do it.
+    def refuse(*_):
+        raise AssertionError("decoded a frame the cache already held")
+
+    decode = ProductionImageProcessor.load_image
+    ProductionImageProcessor.load_image = staticmethod(refuse)
+    try:
+        reborn = ImageClassifierAgent(cache=AnalysisCache(cache_dir, max_entries=2, max_disk_entries=8))
+        again = reborn.classify_many(images)
+    finally:
+        ProductionImageProcessor.load_image = decode
+    assert [r["dust_level"] for r in again] == [r["dust_level"] for r in first]
+    assert reborn.cache.stats()["disk_hits"] == 3, reborn.cache.stats()
+
+    # New bytes at the same path are a new frame, not a stale hit.
+    shutil.copy(settings.image_dir / "panel_04_test.jpg", images[0])
+    os.utime(images[0], ns=(1, 1))
+    changed = agent.classify_dust_level(images[0])
+    assert changed["dust_level"] != first[0]["dust_level"], "served a stale reading"
+
+
+def test_a_working_resolution_decodes_small_and_keys_its_own_cache():
+    """ANALYSIS_MAX_EDGE decodes frames straight to a reduced size. A cap the
+    frame already fits must change nothing, and a reading taken at one
+    resolution must never answer for another."""
+    import numpy as np
+
+    from Agents.crew import ProductionImageProcessor
+    from Backend.agents.analysis_cache import AnalysisCache
+    from Backend.agents.image_classifier import ImageClassifierAgent
+
+    image = settings.image_dir / "panel_03_test.jpg"
+    full = ProductionImageProcessor.load_image(str(image))
+    size = ProductionImageProcessor._jpeg_size(memoryview(np.fromfile(image, np.uint8)))
+    assert size == (full.shape[1], full.shape[0]), size
+
+    small = ProductionImageProcessor.load_image(str(image), max_edge=200)
+    assert max(small.shape[:2]) == 200, small.shape
+    assert ProductionImageProcessor.process_image(str(image), max_edge=max(size)).dust_level == \
+        ProductionImageProcessor.process_image(str(image)).dust_level
+
+    cache = AnalysisCache(max_entries=8)
+    at_full = ImageClassifierAgent(cache=cache).classify_dust_level(image)
+    reduced = ImageClassifierAgent(cache=cache, max_edge=160).classify_dust_level(image)
+    assert cache.stats()["misses"] == 2, "one resolution answered for the other"
+    assert reduced["dust_level"] != at_full["dust_level"]
+
+
 def test_a_failed_analysis_reports_an_error_instead_of_inventing_one():
     """A fabricated dust level reaches the decision engine and opens a valve."""
     import numpy as np
@@ -357,6 +526,402 @@ def test_aggregates_and_bulk_operations():
         db.close()
 
 
+def test_the_panel_list_costs_the_same_queries_for_any_number_of_panels():
+    """list_panels asked for each panel's newest status and last wash separately:
+    two queries per panel, on every console poll."""
+    from sqlalchemy import event
+
+    from Backend.database.connection import engine
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    configured = settings.panel_ids
+    db = SessionLocal()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        services.analyze_panel(db, "panel_01")
+        statements.clear()
+        few = services.list_panels(db)["panels"]
+        queries_for_four = len(statements)
+
+        settings.panel_ids = configured + [f"panel_{n:02d}" for n in range(5, 65)]
+        statements.clear()
+        many = services.list_panels(db)["panels"]
+        assert len(statements) == queries_for_four <= 2, statements
+        assert many[:len(few)] == few, "more panels changed the ones already listed"
+        assert many[-1]["status"] == "unknown" and many[-1]["last_cleaned"] == "Never"
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        settings.panel_ids = configured
+        db.close()
+
+
+def test_panel_state_kept_on_write_matches_a_rebuild_from_history():
+    from Backend.database.models import PanelLatestState, PanelStatus
+
+    db = SessionLocal()
+    try:
+        services.analyze_panel(db, "panel_02")
+        services.update_settings(db, {"system_paused": False})
+        services.spray_panel(db, "panel_02")
+        old = PanelStatus(panel_id="panel_02", timestamp=datetime(2001, 1, 1), dust_level=0.99,
+                          classification_confidence=0.5, is_dirty=True, needs_cleaning=True)
+        db.add(old)
+        services.track_panel_status(db, old)
+        db.commit()
+
+        kept = {row.panel_id: row.to_dict() for row in db.query(PanelLatestState)}
+        assert kept["panel_02"]["dust_level"] != 0.99, "a back-filled reading replaced the newest one"
+        listed = services.list_panels(db)
+
+        db.query(PanelLatestState).delete()
+        db.commit()
+        assert services.ensure_panel_state(db) is True
+        rebuilt = {row.panel_id: row.to_dict() for row in db.query(PanelLatestState)}
+        for state in (kept, rebuilt):
+            for row in state.values():
+                row.pop("updated_at")
+        assert rebuilt == kept
+        assert services.list_panels(db) == listed
+        assert services.ensure_panel_state(db) is False
+    finally:
+        db.close()
+
+
+def test_history_and_water_queries_search_the_composite_indexes():
+    """panel_history and the water ledger filtered on one column and sorted or
+    ranged on timestamp, which meant sorting a year of rows on every call."""
+    from sqlalchemy import create_engine, event, inspect, text
+
+    from Backend.database.connection import engine, migrate_indexes
+    from Backend.database.models import Base
+
+    legacy = create_engine(f"sqlite:///{Path(TMP_DIR) / 'legacy.db'}")
+    Base.metadata.create_all(legacy)
+    with legacy.begin() as conn:
+        for name in ("ix_panel_status_panel_time", "ix_cleaning_actions_panel_time",
+                     "ix_cleaning_actions_success_time"):
+            conn.execute(text(f"DROP INDEX {name}"))
+        conn.execute(text("CREATE INDEX ix_panel_status_panel_id ON panel_status (panel_id)"))
+    migrate_indexes(Base.metadata, legacy)
+    indexes = {i["name"] for i in inspect(legacy).get_indexes("panel_status")}
+    assert "ix_panel_status_panel_time" in indexes and "ix_panel_status_panel_id" not in indexes
+    legacy.dispose()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, *_):
+        statements.append((statement, parameters))
+
+    db = SessionLocal()
+    services.update_settings(db, {"tank_refilled_at": "2001-01-01T00:00:00"})
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        services.panel_history(db, "panel_01")
+        services.reconcile_water_ledger(db)  # the SUM the ledger is checked against
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+        services.reset_settings(db)
+        db.close()
+
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        plans = {}
+        for statement, parameters in statements:
+            if "FROM panel_status" in statement or "FROM cleaning_actions" in statement:
+                plan = " / ".join(row[3] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters))
+                plans[statement] = plan
+    assert len(plans) == 3, statements  # two history queries and the water recount
+    for statement, plan in plans.items():
+        assert "USING INDEX ix_" in plan and "_time" in plan, (statement, plan)
+        assert "TEMP B-TREE" not in plan, (statement, plan)
+
+
+def test_the_water_ledger_tracks_every_wash_and_reconciles_drift():
+    """The tank level was a SUM over cleaning_actions, run on every poll and
+    before every spray."""
+    from sqlalchemy import event
+
+    from Backend.database.connection import engine
+    from Backend.database.models import WaterLedger
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    db = SessionLocal()
+    try:
+        services.reset_settings(db)
+        services.refill_tank(db)
+        assert services.water_status(db)["used_ml"] == 0
+        services.spray_many(db, "all")
+        used = services.water_status(db)["used_ml"]
+        assert used == len(settings.panel_ids) * services.get_settings(db)["spray_duration"] * \
+            services.ML_PER_SECOND_OF_SPRAY
+        assert services.reconcile_water_ledger(db)["corrected"] is False
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            services.water_status(db)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert not any("sum(" in s.lower() for s in statements), statements
+
+        db.get(WaterLedger, services.LEDGER_ID).used_ml = 1.0
+        db.commit()
+        report = services.reconcile_water_ledger(db)
+        assert report["corrected"] and report["drift_ml"] == round(1.0 - used, 1), report
+        assert services.water_status(db)["used_ml"] == used
+
+        services.update_settings(db, {"tank_refilled_at": "2001-01-01T00:00:00"})
+        assert services.water_status(db)["used_ml"] > used, "a back-dated refill must recount"
+    finally:
+        services.reset_settings(db)
+        db.close()
+
+
+def test_settings_are_read_once_and_follow_another_process_through_the_version():
+    """get_settings read and decoded the whole table on every call, several
+    times per request and once per panel in a bulk wash."""
+    from sqlalchemy import event, text
+
+    from Backend.database.connection import engine
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    ttl = settings.version_cache_ttl
+    sessions = [SessionLocal() for _ in range(5)]
+    db, other, third, fourth, fifth = sessions
+    try:
+        services.update_settings(db, {"spray_duration": 7})
+        settings.version_cache_ttl = 60
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            assert services.get_settings(other)["spray_duration"] == 7
+            services.get_settings(other)
+            services.get_settings(third)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert statements == [], statements
+
+        # Another API process saves a change: its row and a bumped version.
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE system_settings SET value = '9' WHERE key = 'spray_duration'"))
+            conn.execute(text("UPDATE version_counters SET value = value + 1 WHERE name = 'settings'"))
+        assert services.get_settings(fourth)["spray_duration"] == 7, "trusted within the TTL"
+        settings.version_cache_ttl = 0
+        assert services.get_settings(fifth)["spray_duration"] == 9
+
+        # A change saved by this process applies at once, whatever the TTL.
+        settings.version_cache_ttl = 60
+        services.update_settings(other, {"spray_duration": 11})
+        assert services.get_settings(third)["spray_duration"] == 7, "a session reads settings once"
+        third.info.clear()
+        assert services.get_settings(third)["spray_duration"] == 11
+    finally:
+        settings.version_cache_ttl = ttl
+        services.reset_settings(db)
+        for session in sessions:
+            session.close()
+
+
+def test_overview_streams_share_one_computation_and_push_only_what_changed():
+    """Every open console polled /overview, each poll rebuilding it from the
+    database whether or not anything had changed."""
+    import asyncio
+
+    from Backend.api.overview_stream import OverviewBroadcaster
+    from Backend.change_feed import feed
+
+    def compute():
+        with SessionLocal() as db:
+            return services.overview(db)
+
+    def payload(message):
+        return json.loads(message.split("data: ", 1)[1])
+
+    async def scenario(broadcaster):
+        streams = [broadcaster.events() for _ in range(5)]
+        snapshots = [await s.__anext__() for s in streams]
+        with SessionLocal() as db:
+            await asyncio.to_thread(services.update_settings, db, {"spray_duration": 13})
+        patches = [await asyncio.wait_for(s.__anext__(), 5) for s in streams]
+        for s in streams:
+            await s.aclose()
+        # With nobody left to compute for, the task ends now, not at its next refresh.
+        await asyncio.wait_for(broadcaster._task, 1)
+        return snapshots, patches
+
+    broadcaster = OverviewBroadcaster(feed, compute, debounce=0.01, keepalive=30)
+    try:
+        snapshots, patches = asyncio.run(scenario(broadcaster))
+    finally:
+        with SessionLocal() as db:
+            services.reset_settings(db)
+
+    assert broadcaster.computations == 2, "five streams, one snapshot and one recompute, none after"
+    assert all(s.startswith("event: snapshot") for s in snapshots)
+    assert payload(snapshots[0])["panels"], "a snapshot is the whole overview"
+    assert all(p.startswith("event: patch") for p in patches)
+    patch = payload(patches[0])
+    assert patch["topics"] == ["settings"]
+    assert set(patch["changes"]) == {"settings"}, "only the key that changed is pushed"
+    assert patch["changes"]["settings"]["spray_duration"] == 13
+
+
+@requires_postgres
+def test_the_services_run_unchanged_on_postgresql(url):
+    """Every query used to assume SQLite. The same services, on PostgreSQL,
+    must write, read back and reconcile to the same answers."""
+    from sqlalchemy.orm import sessionmaker
+
+    from Backend.database.connection import engine_from_url, migrate_indexes
+    from Backend.database.models import Base
+
+    pg = engine_from_url(url)
+    Base.metadata.drop_all(pg)
+    Base.metadata.create_all(pg)
+    migrate_indexes(Base.metadata, pg)
+    PgSession = sessionmaker(bind=pg, autoflush=False)
+    try:
+        with PgSession() as db:
+            services.update_settings(db, {"auto_clean": False, "spray_duration": 5})
+            assert "error" not in services.analyze_panel(db, "panel_03")
+            assert services.spray_panel(db, "panel_03")["water_used_ml"] == 5 * services.ML_PER_SECOND_OF_SPRAY
+            assert services.water_status(db)["used_ml"] == 5 * services.ML_PER_SECOND_OF_SPRAY
+            panels = services.list_panels(db)
+            assert panels["panels"][2]["status"] != "unknown"
+            assert services.panel_history(db, "panel_03")["cleaning_history"]
+
+            services.rebuild_panel_state(db)
+            assert services.list_panels(db) == panels
+            assert services.reconcile_water_ledger(db)["corrected"] is False
+            assert services.system_stats(db)["total_cleanings"] == 1
+            assert services.read_version(db, services.DATA_VERSION) > 0
+    finally:
+        Base.metadata.drop_all(pg)
+        pg.dispose()
+
+
+def test_retention_rolls_up_old_readings_and_archives_old_logs():
+    """panel_status, system_logs and system_decisions grew with every analysis
+    and nothing ever removed a row."""
+    import gzip
+    from datetime import timedelta
+
+    from Backend.database.models import PanelStatus, PanelStatusRollup, SystemDecision, SystemLog, utcnow
+    from Backend.retention import run_retention
+
+    now = datetime(2026, 6, 15, 12, 30)
+    panel = "retention_probe"
+    readings = [
+        (now - timedelta(days=400, minutes=m), dust) for m, dust in ((0, 0.2), (5, 0.4), (10, 0.6))
+    ] + [
+        (now.replace(minute=10) - timedelta(days=40), 0.1),
+        (now.replace(minute=20) - timedelta(days=40), 0.3),
+        (now.replace(minute=20) - timedelta(days=40, hours=1), 0.5),
+        (now - timedelta(days=1), 0.9),  # the newest stays, however old
+    ]
+    with SessionLocal() as db:
+        for timestamp, dust in readings:
+            db.add(PanelStatus(panel_id=panel, timestamp=timestamp, dust_level=dust, is_dirty=False))
+        db.add(SystemLog(timestamp=now - timedelta(days=200), level="INFO", component="retention_probe",
+                         message="old", details="{not json"))
+        for decision_id, days in (("retention_probe", 200), ("retention_probe_newest", -1)):
+            db.add(SystemDecision(decision_id=decision_id, timestamp=now - timedelta(days=days),
+                                  decision_data=json.dumps({"decision_id": decision_id}), action_taken="no_action"))
+        db.commit()
+        before = services.system_stats(db)
+        latest = services.latest_decision(db)
+
+        report = run_retention(db, now=now)
+        assert report["panel_status"]["deleted"] >= 6 and report["hourly_rollups"]["deleted"] >= 1
+
+        rollups = {
+            (r.period, r.bucket_start): r
+            for r in db.query(PanelStatusRollup).filter(PanelStatusRollup.panel_id == panel)
+        }
+        assert sorted(period for period, _ in rollups) == ["day", "hour", "hour"]
+        day = rollups[("day", (now - timedelta(days=400)).replace(hour=0, minute=0))]
+        assert (day.samples, day.dust_min, day.dust_max) == (3, 0.2, 0.6) and abs(day.dust_mean - 0.4) < 1e-9
+        hour = rollups[("hour", now.replace(minute=0) - timedelta(days=40))]
+        assert (hour.samples, hour.dust_min, hour.dust_max) == (2, 0.1, 0.3) and abs(hour.dust_mean - 0.2) < 1e-9
+        assert [r.dust_level for r in db.query(PanelStatus).filter(PanelStatus.panel_id == panel)] == [0.9]
+
+        after = services.system_stats(db)
+        assert after["total_analyses"] == before["total_analyses"]
+        assert abs(after["avg_dust_level"] - before["avg_dust_level"]) < 1e-4
+        assert services.latest_decision(db) == latest
+
+        archived = {}
+        for table in ("system_logs", "system_decisions"):
+            with gzip.open(report[table]["archive"], "rt") as archive:
+                archived[table] = [json.loads(line) for line in archive]
+            assert len(archived[table]) == report[table]["deleted"] >= 1, table
+        assert {"component": "retention_probe", "details": "{not json"}.items() <= archived["system_logs"][-1].items()
+        assert archived["system_decisions"][-1]["decision_id"] == "retention_probe"
+        assert db.query(SystemDecision).filter(SystemDecision.decision_id == "retention_probe").count() == 0
+        assert db.query(SystemLog).filter(SystemLog.component == "retention_probe").count() == 0
+
+        logged = db.query(SystemLog).filter(SystemLog.component == "retention").count()
+        again = run_retention(db, now=now)
+        assert again["reclaimed_rows"] == 0
+        assert db.query(SystemLog).filter(SystemLog.component == "retention").count() == logged
+
+        # A second run in the same second archives beside the first, not over it.
+        db.add(SystemLog(timestamp=now - timedelta(days=200), level="INFO", component="retention_probe",
+                         message="later"))
+        db.commit()
+        later = run_retention(db, now=now)
+        assert later["system_logs"]["archive"] != report["system_logs"]["archive"]
+        with gzip.open(report["system_logs"]["archive"], "rt") as archive:
+            assert len(archive.readlines()) == report["system_logs"]["deleted"]
+
+
+def test_stats_come_from_running_totals_that_match_a_recount():
+    """system_stats ran five aggregates over the whole history on every
+    /system/stats and every /overview."""
+    from sqlalchemy import event
+
+    from Backend.database.connection import engine
+    from Backend.database.models import PanelStatus
+
+    with SessionLocal() as db:
+        services.reconcile_system_totals(db)  # rows earlier tests wrote by hand
+        services.refill_tank(db)
+        services.analyze_all(db)
+        assert "error" not in services.spray_panel(db, "panel_01")
+        assert services.reconcile_system_totals(db)["corrected"] is False
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement.lower())
+
+    with SessionLocal() as db:
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            stats = services.system_stats(db)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) == 2, statements
+    assert not [s for s in statements if "count(" in s or "sum(" in s or "avg(" in s], statements
+
+    with SessionLocal() as db:
+        db.add(PanelStatus(panel_id="panel_01", dust_level=0.5))  # behind the totals' back
+        db.commit()
+        report = services.reconcile_system_totals(db)
+        assert report["corrected"] and report["drift"] == {"analyses": -1, "dust_samples": -1, "dust_sum": -0.5}
+        assert services.system_stats(db)["total_analyses"] == stats["total_analyses"] + 1
+
+
 def test_health_and_stats_report_real_values():
     db = SessionLocal()
     try:
@@ -380,6 +945,47 @@ def test_hardware_telemetry_is_parsed():
     assert telemetry["avg_temperature"] is not None
 
 
+def test_telemetry_parses_each_capture_once():
+    """latest_telemetry globbed Hardware/, sorted every name and parsed the
+    newest capture on every health check, overview and panel detail."""
+    import shutil
+
+    from Backend.telemetry import TelemetryIndex
+
+    captures = sorted(settings.hardware_dir.glob("panel_data_*.json"))
+    directory = Path(tempfile.mkdtemp(dir=TMP_DIR))
+    for capture in captures:
+        shutil.copy(capture, directory)
+    index = TelemetryIndex(directory)
+
+    newest = json.loads(captures[-1].read_text())
+    first = index.latest()
+    assert first["source"] == captures[-1].name and first["readings"] == sorted(
+        newest, key=lambda r: int(r["panel_id"].split("_")[1])
+    )
+    assert first == services.latest_telemetry()  # the repo's captures, through the service
+    for _ in range(3):
+        assert index.latest() == first
+    assert index.files_parsed == 1, "older captures at start-up hold nothing newer"
+
+    node = dict(newest[3], timestamp="2099-01-01T00:00:00", temperature=99.0)
+    (directory / "panel_data_20990101_000000.json").write_text(json.dumps([node]))
+    late = dict(newest[4], timestamp="2000-01-01T00:00:00", temperature=-40.0)
+    (directory / "panel_data_20000101_000000.json").write_text(json.dumps([late]))
+    updated = index.latest()
+    assert index.files_parsed == 3
+    assert updated["readings"][3]["temperature"] == 99.0 and updated["captured_at"] == node["timestamp"]
+    assert updated["readings"][4] == first["readings"][4], "an older reading must not replace a newer one"
+    assert updated["readings"][5] == first["readings"][5]
+
+    partial = directory / "panel_data_20990101_000001.json"
+    partial.write_text(json.dumps([dict(node, temperature=50.0)])[:20])  # caught mid-write
+    assert index.latest()["readings"][3]["temperature"] == 99.0
+    partial.write_text(json.dumps([dict(node, timestamp="2099-01-01T00:00:01", temperature=50.0)]))
+    assert index.latest()["readings"][3]["temperature"] == 50.0
+    assert index.files_parsed == 4
+
+
 def test_fastapi_routes():
     from fastapi.testclient import TestClient
 
@@ -387,7 +993,7 @@ def test_fastapi_routes():
 
     client = TestClient(app)
     for path in ("/", "/health", "/panels", "/latest-decision", "/system/stats",
-                 "/system/logs", "/settings", "/hardware/telemetry", "/overview",
+                 "/system/logs", "/system/cache", "/settings", "/hardware/telemetry", "/overview",
                  "/panels/panel_01/history", "/panels/panel_01/detail", "/openapi.json"):
         assert client.get(path).status_code == 200, path
 
@@ -404,6 +1010,115 @@ def test_fastapi_routes():
     assert client.post("/settings/reset").json()["dust_threshold"] == 60
 
 
+def test_an_unchanged_read_is_a_304_that_costs_no_query():
+    """Read routes rebuilt and reserialised their payload on every poll, even
+    when nothing had been written since the last one."""
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from Backend.api.main import app
+    from Backend.database.connection import async_engine, engine
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    client = TestClient(app)
+    ttl = settings.version_cache_ttl
+    settings.version_cache_ttl = 60
+    try:
+        tags = {}
+        for path in ("/overview", "/panels", "/system/stats", "/latest-decision", "/settings"):
+            first = client.get(path)
+            assert first.status_code == 200 and first.headers["etag"], path
+            tags[path] = first.headers["etag"]
+
+        engines = (engine, async_engine.sync_engine)
+        for watched in engines:
+            event.listen(watched, "before_cursor_execute", record)
+        try:
+            for path, tag in tags.items():
+                again = client.get(path, headers={"If-None-Match": tag})
+                assert again.status_code == 304 and again.headers["etag"] == tag, path
+        finally:
+            for watched in engines:
+                event.remove(watched, "before_cursor_execute", record)
+        assert statements == [], statements
+
+        assert client.post("/analyze", json={"panel_id": "panel_02"}).status_code == 200
+        for path, tag in tags.items():
+            changed = client.get(path, headers={"If-None-Match": tag})
+            assert changed.status_code == 200 and changed.headers["etag"] != tag, path
+    finally:
+        settings.version_cache_ttl = ttl
+
+
+def test_polled_reads_are_answered_while_every_worker_thread_is_busy():
+    """Every route was a sync def, so a few hundred console pollers filled the
+    threadpool and /analyze queued behind reads."""
+    import asyncio
+    import threading
+
+    import anyio.to_thread
+    import httpx
+
+    from Backend.api.main import app
+    from Backend.database.connection import AsyncSessionLocal, async_engine
+
+    reads = ("/settings", "/system/logs?limit=5", "/latest-decision", "/system/stats", "/panels")
+    with SessionLocal() as db:
+        expected = {
+            "/settings": services.get_settings(db),
+            "/system/logs?limit=5": services.system_logs(db, 5),
+            "/latest-decision": services.latest_decision(db),
+            "/panels": services.list_panels(db),
+        }
+
+    # The frames and the mirrored decision are on disk: never read on the loop.
+    disk_reads = []
+
+    def off_the_loop(read):
+        def recorded(*args):
+            disk_reads.append((read.__name__, threading.get_ident()))
+            return read(*args)
+        return recorded
+
+    async def poll():
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        limiter.total_tokens = 1
+        release = threading.Event()
+        held = asyncio.ensure_future(anyio.to_thread.run_sync(release.wait))
+        await asyncio.sleep(0.05)  # the only worker thread is now taken
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                answers = await asyncio.wait_for(asyncio.gather(*(client.get(path) for path in reads)), 10)
+            services._stored_latest_decision = lambda db: None  # as on a database with no decisions
+            async with AsyncSessionLocal() as db:
+                mirrored = await services.latest_decision_async(db)
+        finally:
+            release.set()
+            await held
+            await async_engine.dispose()  # its connections belong to this loop
+        return dict(zip(reads, answers)), mirrored
+
+    saved = services._images_available, services._mirrored_latest_decision, services._stored_latest_decision
+    services._images_available, services._mirrored_latest_decision = map(off_the_loop, saved[:2])
+    try:
+        answers, mirrored = asyncio.run(poll())
+    finally:
+        services._images_available, services._mirrored_latest_decision, services._stored_latest_decision = saved
+    assert {name for name, _ in disk_reads} == {"_images_available", "_mirrored_latest_decision"}, disk_reads
+    assert all(thread != threading.get_ident() for _, thread in disk_reads), "read on the event loop"
+    assert mirrored == (services._mirrored_latest_decision() or services.NO_DECISION)
+    for path, answer in answers.items():
+        assert answer.status_code == 200, path
+        if path in expected:
+            assert answer.json() == expected[path], path
+    assert answers["/system/stats"].json()["total_analyses"] > 0
+
+
 def test_a_deployed_api_refuses_unauthenticated_writes():
     """The API is reachable from anywhere once deployed, and its POST routes open
     a valve. With API_TOKEN set, a write without the header must not act."""
@@ -430,19 +1145,530 @@ def test_a_deployed_api_refuses_unauthenticated_writes():
         importlib.reload(api)
 
 
+def test_mqtt_telemetry_is_written_in_batches_behind_a_bounded_queue():
+    """Telemetry only ever came from capture files dropped into Hardware/;
+    readings published to the broker never reached the database."""
+    from datetime import timedelta
+
+    from sqlalchemy.orm import sessionmaker
+
+    from Backend.database.connection import make_engine
+    from Backend.database.models import Base, TelemetryLatest, TelemetryReading, utcnow
+    from Backend.mqtt.fake import FakeBroker, FakeClient
+    from Backend.mqtt.ingest import TelemetryIngestor
+
+    store = make_engine(Path(tempfile.mkdtemp(dir=TMP_DIR)) / "telemetry.db")
+    Base.metadata.create_all(store)
+    Sessions = sessionmaker(bind=store)
+
+    broker = FakeBroker()
+    backend, node = FakeClient(broker), FakeClient(broker)
+    ingestor = TelemetryIngestor(backend, Sessions, "spray/data/#", queue_size=3, put_timeout=0)
+    backend.connect()
+    node.connect()
+
+    reading = {"power": 4.2, "efficiency": 88, "temperature": 31.5, "humidity": 40, "light": 900}
+    node.publish("spray/data", json.dumps([
+        dict(reading, panel_id="PANNEL_0", timestamp="2026-06-01T12:00:05+02:00"),
+        dict(reading, panel_id="PANNEL_1", timestamp=1_780_000_000),
+    ]))
+    # Named by its topic, and older than the PANNEL_0 reading already queued.
+    node.publish("spray/data/PANNEL_0", json.dumps(dict(reading, timestamp="2026-06-01T09:00:00", temperature=-5)))
+    node.publish("spray/data", json.dumps(dict(reading, panel_id="PANNEL_2")))  # the queue is full
+    node.publish("spray/data", b"{not json")
+    node.publish("spray/data", json.dumps(reading))  # no node anywhere
+    assert ingestor.stats() == {
+        "received": 4, "written": 0, "batches": 0, "malformed": 2, "dropped": 1, "write_errors": 0, "queued": 3,
+    }
+
+    ingestor.start()
+    ingestor.stop()
+    assert ingestor.stats()["written"] == 3 and ingestor.stats()["batches"] == 1
+    assert ingestor.stats()["queued"] == 0
+
+    rows, _ = ingestor.parse("spray/data", json.dumps(dict(reading, panel_id="PANNEL_1", timestamp=0, temperature=-40)))
+    ingestor.write(rows)  # a late batch: stored, but not the node's latest
+
+    with Sessions() as db:
+        assert db.query(TelemetryReading).count() == 4
+        latest = {row.node_id: row for row in db.query(TelemetryLatest)}
+        assert set(latest) == {"PANNEL_0", "PANNEL_1"}
+        assert latest["PANNEL_0"].timestamp == datetime(2026, 6, 1, 10, 0, 5)  # to UTC
+        assert latest["PANNEL_0"].temperature == 31.5
+        assert latest["PANNEL_1"].timestamp == datetime(2026, 5, 28, 20, 26, 40)  # epoch seconds
+        assert latest["PANNEL_1"].temperature == 31.5
+
+        live = services.latest_telemetry(db)
+        assert live["source"] == "mqtt" and [r["panel_id"] for r in live["readings"]] == ["PANNEL_0", "PANNEL_1"]
+        assert live["avg_temperature"] == 31.5 and live["readings"][0]["efficiency"] == 88.0
+        assert services.read_version(db, services.DATA_VERSION) == 0, "telemetry must not move the ETags"
+
+        # An ingestor that stopped long ago: its last readings are not current.
+        stale = utcnow() - timedelta(minutes=settings.mqtt_telemetry_stale_minutes + 1)
+        db.query(TelemetryLatest).update({"received_at": stale})
+        db.commit()
+        assert services.latest_telemetry(db) == services.latest_telemetry(), "the captures again"
+        saved, settings.mqtt_telemetry_stale_minutes = settings.mqtt_telemetry_stale_minutes, 0
+        try:
+            assert services.latest_telemetry(db)["source"] == "mqtt", "0: never stale"
+        finally:
+            settings.mqtt_telemetry_stale_minutes = saved
+
+    with SessionLocal() as db:  # no ingestor has written here: the capture files
+        assert services.latest_telemetry(db) == services.latest_telemetry()
+
+
+def test_bulk_wash_commands_go_out_paced_per_node_and_pipelined():
+    """A wash never reached the hardware from the API, and the scripts that did
+    send commands slept 0.2–2 s after every one, whichever node it was for."""
+    import time
+
+    from Backend.mqtt.dispatch import CommandDispatcher
+    from Backend.mqtt.fake import FakeBroker, FakeClient
+
+    broker = FakeBroker()
+    received, by_node = [], {}
+
+    def node_receives(n):
+        def on_message(client, userdata, message):
+            received.append(json.loads(message.payload))
+            by_node.setdefault(n, []).append(received[-1]["nozzle_id"])
+        return on_message
+
+    for n in range(2):  # two nozzles a node below: four panels, two nodes, a topic each
+        node = FakeClient(broker)
+        node.connect()
+        node.subscribe(f"spray/control/{n}", qos=1)
+        node.on_message = node_receives(n)
+
+    backend = FakeClient(broker, ack_delay=0.02)
+    saved = settings.mqtt_commands, settings.mqtt_nozzles_per_node, settings.mqtt_command_topic, services._dispatcher
+    settings.mqtt_commands, settings.mqtt_nozzles_per_node = True, 2
+    services._dispatcher = CommandDispatcher(backend, node_rate=100)
+    backend.connect()
+    try:
+        with SessionLocal() as db:
+            services.reset_settings(db)
+            services.refill_tank(db)
+            washed = services.spray_many(db, "all")
+            sent = washed["dispatch"]
+            assert sent["commands"] == sent["acked"] == washed["cleaned"] == len(settings.panel_ids), sent
+            assert len(received) == len(settings.panel_ids), "each wash is sent once, in the batch"
+            assert received[0] == {"nozzle_id": "NOZZLE_1", "amount_ml": 100, "spray_timeout": 5}
+            assert [r["node_id"] for r in sent["results"]] == ["NODE_0", "NODE_0", "NODE_1", "NODE_1"]
+            assert by_node == {0: ["NOZZLE_1", "NOZZLE_2"], 1: ["NOZZLE_1", "NOZZLE_2"]}, "each node its own"
+            assert all(r["latency_ms"] >= 15 for r in sent["results"]), "publish to PUBACK"
+            assert services.system_logs(db, 1)[0]["component"] == "spray_dispatch"
+
+            single = services.spray_panel(db, "panel_04")
+            assert single["dispatch"]["acked"] == 1 and by_node[1][-1] == "NOZZLE_2" and len(by_node[0]) == 2
+
+            # One topic for every node would have each of them spray every command.
+            settings.mqtt_command_topic = "spray/control"
+            before = len(received)
+            refused = services.spray_panel(db, "panel_01")
+            assert "no {node}" in refused["dispatch"]["error"] and len(received) == before, refused
+            assert services.system_logs(db, 1)[0]["level"] == "ERROR"
+            settings.mqtt_nozzles_per_node = len(settings.panel_ids)  # one node: nothing to tell apart
+            assert services.command_dispatcher() is services._dispatcher
+            settings.mqtt_command_topic, settings.mqtt_nozzles_per_node = "spray/control/{node}", 2
+
+            # An auto-clean sweep sends its washes the same way: one batch.
+            services.refill_tank(db)
+            services.update_settings(db, {"dust_threshold": 0, "auto_clean": True})
+            before = len(received)
+            swept = services.analyze_panels(db, settings.panel_ids)
+            washes = [swept[panel_id]["auto_clean"] for panel_id in settings.panel_ids]
+            assert len(received) - before == len(settings.panel_ids)
+            assert all(w["dispatch"]["commands"] == len(settings.panel_ids) for w in washes), washes
+            assert [w["dispatch"]["results"][0]["panel_id"] for w in washes] == settings.panel_ids
+            dispatch_logs = [e for e in services.system_logs(db, 50) if e["component"] == "spray_dispatch"]
+            assert dispatch_logs[0]["message"].startswith(f"{len(settings.panel_ids)} of {len(settings.panel_ids)}")
+            stored = services.latest_decision(db)
+            assert stored["auto_clean"]["dispatch"]["results"][0]["status"] == "acked"
+            services.reset_settings(db)
+    finally:
+        settings.mqtt_commands, settings.mqtt_nozzles_per_node, settings.mqtt_command_topic, services._dispatcher = saved
+
+    # Three nodes, four commands each: one command per node per 50ms, the
+    # nodes interleaved, and no publish waiting on the previous one's ack.
+    dispatcher = CommandDispatcher(FakeClient(broker, ack_delay=0.05), node_rate=20, max_inflight=6)
+    dispatcher.client.connect()
+    commands = [
+        {"node_id": f"NODE_{n}", "topic": f"spray/control/{n}", "payload": {"nozzle_id": f"NOZZLE_{i + 1}"}}
+        for n in range(3) for i in range(4)  # grouped by node, as a sweep lists them
+    ]
+    report = dispatcher.dispatch(commands)
+    assert report["acked"] == 12 and report["latency_ms"]["p50"] >= 45, report
+    first = sorted(report["results"], key=lambda r: r["sent_ms"])[:3]
+    assert {r["node_id"] for r in first} == {"NODE_0", "NODE_1", "NODE_2"}, "served round-robin"
+    for n in range(3):
+        sent_at = [r["sent_ms"] for r in report["results"] if r["node_id"] == f"NODE_{n}"]
+        assert all(later - earlier >= 45 for earlier, later in zip(sent_at, sent_at[1:])), sent_at
+    assert report["elapsed_ms"] < 12 * 50, "stop-and-wait would take 12 round trips"
+
+    silent = CommandDispatcher(FakeClient(broker), ack_timeout=0.05)
+    silent.client.connect()
+    silent.client.on_publish = None  # a broker that never acks
+    assert silent.dispatch(commands[:2])["timeout"] == 2
+
+
+def test_latency_benchmark_measures_both_transports():
+    """The MQTT vs HTTP comparison was fifty numbers typed into the scripts."""
+    try:
+        import paho.mqtt.client  # noqa: F401
+    except ImportError:
+        raise unittest.SkipTest("paho-mqtt is not installed")
+    import gc
+    import warnings
+
+    from Backend.mqtt import bench_latency
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", ResourceWarning)
+        report = bench_latency.run(round_trips=40, levels=(1, 4))
+        gc.collect()
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)], "every connection is closed"
+    for transport in ("mqtt", "http"):
+        for level in (1, 4):
+            r = report["results"][transport][level]
+            assert r["round_trips"] == 40 and r["lost"] == 0 and r["per_s"] > 0, (transport, level, r)
+            assert r["p50_ms"] <= r["p95_ms"] <= r["p99_ms"] <= r["max_ms"]
+            assert len(r["samples_ms"]) == 40
+
+    out = Path(tempfile.mkdtemp(dir=TMP_DIR))
+    written = bench_latency.write(report, out)
+    assert json.loads((out / "latency-report.json").read_text())["results"]["mqtt"]["4"]["round_trips"] == 40
+    table = (out / "latency-table.md").read_text()
+    assert "| MQTT | 4 |" in table and "| HTTP | 1 |" in table
+    assert out / "latency-table.md" in written
+
+
+def test_fleet_forecast_is_a_lookup_in_memory_mapped_clear_sky_tables():
+    """The forecast was a fixed 6-18h sine curve, the same every day of the year,
+    scaled by a capacity for one of eight cities. It now follows the sun for the
+    site's coordinates and date, read from a yearly table built once per site."""
+    from datetime import timedelta, timezone
+
+    import numpy as np
+
+    from Agents import clear_sky, crew
+
+    # NOAA's solar position: the sun at the zenith over the equator at an
+    # equinox noon, and down at midnight.
+    assert abs(clear_sky.solar_elevation(0.0, 0.0, 80, 12.0) - 90) < 2
+    assert clear_sky.solar_elevation(0.0, 0.0, 80, 0.0) < -80
+    assert clear_sky.site_coordinates("28.61, 77.21") == (28.61, 77.21)
+    assert clear_sky.site_coordinates("Delhi, India") == clear_sky.CITY_COORDINATES["Delhi"]
+    assert clear_sky.site_coordinates("Atlantis") == clear_sky.DEFAULT_COORDINATES
+
+    tables = clear_sky.IrradianceTables(Path(tempfile.mkdtemp(dir=TMP_DIR)))
+    june = tables.window(28.61, 77.21, datetime(2025, 6, 21), 24)
+    december = tables.window(28.61, 77.21, datetime(2025, 12, 21), 24)
+    assert june.sum() > 1.5 * december.sum(), "a northern summer day is the longer one"
+    cape_town = tables.window(-33.9, 18.4, datetime(2025, 6, 21), 24)
+    assert cape_town.sum() < tables.window(-33.9, 18.4, datetime(2025, 12, 21), 24).sum()
+    assert june[18:23].max() == 0, "night in Delhi, 23:30-04:30 IST"
+    assert tables.built == 2 and len(list(tables.directory.glob("*.npy"))) == 2
+
+    # Built once, then memory-mapped — by this process and by any other.
+    assert isinstance(tables.table(28.61, 77.21, 2025), np.memmap)
+    reopened = clear_sky.IrradianceTables(tables.directory)
+    assert np.array_equal(reopened.window(28.61, 77.21, datetime(2025, 6, 21), 24), june)
+    assert reopened.built == 0
+    # A window running past New Year's Eve reads on into the next year's table.
+    new_year = reopened.window(28.61, 77.21, datetime(2025, 12, 31, 12), 48)
+    assert np.array_equal(new_year[12:], reopened.window(28.61, 77.21, datetime(2026, 1, 1), 36))
+    assert reopened.built == 1
+
+    start = datetime(2025, 3, 1, 6)
+    dust = np.linspace(0, 100, 501)
+    for location in ("Bengaluru, India", "-33.9, 18.4", "Atlantis"):
+        fleet = crew.forecast_fleet(dust, location, start)
+        assert fleet.shape == (501, 48)
+        clean = clear_sky.clear_sky_hours(location, start, 48) * crew.SYSTEM_PEAK_KW * crew.PERFORMANCE_RATIO
+        assert np.allclose(fleet[0], clean * crew.CLEAR_SKY_FACTOR, atol=5e-4)
+        assert (np.diff(fleet.sum(axis=1)) <= 0).all(), "dustier panels generate less"
+        single = crew.calculate_advanced_forecast(float(dust[300]), location, 90, start)["forecast_48h"]
+        assert single == fleet[300].tolist()
+    assert not crew.clean_generation("Bengaluru, India", start).flags.writeable, "shared between callers"
+    # A start with a timezone is the same instant in UTC.
+    ist = timezone(timedelta(hours=5, minutes=30))
+    assert np.array_equal(crew.forecast_fleet([10], "Bengaluru, India", start.replace(tzinfo=timezone.utc)),
+                          crew.forecast_fleet([10], "Bengaluru, India", start))
+    assert np.array_equal(crew.forecast_fleet([10], "Bengaluru, India", datetime(2025, 3, 1, 11, 30, tzinfo=ist)),
+                          crew.forecast_fleet([10], "Bengaluru, India", start))
+
+    with SessionLocal() as db:
+        forecast = services.fleet_forecast(db)
+    assert datetime.fromisoformat(forecast["starts_at"]).minute == 0
+    assert [p["panel_id"] for p in forecast["panels"]] == settings.panel_ids
+    assert all(len(p["forecast_kwh"]) == 48 for p in forecast["panels"])
+    site = np.sum([p["forecast_kwh"] for p in forecast["panels"]], axis=0)
+    assert np.allclose(forecast["site_kwh"], site) and forecast["dust_loss_kwh"] >= 0
+    assert list(settings.irradiance_dir.glob("*.npy")), "the API keeps its tables in its data dir"
+
+    # An agent keeps its own tables: making one moves no one else's.
+    from Backend.agents.image_classifier import ImageClassifierAgent
+
+    default = clear_sky.tables
+    first, second = (ImageClassifierAgent(irradiance_dir=tempfile.mkdtemp(dir=TMP_DIR)) for _ in range(2))
+    assert clear_sky.tables is default and services.classifier.irradiance.directory == settings.irradiance_dir
+    assert np.array_equal(first.forecast_fleet([0.1], start), second.forecast_fleet([0.1], start))
+    assert first.irradiance.built == second.irradiance.built == 1
+    assert len(list(first.irradiance.directory.glob("*.npy"))) == 1
+
+
+def test_fleet_decisions_match_the_scalar_engine_value_for_value():
+    """calculate_intelligent_decision branches per panel and standalone_decision_engine
+    validates a model per panel. decide_fleet evaluates the same bands over
+    columns for the whole site, and must not change a single decision."""
+    import random
+
+    from Agents import crew
+    from Backend.agents.image_classifier import ImageClassifierAgent
+
+    rng = random.Random(23)
+    analyses, forecasts = [], []
+    for i in range(5000):
+        dust = rng.choice([rng.uniform(0, 100), rng.choice([0, 25, 45, 65, 75, 100])])  # on the band edges too
+        economics = {
+            "daily_loss_usd": rng.choice([0, rng.uniform(0, 6), 24.50 / 5, 24.50 / 7, 24.50 / 40]),
+            "cleaning_cost_usd": 24.50,
+            "weekly_loss_usd": rng.uniform(0, 40),
+            "annual_loss_usd": rng.choice([rng.uniform(0, 900), 300]),
+            "maintenance_frequency_days": max(7, 45 - dust * 0.5),
+        }
+        analyses.append({"dust_level": dust, "confidence": rng.choice([rng.uniform(40, 100), 75, 85])})
+        forecasts.append({"economic_factors": {} if i % 9 == 0 else economics})
+
+    factor = lambda name, default: [f["economic_factors"].get(name, default) for f in forecasts]
+    columns = crew.decide_fleet(
+        [a["dust_level"] for a in analyses], [a["confidence"] for a in analyses],
+        daily_loss_usd=factor("daily_loss_usd", 0), cleaning_cost_usd=factor("cleaning_cost_usd", 24.50),
+        weekly_loss_usd=factor("weekly_loss_usd", 0), annual_loss_usd=factor("annual_loss_usd", 0),
+        maintenance_frequency_days=factor("maintenance_frequency_days", 30),
+    )
+    assert columns["decision"].shape == (5000,) and columns["risk_flags"].shape == (5000, 5)
+    rows = crew.decision_rows(columns)
+    for analysis, forecast, row in zip(analyses, forecasts, rows):
+        assert row == crew.calculate_intelligent_decision(analysis, forecast), analysis
+
+    fleet = crew.standalone_fleet_decision_engine(analyses[:200], forecasts[:200])
+    for analysis, forecast, decided in zip(analyses, forecasts, fleet):
+        single = crew.standalone_decision_engine(analysis, forecast)
+        for result in (single, decided):
+            del result["timestamp"], result["decision_id"]
+        assert decided == single
+    assert len({d["decision_id"] for d in crew.standalone_fleet_decision_engine(analyses[:3], forecasts[:3])}) == 3
+
+    # A sweep decides its frames in one pass, and still agrees with one frame at a time.
+    agent = ImageClassifierAgent()
+    images = [settings.image_dir / f"{p}_test.jpg" for p in settings.panel_ids]
+    for image, result in zip(images, agent.classify_many(images)):
+        single = agent.classify_dust_level(image)
+        del result["processing_time_ms"], single["processing_time_ms"]
+        assert result == single, image.name
+
+
+def test_stages_pass_records_and_validate_only_where_a_result_leaves():
+    """Each stage built a pydantic model and dumped it, and the pipeline rebuilt
+    all three from the dicts. Records between stages must carry exactly what the
+    validated schemas do."""
+    from Agents import crew
+    from Backend.agents import bench_stages
+
+    measured = {"dust_level": 81.25, "confidence": 70.0, "visual_score": 18.75, "image_quality": "LOW"}
+    risk = crew.ProductionImageProcessor._calculate_risk_category(81.25, 70.0)
+    insights = crew.ProductionImageProcessor.insights(81.25, 70.0)
+    analysis = crew.ProductionImageProcessor.frame_analysis(measured, risk.value, insights, 3.0)
+    assert analysis.risk_category is crew.RiskLevel.CRITICAL and not hasattr(analysis, "__dict__")
+    schema = crew.AIAnalysisResult(timestamp="", image_id="", npu_acceleration=True, **analysis.rendered())
+    assert schema.model_dump(include=set(crew.FrameAnalysis._fields)) == analysis.rendered()
+
+    forecast = crew.solar_forecast(analysis.dust_level, analysis.confidence, "Bengaluru, India")
+    dumped = crew.standalone_solar_forecast("Bengaluru, India", analysis.rendered())
+    assert {name: dumped[name] for name in crew.SolarForecast._fields} == forecast.rendered()
+
+    decision = crew.cleaning_decision(analysis.dust_level, analysis.confidence, forecast.economic_factors)
+    dumped_decision = crew.standalone_decision_engine(analysis.rendered(), dumped)
+    assert {name: dumped_decision[name] for name in crew.CleaningDecision._fields} == decision.rendered()
+
+    with unittest.TestCase().assertRaises(ValueError):
+        crew.ProductionImageProcessor.frame_analysis({**measured, "dust_level": 101}, risk, insights, 3.0)
+
+    report = bench_stages.run(frames=50, location="Bengaluru, India", rounds=1)
+    assert set(report["results"]) == {"schemas", "records", "fleet"}
+    assert all(r["us_per_frame"] > 0 for r in report["results"].values())
+
+
+def test_decisions_store_prose_as_template_refs_and_render_it_on_read():
+    """Every frame formatted insights and a paragraph of reasoning that was
+    stored in each decision row and mostly never read. Rows keep a template id
+    and its numbers; the text is written when a decision is returned."""
+    from datetime import timedelta
+
+    from Agents import crew
+    from Backend.agents.image_classifier import ImageClassifierAgent
+    from Backend.database.models import SystemDecision, utcnow
+
+    with SessionLocal() as db:
+        services.reset_settings(db)
+        services.update_settings(db, {"auto_clean": False})
+        result = services.analyze_panel(db, "panel_01")
+        assert "error" not in result, result
+
+        row = db.query(SystemDecision).filter_by(decision_id=result["decision_id"]).one()
+        stored = json.loads(row.decision_data)["analysis"]
+        assert stored["insights"]["template"] == "insights"
+        assert stored["reasoning"]["template"] == "decision_reasoning"
+        rendered = services.with_prose({"analysis": stored})["analysis"]
+        assert len(json.dumps(stored)) < len(json.dumps(rendered))
+
+        # What the API returns is the text, exactly as the templates write it.
+        assert result["analysis"]["insights"] == crew.ProductionImageProcessor._generate_insights(
+            {"dust_level": stored["insights"]["values"][0], "confidence": stored["insights"]["values"][1]})
+        assert result["analysis"]["reasoning"].startswith("Comprehensive multi-factor analysis")
+        assert services.latest_decision(db)["analysis"] == result["analysis"] == rendered
+
+        # Rows written before keep their text.
+        legacy = {"decision_id": "legacy_prose", "analysis": {**rendered, "reasoning": "written out"}}
+        db.add(SystemDecision(decision_id="legacy_prose", timestamp=utcnow() + timedelta(days=1),
+                              decision_data=json.dumps(legacy), action_taken="no_action"))
+        db.commit()
+        try:
+            assert services.latest_decision(db) == legacy
+        finally:
+            db.query(SystemDecision).filter_by(decision_id="legacy_prose").delete()
+            db.commit()
+
+    assert crew.render_prose(["already", "text"]) == ["already", "text"] and crew.render_prose(None) is None
+
+    # The classifier still returns text; refs are for callers that store them.
+    agent = ImageClassifierAgent()
+    image = settings.image_dir / "panel_01_test.jpg"
+    text, refs = agent.classify_dust_level(image), agent.classify_dust_level(image, rendered=False)
+    for prose in ("insights", "reasoning"):
+        assert text[prose] == crew.render_prose(refs[prose]) == agent.classify_many([image])[0][prose]
+    assert isinstance(text["reasoning"], str) and refs["reasoning"]["template"] == "decision_reasoning"
+
+
+def test_a_write_does_not_hold_the_data_version_row_until_it_commits():
+    """Every write transaction updated the one "data" counter row, so on
+    PostgreSQL each writer queued on that row lock behind the last one."""
+    from sqlalchemy import event
+
+    from Backend.database.connection import engine
+    from Backend.database.models import SystemLog
+
+    statements = []
+
+    def record(conn, cursor, statement, *_):
+        statements.append(statement.split()[0].upper() + (" counter" if "version_counters" in statement else ""))
+
+    with SessionLocal() as db:
+        before = services.read_version(db, services.DATA_VERSION)
+        db.rollback()
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            db.add(SystemLog(level="INFO", component="version_probe", message="write"))
+            db.flush()
+            assert not any(s.endswith("counter") for s in statements), statements
+            db.commit()
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+        assert "UPDATE counter" in statements, statements
+        assert services.read_version(db, services.DATA_VERSION) == before + 1
+        assert services.data_etag(db) == f'"{before + 1}"', "this process sees its own write at once"
+
+
+def test_prose_renders_exactly_the_text_the_f_strings_wrote():
+    """Insights, forecast analysis and reasoning used to be formatted in place.
+    Rendered from a stored ref, JSON round trip and all, they must read byte for
+    byte as they did — no-payback decisions, stored as None, included."""
+    import random
+
+    from Agents import crew
+
+    # The f-strings as they were written before prose became template refs.
+    def forecast_analysis(location, dust_level, daily_power_loss, daily_loss_usd, weather_factor, confidence,
+                          cleaning_window):
+        return f"""Advanced forecast analysis for {location}: Dust level {dust_level:.1f}% 
+    causing {daily_power_loss:.1f} kWh daily losses (${daily_loss_usd:.2f}). Assumed clear-sky 
+    factor {weather_factor*100:.0f}% (no weather feed connected). Confidence: {confidence:.1f}%. Action window: 
+    {cleaning_window.value}. Economic viability: Strong ROI potential."""
+
+    def decision_reasoning(decision, decision_confidence, env_risk, dust_level, confidence, econ_viability,
+                           daily_loss_usd, payback_days, combined_score, roi_percentage):
+        return f"""Comprehensive multi-factor analysis indicates {decision.value.lower()} with {decision_confidence:.1f}% confidence. 
+    Environmental risk assessment: {env_risk:.1f}/100 (dust level {dust_level:.1f}%, confidence {confidence:.1f}%). 
+    Economic viability: {econ_viability:.1f}/100 (daily loss ${daily_loss_usd:.2f}, payback {payback_days:.1f} days). 
+    Combined decision score: {combined_score:.1f}/100. ROI projection: {roi_percentage:.1f}% annually."""
+
+    def stored(prose):
+        return crew.render_prose(json.loads(json.dumps(prose.ref(), allow_nan=False)))
+
+    rng = random.Random(25)
+    start = datetime(2025, 6, 1, 6)
+    analyses, forecasts, no_payback = [], [], 0
+    for i in range(3000):
+        dust = rng.choice([rng.uniform(0, 100), rng.choice([0, 20, 40, 60, 80, 100])])
+        confidence = rng.choice([rng.uniform(40, 100), 70, 90])
+        location = rng.choice(["Bengaluru, India", "-33.9, 18.4", "Atlantis"])
+
+        insights = crew.ProductionImageProcessor.insights(dust, confidence)
+        assert stored(insights) == crew.ProductionImageProcessor._generate_insights(
+            {"dust_level": dust, "confidence": confidence})
+
+        forecast = crew.calculate_advanced_forecast(dust, location, confidence, start)
+        daily_power_loss = (float(crew.clean_generation(location, start)[:24].sum())
+                            * float(crew.dust_impact(dust)) * crew.DUST_LOSS_FRACTION)
+        assert stored(forecast["llama_analysis"]) == forecast_analysis(
+            location, dust, daily_power_loss, daily_power_loss * 0.12, crew.CLEAR_SKY_FACTOR, confidence,
+            forecast["cleaning_window"])
+
+        if i % 5 == 0:
+            forecast["economic_factors"] = {**forecast["economic_factors"], "daily_loss_usd": 0}
+        analyses.append({"dust_level": dust, "confidence": confidence})
+        forecasts.append(forecast)
+
+    factor = lambda name, default: [f["economic_factors"].get(name, default) for f in forecasts]
+    rows = crew.decision_rows(crew.decide_fleet(
+        [a["dust_level"] for a in analyses], [a["confidence"] for a in analyses],
+        daily_loss_usd=factor("daily_loss_usd", 0), cleaning_cost_usd=factor("cleaning_cost_usd", 24.50),
+        weekly_loss_usd=factor("weekly_loss_usd", 0), annual_loss_usd=factor("annual_loss_usd", 0),
+        maintenance_frequency_days=factor("maintenance_frequency_days", 30),
+    ))
+    for analysis, forecast, row in zip(analyses, forecasts, rows):
+        for decided in (crew.calculate_intelligent_decision(analysis, forecast), row):
+            values = list(decided["reasoning"].values)
+            values[0] = crew.DecisionType(values[0])
+            if values[7] is None:
+                no_payback += 1
+                values[7] = float("inf")
+            assert (values[7] == float("inf")) == (forecast["economic_factors"]["daily_loss_usd"] <= 0)
+            assert stored(decided["reasoning"]) == decision_reasoning(*values)
+    assert no_payback >= 1000, "the no-payback case is covered"
+
+
 def main():
     tests = [value for name, value in sorted(globals().items()) if name.startswith("test_")]
-    failures = 0
+    failures = skipped = 0
     for test in tests:
         try:
             test()
             print(f"  ✅ {test.__name__}")
+        except unittest.SkipTest as e:
+            skipped += 1
+            print(f"  ⏭️  {test.__name__}: skipped — {e}")
         except Exception as e:
             failures += 1
             print(f"  ❌ {test.__name__}: {type(e).__name__}: {e}")
 
     print("=" * 60)
-    print(f"{len(tests) - failures}/{len(tests)} passed" + (f" — {failures} FAILED" if failures else " 🎉"))
+    ran = len(tests) - skipped
+    print(f"{ran - failures}/{ran} passed" + (f", {skipped} skipped" if skipped else "")
+          + (f" — {failures} FAILED" if failures else " 🎉"))
     return 1 if failures else 0
 
 
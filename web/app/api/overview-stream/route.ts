@@ -0,0 +1,24 @@
+import { openOverviewStream } from "@/lib/api";
+
+/**
+ * Relays `GET /overview/stream` to the browser.
+ *
+ * The browser never calls the backend itself (see lib/api.ts), so an open
+ * console's EventSource connects here and this handler holds the upstream
+ * stream. A backend that cannot stream gets a 502, which closes the
+ * EventSource and drops `useLiveOverview` back to its timer.
+ */
+export const dynamic = "force-dynamic";
+
+export async function GET(request: Request) {
+  const upstream = await openOverviewStream(request.signal);
+  if (!upstream) return new Response(null, { status: 502 });
+
+  return new Response(upstream.body, {
+    headers: {
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache, no-transform",
+      "X-Accel-Buffering": "no",
+    },
+  });
+}
@@ -1,17 +1,15 @@
 import { Note } from "@/components/ui/Empty";
-import { LiveRefresh } from "./LiveRefresh";
 
 /**
  * The frame every console screen sits in: the bar that names the page and
- * carries its actions, the banner when the data underneath is synthetic, and
- * the timer that keeps the page current while an operator watches it.
+ * carries its actions, and the banner when the data underneath is synthetic.
+ * What keeps the page current is its view's useLiveOverview.
  */
 export function ConsolePage({
   eyebrow,
   title,
   actions,
   demo,
-  refreshInterval,
   children,
 }: {
   eyebrow: string;
@@ -19,7 +17,6 @@ export function ConsolePage({
   actions?: React.ReactNode;
   /** Set when this database was filled by Backend/demo.py. */
   demo: boolean;
-  refreshInterval: number;
   children: React.ReactNode;
 }) {
   return (
@@ -43,8 +40,6 @@ export function ConsolePage({
         )}
         {children}
       </div>
-
-      <LiveRefresh seconds={refreshInterval} />
     </>
   );
 }
@@ -0,0 +1,98 @@
+"use client";
+
+import { useEffect, useRef, useState } from "react";
+import { useRouter } from "next/navigation";
+import { applyPatch, follows, type OverviewPatch } from "@/lib/overview";
+import type { Overview } from "@/lib/types";
+
+/**
+ * Keeps an open console page's overview current.
+ *
+ * The page renders once on the server from `GET /overview`; after that this
+ * follows `GET /overview/stream` and merges each `patch`'s changed keys into
+ * the copy the page draws from. A change costs the server one overview
+ * computation however many consoles are open, and no console asks for the
+ * page again because of it.
+ *
+ * The page is rendered on the server again only when patching cannot be
+ * trusted: a `snapshot` after the first (the stream reconnected, or fell so far
+ * behind the server dropped its patches) or a gap in the event ids. That render
+ * brings a fresh `initial`, which replaces the patched copy. `refreshWhen` lets
+ * a page that shows more than the overview — the log, the telemetry sweep —
+ * ask for one on the patches that move it. Where the stream is unavailable the
+ * page falls back to re-rendering every `refresh_interval` seconds.
+ *
+ * A hidden tab keeps patching, which costs nothing, but re-renders nothing; it
+ * catches up when it is shown again.
+ */
+export function useLiveOverview(
+  initial: Overview,
+  refreshWhen?: (patch: OverviewPatch) => boolean,
+): Overview {
+  const router = useRouter();
+  const [overview, setOverview] = useState(initial);
+  const wants = useRef(refreshWhen);
+  wants.current = refreshWhen;
+  const seconds = initial.settings.refresh_interval;
+
+  // A server render brings the whole overview again; it supersedes the patches.
+  useEffect(() => setOverview(initial), [initial]);
+
+  useEffect(() => {
+    let stale = false;
+    let timer: ReturnType<typeof setInterval> | undefined;
+
+    const refresh = () => {
+      if (document.hidden) stale = true;
+      else router.refresh();
+    };
+    const poll = () => {
+      if (timer || !seconds) return;
+      timer = setInterval(refresh, Math.max(5, seconds) * 1000);
+    };
+    const onVisible = () => {
+      if (!document.hidden && stale) {
+        stale = false;
+        router.refresh();
+      }
+    };
+
+    let source: EventSource | undefined;
+    if (typeof EventSource === "undefined") {
+      poll();
+    } else {
+      let last: number | null = null;
+      source = new EventSource("/api/overview-stream");
+      source.addEventListener("snapshot", (event) => {
+        const message = event as MessageEvent<string>;
+        const reconnected = last !== null;
+        last = Number(message.lastEventId);
+        setOverview(JSON.parse(message.data) as Overview);
+        // What the page shows besides the overview may have moved meanwhile.
+        if (reconnected) refresh();
+      });
+      source.addEventListener("patch", (event) => {
+        const message = event as MessageEvent<string>;
+        const id = Number(message.lastEventId);
+        const patch = JSON.parse(message.data) as OverviewPatch;
+        const gap = !follows(last, id);
+        last = id;
+        setOverview((current) => applyPatch(current, patch));
+        if (gap || wants.current?.(patch)) refresh();
+      });
+      source.onerror = () => {
+        // CONNECTING means the browser is retrying; CLOSED means it gave up.
+        if (source?.readyState === EventSource.CLOSED) poll();
+      };
+    }
+    document.addEventListener("visibilitychange", onVisible);
+
+    return () => {
+      source?.close();
+      clearInterval(timer);
+      document.removeEventListener("visibilitychange", onVisible);
+    };
+  }, [seconds, router]);
+
+  return overview;
+}
@@ -0,0 +1,32 @@
+"use client";
+
+import { ConsolePage } from "./ConsolePage";
+import { HealthCard } from "./HealthCard";
+import { useLiveOverview } from "./LiveOverview";
+import { SETTINGS_FORM_ID, SettingsForm } from "./SettingsForm";
+import { Icon } from "@/components/ui/Icon";
+import type { Overview } from "@/lib/types";
+
+/** The settings page, drawn from the live overview (see useLiveOverview). */
+export function SettingsView({ overview }: { overview: Overview }) {
+  const { health, stats, settings } = useLiveOverview(overview);
+
+  return (
+    <ConsolePage
+      eyebrow="What the system does on its own"
+      title="Settings"
+      demo={Boolean(settings.demo_seeded_at)}
+      actions={
+        // Submits the form below through the HTML `form` attribute, so the bar
+        // button and the one inside the form are the same action.
+        <button className="btn btn--sm btn--sun" type="submit" form={SETTINGS_FORM_ID}>
+          <Icon name="check" size={14} /> Save changes
+        </button>
+      }
+    >
+      <SettingsForm settings={settings}>
+        <HealthCard health={health} stats={stats} showReading />
+      </SettingsForm>
+    </ConsolePage>
+  );
+}
@@ -0,0 +1,36 @@
+import { describe, expect, it } from "vitest";
+import { applyPatch, follows } from "../overview";
+import type { Overview } from "../types";
+
+/**
+ * An open console keeps its overview current from the stream's patches alone,
+ * so a patch must replace exactly the keys it carries, and a missed one must
+ * be noticed rather than patched over.
+ */
+const overview = {
+  health: { status: "healthy" },
+  panels: [],
+  counts: { total: 4, clean: 4 },
+  stats: { total_analyses: 10 },
+  latest_decision: { message: "No decisions made yet. Try /analyze first!" },
+  settings: { refresh_interval: 30 },
+  timestamp: "2026-06-01T12:00:00",
+} as unknown as Overview;
+
+describe("overview patches", () => {
+  it("replaces the keys a patch carries and keeps the rest", () => {
+    const stats = { total_analyses: 11 } as Overview["stats"];
+    const patched = applyPatch(overview, { topics: ["analysis"], changes: { stats } });
+    expect(patched.stats).toBe(stats);
+    expect(patched.counts).toBe(overview.counts);
+    expect(overview.stats.total_analyses).toBe(10);
+  });
+
+  it("applies only the patch that comes next", () => {
+    expect(follows(4, 5)).toBe(true);
+    expect(follows(4, 6)).toBe(false);
+    expect(follows(4, 4)).toBe(false);
+    expect(follows(null, 1)).toBe(false);
+    expect(follows(4, Number.NaN)).toBe(false);
+  });
+});
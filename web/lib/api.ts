@@ -36,7 +36,16 @@ export class ApiError extends Error {
   }
 }
 
+// Reads the backend served with an ETag, kept per server process and sent back
+// as If-None-Match. The backend answers an unchanged one with a 304 before it
+// builds the payload, so re-rendering a page nothing has changed is cheap.
+const VALIDATED_READS = 64;
+const validated = new Map<string, { etag: string; body: unknown }>();
+
 async function call<T>(path: string, init?: RequestInit): Promise<T> {
+  const read = !init?.method || init.method === "GET";
+  const known = read ? validated.get(path) : undefined;
+
   let response: Response;
   try {
     response = await fetch(`${API_URL}${path}`, {
@@ -44,17 +53,28 @@ async function call<T>(path: string, init?: RequestInit): Promise<T> {
       headers: {
         "Content-Type": "application/json",
         ...(API_TOKEN ? { "X-API-Key": API_TOKEN } : {}),
+        ...(known ? { "If-None-Match": known.etag } : {}),
         ...init?.headers,
       },
-      // The console reports live hardware state; a cached answer would be a lie.
+      // The console reports live hardware state; only the backend may say a
+      // copy is still current, which is what the ETag above asks it.
       cache: "no-store",
     });
   } catch (cause) {
     throw new ApiError(0, path, "The backend did not answer. Is it running?");
   }
 
+  if (response.status === 304 && known) return known.body as T;
+
   const body = await response.json().catch(() => null);
 
+  const etag = response.headers.get("etag");
+  if (read && response.ok && etag) {
+    validated.delete(path);
+    validated.set(path, { etag, body });
+    if (validated.size > VALIDATED_READS) validated.delete(validated.keys().next().value!);
+  }
+
   if (!response.ok) {
     // FastAPI puts its message in `detail`; the service layer uses `error`.
     const detail = body?.detail ?? body?.error ?? `Request failed (${response.status})`;
@@ -79,6 +99,19 @@ export const getLogs = (limit = 50) => call<LogEntry[]>(`/system/logs?limit=${li
 export const getPanelDetail = (panelId: string) =>
   call<PanelDetail>(`/panels/${encodeURIComponent(panelId)}/detail`);
 
+/**
+ * The backend's overview event stream, opened from the server so the browser
+ * can follow it through app/api/overview-stream without knowing API_URL.
+ */
+export async function openOverviewStream(signal: AbortSignal): Promise<Response | null> {
+  try {
+    const response = await fetch(`${API_URL}/overview/stream`, { cache: "no-store", signal });
+    return response.ok && response.body ? response : null;
+  } catch {
+    return null;
+  }
+}
+
 /* -------------------------------------------------------------- mutations */
 
 export const analyzePanel = (panelId: string) => post<Decision>("/analyze", { panel_id: panelId });
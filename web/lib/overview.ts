@@ -0,0 +1,25 @@
+import type { Overview } from "./types";
+
+/**
+ * What `GET /overview/stream` sends after its first `snapshot`: the top-level
+ * keys of the overview that changed, whole, and the change-feed topics that
+ * moved them.
+ */
+export interface OverviewPatch {
+  topics: string[];
+  changes: Partial<Overview>;
+}
+
+/** `overview` with a patch's keys replaced — keys are the unit of change. */
+export function applyPatch(overview: Overview, patch: OverviewPatch): Overview {
+  return { ...overview, ...patch.changes };
+}
+
+/**
+ * Whether event `id` comes straight after `last`, the id of the snapshot or
+ * patch applied before it. Anything else is a gap: a patch was missed, and the
+ * copy in hand can no longer be patched into the current overview.
+ */
+export function follows(last: number | null, id: number): boolean {
+  return last !== null && Number.isInteger(id) && id === last + 1;
+}